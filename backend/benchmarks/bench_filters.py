@@ -0,0 +1,80 @@
+# bench_filters.py - Filter Implementation Benchmark
+# Usage (from backend/): python -m benchmarks.bench_filters --minutes 1,10,60
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scipy.signal import butter, lfilter
+from src.processing.filter_design import design_sos, sos_filter, fir_bandpass
+
+
+def legacy_fft_bandpass(y: np.ndarray, sr: int, low: float = 300, high: float = 3400) -> np.ndarray:
+    """The previous full-length complex FFT brick-wall filter (for comparison)."""
+    Y = np.fft.fft(y)
+    freqs = np.fft.fftfreq(len(Y), 1 / sr)
+    Y[(np.abs(freqs) > high) | (np.abs(freqs) < low)] = 0
+    return np.fft.ifft(Y).real
+
+
+def legacy_butter_lowpass(y: np.ndarray, sr: int, cutoff: float = 3000) -> np.ndarray:
+    """The previous (b, a)-form order-5 Butterworth."""
+    b, a = butter(5, cutoff / (0.5 * sr), btype='low')
+    return lfilter(b, a, y)
+
+
+def next_prime(n: int) -> int:
+    """Smallest prime >= n (worst case for the legacy FFT length)."""
+    def is_prime(k):
+        if k < 2 or k % 2 == 0:
+            return k == 2
+        return all(k % d for d in range(3, int(k ** 0.5) + 1, 2))
+    while not is_prime(n):
+        n += 1
+    return n
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark filter implementations")
+    parser.add_argument("--minutes", default="1,10,60", help="comma-separated input durations")
+    parser.add_argument("--sr", type=int, default=22050)
+    parser.add_argument("--prime", action="store_true", help="use prime-length inputs")
+    parser.add_argument("--legacy-max-minutes", type=float, default=10,
+                        help="skip the legacy full-FFT filter above this duration (needs several GB)")
+    args = parser.parse_args()
+
+    sr = args.sr
+    rng = np.random.default_rng(0)
+    cases = [
+        ("bandpass legacy full FFT", lambda y: legacy_fft_bandpass(y, sr), True),
+        ("bandpass FIR rfft overlap-add", lambda y: fir_bandpass(y, sr, 300, 3400), False),
+        ("lowpass legacy lfilter (b, a)", lambda y: legacy_butter_lowpass(y, sr), False),
+        ("lowpass SOS", lambda y: sos_filter(y, design_sos('low', 3000, sr, 5)), False),
+        ("lowpass SOS zero-phase", lambda y: sos_filter(y, design_sos('low', 3000, sr, 5), zero_phase=True), False),
+    ]
+
+    print(f"{'case':34s} {'minutes':>8s} {'samples':>11s} {'seconds':>9s}")
+    for minutes in (float(m) for m in args.minutes.split(",")):
+        n = int(minutes * 60 * sr)
+        if args.prime:
+            n = next_prime(n)
+        y = rng.standard_normal(n).astype(np.float32)
+        for name, fn, is_legacy_fft in cases:
+            if is_legacy_fft and minutes > args.legacy_max_minutes:
+                print(f"{name:34s} {minutes:8g} {n:11d} {'skipped':>9s}")
+                continue
+            print(f"{name:34s} {minutes:8g} {n:11d} {timed(fn, y):9.3f}")
+
+
+if __name__ == "__main__":
+    main()
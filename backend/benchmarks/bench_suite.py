@@ -0,0 +1,255 @@
+# bench_suite.py - Effect, Filter, Decode and Endpoint Benchmark Suite
+# Usage (from backend/): python -m benchmarks.bench_suite --durations 5,60,600 --rates 16000,44100
+#
+# Every case runs on synthetic speech-like audio at each duration and sample
+# rate. Cases are the in-memory effects, each /filter-audio filter type (the
+# task the endpoint runs, streaming included), decode through
+# audio_io.convert_to_wav, the comparison plot and one full /process-audio
+# request through the FastAPI test client. Wall time is the best of --repeat
+# runs; peak memory is traced in a separate first run (tracemalloc sees numpy
+# buffers; for the request case it covers the API process, not the workers).
+# Results are compared with a baseline JSON; the exit status is 1 when any
+# case got slower or bigger than the baseline by more than --threshold.
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import lfilter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if __name__ == "__main__":
+    # Keep uploads and results out of data/, and time real work instead of cache hits
+    os.environ.setdefault("TEMP_DIR", os.path.join(tempfile.mkdtemp(prefix="bench_"), "processed"))
+    os.environ.setdefault("RESULT_CACHE_ENABLED", "false")
+
+from config.settings import TEMP_DIR
+from src.api.tasks import filter_audio_task
+from src.processing import AudioBuffer, run_effect
+from src.processing.filters import FILTER_TYPES, apply_noise_filter
+from src.processing.pipeline import EFFECTS
+from src.utils.audio_io import convert_to_wav
+from src.utils.visualization import save_comparison_plot
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Formants (Hz) and bandwidths of a neutral vowel
+FORMANTS = ((500, 80), (1500, 100), (2500, 120))
+
+# Container formats written for the decode cases (skipped if libsndfile cannot write one)
+DECODE_FORMATS = ("wav", "flac", "mp3")
+
+
+# ============== SIGNALS ==============
+
+def speech_like(seconds: float, sr: int, seed: int = 0) -> np.ndarray:
+    """
+    Speech stand-in: a glottal pulse train with a wandering 110-210 Hz pitch
+    through three formant resonators, a 4 Hz syllable envelope, pauses and
+    breath noise. float32, peak 0.5.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sr)
+    t = np.arange(n) / sr
+    f0 = 160 + 35 * np.sin(2 * np.pi * 0.3 * t) + 15 * np.sin(2 * np.pi * 1.7 * t + rng.uniform(0, 2 * np.pi))
+    pulses = np.diff(np.floor(np.cumsum(f0) / sr), prepend=0.0)
+    excitation = pulses + 0.02 * rng.standard_normal(n)
+
+    voiced = np.zeros(n)
+    for freq, bandwidth in FORMANTS:
+        r = np.exp(-np.pi * bandwidth / sr)
+        voiced += lfilter([1 - r], [1, -2 * r * np.cos(2 * np.pi * freq / sr), r * r], excitation)
+
+    # Syllables at 4 Hz; about one in five quarter-second slots is a pause
+    slot = -(-sr // 4)
+    talking = np.repeat(rng.random(-(-n // slot)) < 0.8, slot)[:n]
+    envelope = np.sqrt(np.abs(np.sin(2 * np.pi * 4 * t))) * talking
+    y = voiced * envelope + 0.003 * rng.standard_normal(n)
+    peak = np.max(np.abs(y)) if n else 0.0
+    return (0.5 * y / peak if peak > 0 else y).astype(np.float32)
+
+
+def write_inputs(y: np.ndarray, sr: int, directory: str) -> dict:
+    """Write y in every DECODE_FORMATS container; returns {format: path}."""
+    paths = {}
+    for fmt in DECODE_FORMATS:
+        path = os.path.join(directory, f"input_{sr}_{len(y)}.{fmt}")
+        try:
+            sf.write(path, y, sr, format=fmt.upper())
+        except (sf.LibsndfileError, TypeError, ValueError) as e:
+            print(f"Cannot write {fmt} input ({e}); skipping its decode case")
+            continue
+        paths[fmt] = path
+    return paths
+
+
+# ============== CASES ==============
+
+def build_cases(y: np.ndarray, sr: int, inputs: dict, client, request_effect: str, scratch: str) -> list:
+    """(name, callable) for every benchmark case at one duration and rate."""
+    buf = AudioBuffer(y, sr)
+    cases = [(f"effect/{name}", lambda name=name: run_effect(buf, name)) for name in EFFECTS]
+    cases.append(("effect/noise_filter", lambda: apply_noise_filter(buf)))
+    cases += [(f"filter/{name}", lambda name=name: filter_audio_task(inputs["wav"], name, 50))
+              for name in FILTER_TYPES]
+    cases += [(f"decode/{fmt}", lambda path=path: convert_to_wav(path, os.path.join(scratch, "decoded.wav")))
+              for fmt, path in inputs.items()]
+    cases.append(("plot/comparison", lambda: os.remove(save_comparison_plot(y, sr, y, sr, "bench", scratch))))
+
+    if client is not None:
+        with open(inputs["wav"], "rb") as f:
+            upload = f.read()
+
+        def request():
+            response = client.post("/process-audio", files={"file": ("bench.wav", upload, "audio/wav")},
+                                   data={"effect": request_effect})
+            if response.status_code != 200:
+                raise RuntimeError(f"/process-audio returned {response.status_code}: {response.text}")
+
+        cases.append((f"request/process-audio:{request_effect}", request))
+    return cases
+
+
+def measure(fn, repeat: int) -> dict:
+    """Peak traced memory of a first run (also the warm-up), then the best wall time of `repeat` runs."""
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return {"seconds": round(best, 6), "peak_mb": round(peak / (1024 * 1024), 2)}
+
+
+# ============== BASELINE ==============
+
+def result_key(case: str, seconds: float, sr: int) -> str:
+    return f"{case}@{seconds:g}s/{sr}"
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_seconds: float = 0.005,
+            min_mb: float = 1.0) -> dict:
+    """
+    Regressions of results against baseline ({key: {"seconds", "peak_mb"}}):
+    {key: [reasons]} for cases more than `threshold` (a fraction) slower or
+    bigger. Differences under min_seconds / min_mb are noise and never count.
+    """
+    regressions = {}
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        reasons = []
+        for metric, floor in (("seconds", min_seconds), ("peak_mb", min_mb)):
+            before, after = base[metric], current[metric]
+            if after - before > floor and after > before * (1 + threshold):
+                reasons.append(f"{metric} {before:g} -> {after:g}")
+        if reasons:
+            regressions[key] = reasons
+    return regressions
+
+
+def change(current: dict, base: dict) -> str:
+    if not base or base["seconds"] <= 0:
+        return "new"
+    return f"{100 * (current['seconds'] / base['seconds'] - 1):+.0f}%"
+
+
+def write_report(path: str, report: dict):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"Wrote {path}")
+
+
+# ============== MAIN ==============
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark effects, filters, decode and /process-audio")
+    parser.add_argument("--durations", default="5,60,600", help="comma-separated input durations in seconds")
+    parser.add_argument("--rates", default="16000,44100", help="comma-separated sample rates")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case (best is kept)")
+    parser.add_argument("--only", default="", help="run only cases whose name contains this text")
+    parser.add_argument("--request-effect", default="echo", help="effect used for the /process-audio case")
+    parser.add_argument("--no-request", action="store_true", help="skip the /process-audio case")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown/memory growth as a fraction (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="record the results in the baseline (other cases keep their values)")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    scratch = tempfile.mkdtemp(prefix="bench_inputs_")
+    client = None
+    if not args.no_request:
+        from fastapi.testclient import TestClient
+        from main import app
+        client = TestClient(app).__enter__()
+
+    results = {}
+    print(f"{'case':36s} {'seconds':>8s} {'rate':>6s} {'wall s':>9s} {'peak MB':>9s} {'baseline':>9s}")
+    try:
+        for seconds in (float(s) for s in args.durations.split(",")):
+            for sr in (int(r) for r in args.rates.split(",")):
+                y = speech_like(seconds, sr)
+                inputs = write_inputs(y, sr, scratch)
+                for name, fn in build_cases(y, sr, inputs, client, args.request_effect, scratch):
+                    if args.only not in name:
+                        continue
+                    key = result_key(name, seconds, sr)
+                    results[key] = measure(fn, args.repeat)
+                    r = results[key]
+                    print(f"{name:36s} {seconds:8g} {sr:6d} {r['seconds']:9.3f} {r['peak_mb']:9.1f} "
+                          f"{change(r, baseline.get(key)):>9s}", flush=True)
+                for path in inputs.values():
+                    os.remove(path)
+    finally:
+        if client is not None:
+            client.__exit__(None, None, None)
+        shutil.rmtree(scratch, ignore_errors=True)
+        if os.path.basename(os.path.dirname(TEMP_DIR)).startswith("bench_"):
+            shutil.rmtree(os.path.dirname(TEMP_DIR), ignore_errors=True)
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count(), "numpy": np.__version__},
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        write_report(args.output, report)
+
+    regressions = compare(results, baseline, args.threshold)
+    for key, reasons in sorted(regressions.items()):
+        print(f"REGRESSION {key}: {', '.join(reasons)}")
+    if baseline:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%} "
+              f"({sum(k in baseline for k in results)} of {len(results)} cases in the baseline)")
+    if args.save_baseline:
+        write_report(args.baseline, {**report, "results": {**baseline, **results}})
+        return
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,134 @@ CORS_ORIGINS = [
 # File Storage
 TEMP_DIR = os.getenv("TEMP_DIR", "data/processed")
 os.makedirs(TEMP_DIR, exist_ok=True)
+# Uploads and other per-request intermediates (removed when the request ends)
+SCRATCH_DIR = os.getenv("SCRATCH_DIR", os.path.join(os.path.dirname(TEMP_DIR), "tmp"))
+os.makedirs(SCRATCH_DIR, exist_ok=True)
+
+# Storage Lifecycle
+# A background janitor deletes artifacts older than their category's TTL and
+# then the oldest ones until the category fits its quota. Categories:
+# processed (results in TEMP_DIR), derived (peaks/waveform images), raw
+# (archived uploads) and scratch (orphaned intermediates, TTL only).
+# Interval 0 disables the janitor.
+STORAGE_INDEX_PATH = os.getenv("STORAGE_INDEX_PATH", os.path.join(os.path.dirname(TEMP_DIR), "storage.db"))
+STORAGE_JANITOR_INTERVAL = float(os.getenv("STORAGE_JANITOR_INTERVAL", "300"))  # seconds
+STORAGE_TTL_HOURS = {
+    "processed": float(os.getenv("PROCESSED_TTL_HOURS", "24")),
+    "derived": float(os.getenv("DERIVED_TTL_HOURS", "24")),
+    "raw": float(os.getenv("RAW_TTL_HOURS", "168")),
+    "scratch": float(os.getenv("SCRATCH_TTL_HOURS", "1")),
+}
+STORAGE_QUOTA_MB = {
+    "processed": int(os.getenv("PROCESSED_QUOTA_MB", "5120")),
+    "derived": int(os.getenv("DERIVED_QUOTA_MB", "1024")),
+    "raw": int(os.getenv("RAW_QUOTA_MB", "10240")),
+}
+
+# Uploads
+# Bodies are copied to disk in UPLOAD_CHUNK_BYTES chunks (hashed on the way)
+# and rejected with 413 past MAX_UPLOAD_MB or MAX_UPLOAD_SECONDS of audio.
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "200"))
+MAX_UPLOAD_SECONDS = float(os.getenv("MAX_UPLOAD_SECONDS", "3600"))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+
+# Audio Decoding
+# WAV/FLAC/OGG/AIFF/MP3 are decoded in-process; other uploads (webm, m4a, ...)
+# are piped through this ffmpeg binary.
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+
+# Processing Sample Rate
+# Uploads are decoded once and processed at: "native" (the file's own rate),
+# "fixed" (always PROCESSING_SAMPLE_RATE) or "cap" (native, but at most
+# PROCESSING_SAMPLE_RATE). RESAMPLE_QUALITY: fast, high or very_high.
+PROCESSING_RATE_MODE = os.getenv("PROCESSING_RATE_MODE", "cap")
+PROCESSING_SAMPLE_RATE = int(os.getenv("PROCESSING_SAMPLE_RATE", "48000"))
+RESAMPLE_QUALITY = os.getenv("RESAMPLE_QUALITY", "high")
+
+# Pitch/Time Engine (chipmunk, robot, electronic, monster)
+# PITCH_QUALITY: fast (1024-point frames, 4x overlap), balanced (2048, 4x) or
+# high (2048, 8x overlap with phase locking and the very_high resampler).
+PITCH_QUALITY = os.getenv("PITCH_QUALITY", "balanced")
+
+# Delay and Reverb (delay, reverb)
+# Reverb rooms are the synthesized presets (room, hall, cathedral) plus every
+# impulse response file (wav/flac/ogg/aiff) in IMPULSE_RESPONSE_DIR, by file
+# name. Convolution runs in partitions of REVERB_PARTITION_SIZE samples. The
+# output rings out past the end of the input for the IR length, at most
+# REVERB_MAX_TAIL_SECONDS (0 keeps the input length).
+IMPULSE_RESPONSE_DIR = os.getenv("IMPULSE_RESPONSE_DIR", os.path.join(os.path.dirname(TEMP_DIR), "impulse_responses"))
+REVERB_PARTITION_SIZE = int(os.getenv("REVERB_PARTITION_SIZE", "16384"))
+REVERB_MAX_TAIL_SECONDS = float(os.getenv("REVERB_MAX_TAIL_SECONDS", "5"))
+
+# Streaming Mode
+# Uploads at least STREAMING_MIN_DURATION seconds long are processed block by
+# block (constant memory) when the effect/filter supports it.
+STREAMING_MIN_DURATION = float(os.getenv("STREAMING_MIN_DURATION", "120"))
+STREAM_BLOCK_SIZE = int(os.getenv("STREAM_BLOCK_SIZE", "65536"))  # samples per block
+
+# Realtime WebSocket Streaming (/ws/process)
+WS_MAX_FRAME_SAMPLES = int(os.getenv("WS_MAX_FRAME_SAMPLES", "8192"))
+WS_MIN_SAMPLE_RATE = int(os.getenv("WS_MIN_SAMPLE_RATE", "8000"))
+WS_MAX_SAMPLE_RATE = int(os.getenv("WS_MAX_SAMPLE_RATE", "192000"))
+
+# Waveform Peaks (/peaks/{filename})
+WAVEFORM_MAX_PIXELS = int(os.getenv("WAVEFORM_MAX_PIXELS", "20000"))
+
+# Waveform Images (/waveform/{filename}) - rendered on first fetch, cached per size
+WAVEFORM_WIDTH = int(os.getenv("WAVEFORM_WIDTH", "1400"))
+WAVEFORM_HEIGHT = int(os.getenv("WAVEFORM_HEIGHT", "700"))
+WAVEFORM_MAX_IMAGE_SIZE = int(os.getenv("WAVEFORM_MAX_IMAGE_SIZE", "4000"))  # max width/height in pixels
+
+# Result Cache
+# Processed results are cached by (digest of the decoded upload, effect, params)
+# and evicted least recently used once they exceed RESULT_CACHE_MAX_MB.
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_MAX_MB = int(os.getenv("RESULT_CACHE_MAX_MB", "1024"))
+
+# Speech Synthesis Cache (/tts, /tts-eleven)
+# Synthesized audio is cached by (engine, normalized text, language/voice,
+# model, voice settings) and served from disk on repeat prompts. Cached files
+# are owned by the cache (LRU within TTS_CACHE_MAX_MB), not by the storage
+# janitor. TTS_SYNTHESIZER=local replaces every engine with an offline
+# stand-in (tones, no network) for tests and development.
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "512"))
+TTS_SYNTHESIZER = os.getenv("TTS_SYNTHESIZER", "")
+
+# ElevenLabs Client
+# One keep-alive connection pool per process. Idempotent calls are retried on
+# connection errors, 429 and 5xx with exponential backoff. The voice list is
+# cached for ELEVENLABS_VOICES_TTL seconds (cleared when voices are added or deleted).
+ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io/v1")
+ELEVENLABS_CONNECT_TIMEOUT = float(os.getenv("ELEVENLABS_CONNECT_TIMEOUT", "5"))  # seconds
+ELEVENLABS_READ_TIMEOUT = float(os.getenv("ELEVENLABS_READ_TIMEOUT", "60"))  # seconds between bytes
+ELEVENLABS_RETRIES = int(os.getenv("ELEVENLABS_RETRIES", "2"))
+ELEVENLABS_VOICES_TTL = float(os.getenv("ELEVENLABS_VOICES_TTL", "300"))  # seconds
+ELEVENLABS_STREAM_CHUNK = int(os.getenv("ELEVENLABS_STREAM_CHUNK", str(16 * 1024)))  # bytes
+
+# Translation Cache (/translate, /translate-batch)
+# Translations are cached by (source, target, text) in memory (LRU) and in
+# SQLite (least recently used rows beyond TRANSLATION_CACHE_MAX_ENTRIES are
+# dropped). Cache misses of one batch are translated TRANSLATION_CONCURRENCY at a time.
+TRANSLATION_CACHE_PATH = os.getenv("TRANSLATION_CACHE_PATH", os.path.join(os.path.dirname(TEMP_DIR), "translations.db"))
+TRANSLATION_CACHE_MEMORY_ENTRIES = int(os.getenv("TRANSLATION_CACHE_MEMORY_ENTRIES", "4096"))
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "200000"))
+TRANSLATION_CONCURRENCY = int(os.getenv("TRANSLATION_CONCURRENCY", "8"))
+TRANSLATE_BATCH_MAX_SEGMENTS = int(os.getenv("TRANSLATE_BATCH_MAX_SEGMENTS", "500"))
+
+# Effect Chains (/process-chain)
+MAX_CHAIN_STAGES = int(os.getenv("MAX_CHAIN_STAGES", "16"))
+
+# Long-Form Speech-to-Text (/stt)
+# Recordings longer than STT_LONG_FORM_SECONDS are split at pauses (energy VAD)
+# into segments of at most STT_SEGMENT_MAX_SECONDS, recognized
+# STT_CONCURRENCY at a time and stitched in order. STT_RECOGNIZER=local
+# replaces the Google recognizer with an offline stand-in.
+STT_LONG_FORM_SECONDS = float(os.getenv("STT_LONG_FORM_SECONDS", "50"))
+STT_SEGMENT_MAX_SECONDS = float(os.getenv("STT_SEGMENT_MAX_SECONDS", "30"))
+STT_MIN_SILENCE_SECONDS = float(os.getenv("STT_MIN_SILENCE_SECONDS", "0.3"))
+STT_CONCURRENCY = int(os.getenv("STT_CONCURRENCY", "4"))
+STT_RECOGNIZER = os.getenv("STT_RECOGNIZER", "google")
 
 # Supported Languages for TTS/STT
 SUPPORTED_LANGUAGES = {
@@ -27,3 +155,31 @@ SUPPORTED_LANGUAGES = {
     "de": "German",
     "es": "Spanish",
 }
+
+# Worker Pools
+# CPU-bound DSP (effects, filters, plotting) runs in a process pool so it never
+# blocks the event loop; blocking network calls (gTTS, Google STT, ElevenLabs,
+# translation) run in a thread pool. WORKER_PROCESSES=0 runs DSP in threads.
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", str(os.cpu_count() or 1)))
+WORKER_START_METHOD = os.getenv("WORKER_START_METHOD", "spawn")
+IO_THREADS = int(os.getenv("IO_THREADS", "16"))
+WORKER_QUEUE_DEPTH = int(os.getenv("WORKER_QUEUE_DEPTH", "64"))  # max in-flight tasks per pool
+TASK_TIMEOUT = float(os.getenv("TASK_TIMEOUT", "120"))  # seconds
+
+# Batch Processing (/batch)
+# Files of one batch run at most BATCH_CONCURRENCY at a time across all
+# batches, so large batches leave worker slots free for interactive requests.
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "100"))
+BATCH_MAX_MB = int(os.getenv("BATCH_MAX_MB", "1024"))  # whole request (all files or the zip)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", str(max(1, WORKER_PROCESSES // 2))))
+
+# Job Queue (async=true on /process-audio and /filter-audio)
+# Jobs persist in SQLite across restarts. At most JOB_WORKERS run at once and
+# bulk jobs never take the last slot, so interactive jobs overtake them.
+# Uploads up to JOB_INTERACTIVE_MAX_SECONDS long default to the interactive class.
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join(os.path.dirname(TEMP_DIR), "jobs.db"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(max(2, WORKER_PROCESSES))))
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", "3600"))  # seconds per job
+JOB_INTERACTIVE_MAX_SECONDS = float(os.getenv("JOB_INTERACTIVE_MAX_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))  # runs interrupted by restarts or full pools
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "24"))  # finished jobs kept for polling
@@ -1,17 +1,61 @@
 # main.py - FastAPI Application Entry Point
-from fastapi import FastAPI
+import asyncio
+import sqlite3
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from config.settings import CORS_ORIGINS
+from config.settings import CORS_ORIGINS, TEMP_DIR, STORAGE_JANITOR_INTERVAL, BATCH_MAX_MB
 from src.api import router
+from src.api.routes import RESULT_CACHE, JOB_HANDLERS, tts_cache_stats
+from src.api.tasks import RAW_AUDIO_DIR, PEAKS_DIR, WAVEFORM_DIR
+from src.utils.audio_io import decode_stats
+from src.utils.jobs import JOBS, dispatch_jobs
+from src.utils.storage import janitor_loop, storage_stats
+from src.utils.translation import TRANSLATIONS
+from src.utils.uploads import MAX_UPLOAD_BYTES
+from src.utils.workers import pool_stats, shutdown_pools
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown hooks."""
+    janitor = None
+    if STORAGE_JANITOR_INTERVAL > 0:
+        directories = {"processed": [TEMP_DIR], "derived": [PEAKS_DIR, WAVEFORM_DIR], "raw": [RAW_AUDIO_DIR]}
+        janitor = asyncio.create_task(janitor_loop(directories))
+    dispatcher = asyncio.create_task(dispatch_jobs(JOBS, JOB_HANDLERS))
+    yield
+    if janitor is not None:
+        janitor.cancel()
+    dispatcher.cancel()
+    shutdown_pools()
+
 
 app = FastAPI(
     title="DSP Audio Processing API",
     description="Advanced voice processing with DSP algorithms",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
-# Setup CORS
+# Multipart framing allowance on top of MAX_UPLOAD_BYTES
+UPLOAD_OVERHEAD_BYTES = 1024 * 1024
+
+
+@app.middleware("http")
+async def reject_oversized_bodies(request: Request, call_next):
+    """Reject bodies whose declared length is over the upload limit before they are read."""
+    limit = BATCH_MAX_MB * 1024 * 1024 if request.url.path == "/batch" else MAX_UPLOAD_BYTES
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > limit + UPLOAD_OVERHEAD_BYTES:
+        return JSONResponse(status_code=413, content={"error": "Request body too large"})
+    return await call_next(request)
+
+
+# Setup CORS (added last so it also wraps the 413 responses above)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=CORS_ORIGINS,
@@ -24,6 +68,15 @@ app.add_middleware(
 app.include_router(router)
 
 
+async def job_counts():
+    """Jobs per state for the health check (None if the job database cannot be read)."""
+    try:
+        return await JOBS.call(JOBS.counts)
+    except sqlite3.Error as e:
+        print(f"Health check: job counts unavailable: {e}")
+        return None
+
+
 @app.get("/")
 async def root():
     """Health check endpoint."""
@@ -32,10 +85,23 @@ async def root():
         "version": "2.0.0",
         "endpoints": [
             "/process-audio",
+            "/process-chain",
+            "/batch",
+            "/translate-batch",
+            "/jobs/{job_id}",
             "/tts",
             "/stt",
-            "/files/{filename}"
-        ]
+            "/files/{filename}",
+            "/peaks/{filename}",
+            "/waveform/{filename}"
+        ],
+        "workers": pool_stats(),
+        "result_cache": RESULT_CACHE.stats(),
+        "tts_cache": tts_cache_stats(),
+        "translation_cache": TRANSLATIONS.stats(),
+        "decode": decode_stats(),
+        "storage": storage_stats(),
+        "jobs": await job_counts()
     }
 
 
@@ -1,73 +1,214 @@
 # src/api/routes.py - FastAPI Routes
-from fastapi import APIRouter, UploadFile, File, Form
-from fastapi.responses import FileResponse, JSONResponse
-import shutil
+from fastapi import APIRouter, UploadFile, File, Form, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+import asyncio
 import os
-import uuid
+import json
+import time
 import traceback
-from datetime import datetime
-
-from config.settings import TEMP_DIR
-from src.utils.audio_io import convert_to_wav
-from src.utils.visualization import save_comparison_plot
-from src.utils.translation import translate_text
-from src.processing import (
-    chipmunk_effect,
-    robot_effect,
-    echo_effect,
-    electronic_voice_effect,
-    stutter_effect,
-    whisper_effect,
-    distortion_effect,
-    reverse_effect,
-    monster_effect,
-    telephone_effect,
-    process_voice,
-    text_to_speech,
-    speech_to_text,
-)
-from src.processing.filters import butter_lowpass_filter, remove_non_voice_sounds
-import librosa
-import soundfile as sf
+import zipfile
 import numpy as np
-import tempfile
+
+from config.settings import (
+    TEMP_DIR,
+    MAX_CHAIN_STAGES,
+    WS_MAX_FRAME_SAMPLES,
+    WAVEFORM_MAX_PIXELS,
+    WAVEFORM_WIDTH,
+    WAVEFORM_HEIGHT,
+    WAVEFORM_MAX_IMAGE_SIZE,
+    RESULT_CACHE_ENABLED,
+    RESULT_CACHE_MAX_MB,
+    TTS_CACHE_ENABLED,
+    TTS_CACHE_MAX_MB,
+    BATCH_MAX_FILES,
+    BATCH_MAX_MB,
+    BATCH_CONCURRENCY,
+    JOB_TIMEOUT,
+    JOB_INTERACTIVE_MAX_SECONDS,
+    TRANSLATION_CONCURRENCY,
+    TRANSLATE_BATCH_MAX_SEGMENTS,
+    STT_LONG_FORM_SECONDS,
+    STT_CONCURRENCY,
+)
+from src.utils.translation import TRANSLATIONS, lang_code, translate_text, translate_uncached
+from src.utils.audio_io import audio_duration, record_decode, sniff_format
+from src.utils.cache import DiskCache, cache_key
+from src.utils.jobs import JOBS, PRIORITIES, run_job_task
+from src.utils.storage import TempScope
+from src.utils.uploads import MAX_UPLOAD_BYTES, UploadTooLargeError, archive_file, save_upload
+from src.utils.workers import run_cpu, run_io, WorkerBusyError, WorkerTimeoutError
+from src.processing import EFFECTS, SynthesisError, normalize_text, synthesis_key, synthesize
+from src.processing.chain import ChainError, validate_chain, validate_stage_params
+from src.processing.pipeline import EFFECT_PARAMS
+from src.processing.realtime import RealtimeSession, TARGET_LATENCY_MS
+from src.api.tasks import (
+    RAW_AUDIO_DIR,
+    AudioConversionError,
+    ingest_upload_task,
+    convert_upload_task,
+    with_original,
+    result_files,
+    process_audio_task,
+    process_chain_task,
+    filter_audio_task,
+    extract_zip_task,
+    batch_item_task,
+    stt_task,
+    stt_plan_task,
+    stt_segment_task,
+    peaks_task,
+    waveform_task,
+    waveform_cache_path,
+    move_to_temp_dir,
+)
 
 router = APIRouter()
 
-# Paths
-RAW_AUDIO_DIR = os.path.join(os.path.dirname(TEMP_DIR), "raw")
-os.makedirs(RAW_AUDIO_DIR, exist_ok=True)
-
-
-def apply_noise_filter(audio_path: str) -> str:
-    """Apply noise filtering to audio using Spectral Subtraction."""
-    y, sr = librosa.load(audio_path)
-    
-    # Spectral Subtraction - thông minh hơn lowpass+bandpass
-    # Phân tích và trừ tiếng ồn, giữ giọng tự nhiên hơn
-    noise_samples = int(0.1 * sr)
-    if len(y) > noise_samples:
-        noise_profile = np.abs(np.fft.fft(y[:noise_samples]))
-        noise_estimate = np.mean(noise_profile) * 0.5  # noise_reduce = 0.5
-        
-        Y = np.fft.fft(y)
-        magnitude = np.abs(Y)
-        phase = np.angle(Y)
-        
-        magnitude = np.maximum(magnitude - noise_estimate, 0)
-        Y_clean = magnitude * np.exp(1j * phase)
-        y_clean = np.fft.ifft(Y_clean).real
-    else:
-        y_clean = y
-    
-    # Normalize
-    peak = np.max(np.abs(y_clean))
-    if peak > 0:
-        y_clean = y_clean * (0.95 / peak)
-    
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-        sf.write(temp_file.name, y_clean, sr)
-        return temp_file.name
+# Processed results by content (see src/utils/cache.py)
+RESULT_CACHE = DiskCache(os.path.join(TEMP_DIR, "cache", "results"), RESULT_CACHE_MAX_MB * 1024 * 1024, "results")
+
+# Synthesized speech by prompt (see synthesis_key in src/processing/speech.py)
+TTS_CACHE = DiskCache(os.path.join(TEMP_DIR, "cache", "tts"), TTS_CACHE_MAX_MB * 1024 * 1024, "tts")
+TTS_ENGINE_STATS = {}  # engine -> hits, misses, characters saved
+
+
+def worker_error_response(e: Exception):
+    """Map worker pool errors to HTTP responses (None if e is not a pool error)."""
+    if isinstance(e, WorkerBusyError):
+        return JSONResponse(status_code=503, content={"error": str(e)})
+    if isinstance(e, WorkerTimeoutError):
+        return JSONResponse(status_code=504, content={"error": str(e)})
+    return None
+
+
+async def receive_upload(file: UploadFile, scope: TempScope, prefix: str, default_ext: str = "webm",
+                         max_bytes: int = None):
+    """
+    Copy an upload into the request's scratch scope on the I/O pool (chunked,
+    hashed, size-limited). Returns (path, sha256 digest of the upload).
+    """
+    max_bytes = MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLargeError(f"Upload exceeds {max_bytes // (1024 * 1024)} MB")
+    file_ext = file.filename.split(".")[-1] if file.filename and "." in file.filename else default_ext
+    path = scope.path(prefix, f".{file_ext}")
+    _, digest = await run_io(save_upload, file.file, path, max_bytes)
+    return path, digest
+
+
+async def cached_result(key: str, func, *args, timeout: float = None) -> dict:
+    """
+    Run func(*args) on the CPU pool unless the same result is cached or
+    already being computed by another request. Adds "cached" to the payload.
+    """
+    if not RESULT_CACHE_ENABLED:
+        result = await run_cpu(func, *args, timeout=timeout)
+        record_decode(result.pop("decode", None))
+        return {**result, "cached": False}
+
+    async def create():
+        result = await run_cpu(func, *args, timeout=timeout)
+        record_decode(result.pop("decode", None))
+        return result, result_files(result)
+
+    result, hit = await RESULT_CACHE.get_or_create(key, create)
+    return {**result, "cached": hit}
+
+
+async def cached_lookup(key: str):
+    """A cached result (with "cached": True) or None, without running anything."""
+    if not RESULT_CACHE_ENABLED:
+        return None
+    result = await RESULT_CACHE.lookup(key)
+    return None if result is None else {**result, "cached": True}
+
+
+async def cached_speech(engine: str, text: str, **params) -> dict:
+    """
+    Synthesize text on the I/O pool unless the same prompt is cached (or being
+    synthesized). Returns {"audio_url", "cached"}.
+    """
+    if not TTS_CACHE_ENABLED:
+        output_path = await run_io(synthesize, engine, text, **params)
+        return {"audio_url": move_to_temp_dir(output_path), "cached": False}
+
+    key = synthesis_key(engine, text, **params)
+
+    async def create():
+        output_path = await run_io(synthesize, engine, text, **params)
+        # Owned by the cache (not the storage janitor) so prompts outlive TTLs
+        final_name = f"tts_{key[:32]}{os.path.splitext(output_path)[1]}"
+        final_path = await run_io(archive_file, output_path, os.path.join(TEMP_DIR, final_name))
+        return {"audio_url": f"/files/{final_name}"}, [final_path]
+
+    value, hit = await TTS_CACHE.get_or_create(key, create)
+    stats = TTS_ENGINE_STATS.setdefault(engine, {"hits": 0, "misses": 0, "characters_saved": 0})
+    stats["hits" if hit else "misses"] += 1
+    if hit:
+        stats["characters_saved"] += len(text)
+    return {**value, "cached": hit}
+
+
+def tts_cache_stats() -> dict:
+    """Synthesis cache counters plus per-engine hits (for the health endpoint)."""
+    return {**TTS_CACHE.stats(), "engines": TTS_ENGINE_STATS}
+
+
+# ============== JOBS ==============
+
+async def job_priority(priority: str, audio_path: str) -> str:
+    """Requested priority class, or one derived from the archived upload's duration."""
+    if priority:
+        return priority
+    seconds = await run_io(audio_duration, audio_path)
+    return "interactive" if seconds <= JOB_INTERACTIVE_MAX_SECONDS else "bulk"
+
+
+def effect_params_error(effect: str, params: dict):
+    """Error message for an invalid or out-of-range effect/filter parameter (ranges as in chains), else None."""
+    try:
+        validate_stage_params(effect, params)
+    except ChainError as e:
+        return str(e)
+    return None
+
+
+async def job_accepted(kind: str, args: dict, priority: str) -> JSONResponse:
+    job_id = await JOBS.call(JOBS.submit, kind, args, priority)
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job_id, "status_url": f"/jobs/{job_id}", "priority": priority},
+    )
+
+
+async def process_audio_job(job_id: str, args: dict) -> dict:
+    result = await cached_result(
+        args["key"], run_job_task, job_id, process_audio_task, args["raw_audio_path"], args["raw_filename"],
+        args["effect"], args["delay"], args["repeat"], args["filtered"], args.get("params"), args.get("downmix", False),
+        timeout=JOB_TIMEOUT,
+    )
+    return with_original(result, args["raw_filename"])
+
+
+async def filter_audio_job(job_id: str, args: dict) -> dict:
+    return await cached_result(
+        args["key"], run_job_task, job_id, filter_audio_task, args["raw_audio_path"],
+        args["filter_type"], args["intensity"], args.get("downmix", False), timeout=JOB_TIMEOUT,
+    )
+
+
+# Job kinds run by the dispatcher started in main.py
+JOB_HANDLERS = {"process-audio": process_audio_job, "filter-audio": filter_audio_job}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """State, progress, timings and (when finished) result or error of a job."""
+    status = await JOBS.call(JOBS.get, job_id)
+    if status is None:
+        return JSONResponse(status_code=404, content={"error": "Job not found"})
+    return status
 
 
 @router.post("/process-audio")
@@ -76,206 +217,136 @@ async def process_audio_endpoint(
     effect: str = Form(...),
     delay: float = Form(0.2),
     repeat: int = Form(3),
-    enable_filter: str = Form("false")
+    feedback: float = Form(None),
+    mix: float = Form(None),
+    room: str = Form(None),
+    enable_filter: str = Form("false"),
+    downmix: str = Form("false"),
+    run_async: str = Form("false", alias="async"),
+    priority: str = Form("")
 ):
-    """Process audio with selected DSP effect."""
+    """Process audio with selected DSP effect (async=true: queue a job, see /jobs/{id})."""
     try:
-        # Save uploaded file
-        file_ext = file.filename.split(".")[-1] if "." in file.filename else "webm"
-        temp_input_path = os.path.join(TEMP_DIR, f"input_{uuid.uuid4()}.{file_ext}")
-        
-        with open(temp_input_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        # Convert to WAV format
-        try:
-            wav_path = convert_to_wav(temp_input_path)
-            print(f"Converted {file_ext} to WAV: {wav_path}")
-        except Exception as conv_err:
-            print(f"Conversion error: {conv_err}")
-            return JSONResponse(status_code=400, content={
-                "error": f"Cannot convert audio format: {str(conv_err)}. Try uploading WAV or MP3 file."
-            })
-
-        # SAVE RAW AUDIO to data/raw/
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        raw_filename = f"raw_{timestamp}_{uuid.uuid4().hex[:8]}.wav"
-        raw_audio_path = os.path.join(RAW_AUDIO_DIR, raw_filename)
-        shutil.copy(wav_path, raw_audio_path)
-        print(f"Saved raw audio: {raw_audio_path}")
-
-        # Load original audio for comparison
-        original_y, original_sr = librosa.load(wav_path)
-        
-        # Apply noise filter if enabled
-        audio_to_process = wav_path
-        if enable_filter.lower() == "true":
-            try:
-                audio_to_process = apply_noise_filter(wav_path)
-                print("Noise filter applied")
-            except Exception as filter_err:
-                print(f"Filter error (continuing without filter): {filter_err}")
-                audio_to_process = wav_path
-
-        processed_path = None
-
-        # Apply selected effect
-        effect_map = {
-            "chipmunk": lambda: chipmunk_effect(audio_to_process),
-            "robot": lambda: robot_effect(audio_to_process),
-            "echo": lambda: echo_effect(audio_to_process, delay),
-            "electronic": lambda: electronic_voice_effect(audio_to_process),
-            "stutter": lambda: stutter_effect(audio_to_process, repeat),
-            "whisper": lambda: whisper_effect(audio_to_process),
-            "distortion": lambda: distortion_effect(audio_to_process),
-            "reverse": lambda: reverse_effect(audio_to_process),
-            "monster": lambda: monster_effect(audio_to_process),
-            "telephone": lambda: telephone_effect(audio_to_process),
-            "process_voice": lambda: process_voice(audio_to_process, delay=delay),
-        }
-
-        if effect not in effect_map:
+        if effect not in EFFECTS:
             return JSONResponse(status_code=400, content={"error": "Invalid effect type"})
-
-        processed_path, _ = effect_map[effect]()
-
-        if not processed_path or not os.path.exists(processed_path):
-            return JSONResponse(status_code=500, content={"error": "Processing failed"})
-
-        # Load processed audio for comparison
-        processed_y, processed_sr = librosa.load(processed_path)
-        
-        # Create OVERLAY comparison waveform plot
-        waveform_path = save_comparison_plot(
-            original_y, original_sr, 
-            processed_y, processed_sr,
-            effect.title(),
-            TEMP_DIR
+        if priority and priority not in PRIORITIES:
+            return JSONResponse(status_code=400, content={"error": "Invalid priority (interactive or bulk)"})
+        params = {k: v for k, v in {"delay": delay, "repeat": repeat}.items() if k in EFFECT_PARAMS.get(effect, ())}
+        extra = {k: v for k, v in {"feedback": feedback, "mix": mix, "room": room}.items()
+                 if v is not None and k in EFFECT_PARAMS.get(effect, ())}
+        # delay/feedback size the delay lines (streamed: delay * sr samples of history)
+        error = effect_params_error(effect, {**params, **extra})
+        if error:
+            return JSONResponse(status_code=400, content={"error": error})
+
+        with TempScope() as scope:
+            temp_input_path, digest = await receive_upload(file, scope, "input")
+            raw_audio_path, raw_filename, decode = await run_cpu(ingest_upload_task, temp_input_path)
+        record_decode(decode)
+        filtered = enable_filter.lower() == "true"
+        mono = downmix.lower() == "true"
+        key = cache_key("process-audio", digest, effect, {**params, **extra}, filtered, mono)
+        if run_async.lower() == "true":
+            args = {"key": key, "raw_audio_path": raw_audio_path, "raw_filename": raw_filename,
+                    "effect": effect, "delay": delay, "repeat": repeat, "filtered": filtered, "params": extra,
+                    "downmix": mono}
+            return await job_accepted("process-audio", args, await job_priority(priority, raw_audio_path))
+        result = await cached_result(
+            key, process_audio_task, raw_audio_path, raw_filename, effect, delay, repeat, filtered, extra, mono
         )
+        return with_original(result, raw_filename)
 
-        # Move processed files to TEMP_DIR
-        final_audio_name = os.path.basename(processed_path)
-        final_audio_path = os.path.join(TEMP_DIR, final_audio_name)
-        shutil.move(processed_path, final_audio_path)
-
-        final_waveform_name = None
-        if waveform_path and os.path.exists(waveform_path):
-            final_waveform_name = os.path.basename(waveform_path)
-            final_waveform_path = os.path.join(TEMP_DIR, final_waveform_name)
-            if waveform_path != final_waveform_path:
-                shutil.move(waveform_path, final_waveform_path)
-
-        # Cleanup temp files
-        for f in [temp_input_path]:
-            if f and os.path.exists(f):
-                try:
-                    os.remove(f)
-                except:
-                    pass
+    except UploadTooLargeError as e:
+        return JSONResponse(status_code=413, content={"error": str(e)})
+    except AudioConversionError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except Exception as e:
+        print(f"Error processing audio: {traceback.format_exc()}")
+        return worker_error_response(e) or JSONResponse(status_code=500, content={"error": str(e)})
 
-        return {
-            "audio_url": f"/files/{final_audio_name}",
-            "waveform_url": f"/files/{final_waveform_name}" if final_waveform_name else None,
-            "raw_audio_url": f"/raw/{raw_filename}"
-        }
 
+@router.post("/process-chain")
+async def process_chain_endpoint(
+    file: UploadFile = File(...),
+    chain: str = Form(...),
+    downmix: str = Form("false")
+):
+    """
+    Apply an ordered chain of effects/filters in one pass over one decoded buffer.
+    chain is a JSON list, e.g. [{"type": "noise_filter"}, {"type": "telephone"}, {"type": "echo", "delay": 0.3}]
+    """
+    try:
+        # Validate before touching the upload
+        try:
+            stages = validate_chain(json.loads(chain), MAX_CHAIN_STAGES)
+        except json.JSONDecodeError as e:
+            return JSONResponse(status_code=400, content={"error": f"Invalid chain JSON: {e}"})
+        except ChainError as e:
+            return JSONResponse(status_code=400, content={"error": str(e)})
+
+        with TempScope() as scope:
+            temp_input_path, digest = await receive_upload(file, scope, "chain")
+            raw_audio_path, raw_filename, decode = await run_cpu(ingest_upload_task, temp_input_path)
+        record_decode(decode)
+        mono = downmix.lower() == "true"
+        key = cache_key("process-chain", digest, stages, mono)
+        result = await cached_result(key, process_chain_task, raw_audio_path, raw_filename, stages, mono)
+        return with_original(result, raw_filename)
+
+    except UploadTooLargeError as e:
+        return JSONResponse(status_code=413, content={"error": str(e)})
+    except AudioConversionError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
     except Exception as e:
-        print(f"Error processing audio: {traceback.format_exc()}")
-        return JSONResponse(status_code=500, content={"error": str(e)})
+        print(f"Error processing chain: {traceback.format_exc()}")
+        return worker_error_response(e) or JSONResponse(status_code=500, content={"error": str(e)})
 
 
 @router.post("/filter-audio")
 async def filter_audio_endpoint(
     file: UploadFile = File(...),
     filter_type: str = Form("noise"),
-    intensity: float = Form(50)
+    intensity: float = Form(50),
+    downmix: str = Form("false"),
+    run_async: str = Form("false", alias="async"),
+    priority: str = Form("")
 ):
-    """Apply audio filter with DSP algorithms."""
+    """Apply audio filter with DSP algorithms (async=true: queue a job, see /jobs/{id})."""
     try:
-        # Save uploaded file
-        file_ext = file.filename.split(".")[-1] if "." in file.filename else "webm"
-        temp_input_path = os.path.join(TEMP_DIR, f"filter_{uuid.uuid4()}.{file_ext}")
-        
-        with open(temp_input_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        # Convert to WAV
-        try:
-            wav_path = convert_to_wav(temp_input_path)
-        except:
-            wav_path = temp_input_path
-
-        # Load audio
-        y, sr = librosa.load(wav_path)
-        
-        # Normalize intensity to 0-1
-        intensity_factor = intensity / 100.0
-
-        if filter_type == "noise":
-            # Spectral Subtraction - remove background noise
-            noise_samples = int(0.1 * sr)
-            if len(y) > noise_samples:
-                noise_profile = np.abs(np.fft.fft(y[:noise_samples]))
-                noise_estimate = np.mean(noise_profile) * intensity_factor
-                
-                Y = np.fft.fft(y)
-                magnitude = np.abs(Y)
-                phase = np.angle(Y)
-                
-                magnitude = np.maximum(magnitude - noise_estimate, 0)
-                Y_clean = magnitude * np.exp(1j * phase)
-                y = np.fft.ifft(Y_clean).real
-        
-        elif filter_type == "echo":
-            # Remove echo using delay cancellation
-            delay = 0.2  # 200ms
-            attenuation = 0.3 + (intensity_factor * 0.4)  # 0.3-0.7
-            delay_samples = int(delay * sr)
-            y_echo = np.zeros_like(y)
-            if delay_samples < len(y):
-                y_echo[delay_samples:] = y[:-delay_samples]
-            y = y - attenuation * y_echo
-        
-        elif filter_type == "music":
-            # Bandpass filter - keep only voice frequencies (300-3400Hz)
-            from scipy.signal import butter, lfilter
-            low = 300
-            high = 3400 - (intensity_factor * 1000)  # Tighter with more intensity
-            nyq = 0.5 * sr
-            low_norm = low / nyq
-            high_norm = high / nyq
-            b, a = butter(5, [low_norm, high_norm], btype='band')
-            y = lfilter(b, a, y)
-        
-        elif filter_type == "siren":
-            # Notch filter - remove specific frequency (sirens ~800Hz)
-            notch_freq = 800
-            Q = 5 + (intensity_factor * 20)  # Higher Q = narrower notch
-            from scipy.signal import iirnotch, lfilter
-            b, a = iirnotch(notch_freq, Q, sr)
-            y = lfilter(b, a, y)
-        
-        # Normalize
-        peak = np.max(np.abs(y))
-        if peak > 0:
-            y = y * (0.95 / peak)
-        
-        # Save processed audio
-        output_path = os.path.join(TEMP_DIR, f"filtered_{uuid.uuid4()}.wav")
-        sf.write(output_path, y, sr)
-        
-        # Cleanup
-        if temp_input_path != wav_path and os.path.exists(temp_input_path):
-            os.remove(temp_input_path)
-        if os.path.exists(wav_path) and wav_path != output_path:
-            os.remove(wav_path)
-        
-        final_name = os.path.basename(output_path)
-        return {"audio_url": f"/files/{final_name}"}
-    
+        if priority and priority not in PRIORITIES:
+            return JSONResponse(status_code=400, content={"error": "Invalid priority (interactive or bulk)"})
+        # Same checks as a chain "filter" stage, before the upload is read
+        error = effect_params_error("filter", {"filter_type": filter_type, "intensity": intensity})
+        if error:
+            return JSONResponse(status_code=400, content={"error": error})
+        with TempScope() as scope:
+            temp_input_path, digest = await receive_upload(file, scope, "filter")
+            mono = downmix.lower() == "true"
+            key = cache_key("filter-audio", digest, filter_type, intensity, mono)
+            if run_async.lower() == "true":
+                # The job outlives this request, so it reads the archived upload
+                raw_audio_path, _, decode = await run_cpu(ingest_upload_task, temp_input_path)
+                record_decode(decode)
+                args = {"key": key, "raw_audio_path": raw_audio_path, "filter_type": filter_type,
+                        "intensity": intensity, "downmix": mono}
+                return await job_accepted("filter-audio", args, await job_priority(priority, raw_audio_path))
+
+            # Keyed on the upload bytes, so a repeat is answered before any decoding
+            cached = await cached_lookup(key)
+            if cached is not None:
+                return cached
+            scope.track(f"{temp_input_path}.wav")  # convert_upload_task's output for non-native formats
+            wav_path, decode = await run_cpu(convert_upload_task, temp_input_path)
+            record_decode(decode)
+            return await cached_result(key, filter_audio_task, wav_path, filter_type, intensity, mono)
+
+    except UploadTooLargeError as e:
+        return JSONResponse(status_code=413, content={"error": str(e)})
+    except AudioConversionError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
     except Exception as e:
         print(f"Error filtering audio: {traceback.format_exc()}")
-        return JSONResponse(status_code=500, content={"error": str(e)})
+        return worker_error_response(e) or JSONResponse(status_code=500, content={"error": str(e)})
 
 
 @router.post("/translate")
@@ -286,42 +357,409 @@ async def translate_endpoint(
 ):
     """Translate text between languages."""
     try:
-        translated = translate_text(text, source_lang, target_lang)
+        translated = await run_io(translate_text, text, source_lang, target_lang)
         return {"translated_text": translated}
     except Exception as e:
-        return JSONResponse(status_code=500, content={"error": str(e)})
+        return worker_error_response(e) or JSONResponse(status_code=500, content={"error": str(e)})
+
+
+async def translate_segments(segments: list[str], source_lang: str, target_lang: str) -> list[dict]:
+    """
+    Translate segments in order: duplicates are translated once, cached texts
+    are served from the translation cache and misses run TRANSLATION_CONCURRENCY
+    at a time on the I/O pool. A failed segment carries "error" instead of failing the batch.
+    """
+    source, target = lang_code(source_lang), lang_code(target_lang)
+    texts = [segment.strip() for segment in segments]
+    unique = [text for text in dict.fromkeys(texts) if text]
+    cached = await run_io(TRANSLATIONS.get_many, source, target, unique)
+
+    slots = asyncio.Semaphore(TRANSLATION_CONCURRENCY)
+
+    async def translate_one(text):
+        async with slots:
+            return await run_io(translate_uncached, text, source, target)
+
+    misses = [text for text in unique if text not in cached]
+    outcomes = dict(zip(misses, await asyncio.gather(*map(translate_one, misses), return_exceptions=True)))
+    translated = {text: out for text, out in outcomes.items() if isinstance(out, str)}
+    await run_io(TRANSLATIONS.put_many, source, target, translated)
+
+    results, seen = [], set()
+    for text in texts:
+        if not text:
+            entry = {"translated_text": text, "cached": False}
+        elif text in cached:
+            entry = {"translated_text": cached[text], "cached": True}
+        elif text in translated:
+            entry = {"translated_text": translated[text], "cached": text in seen}  # repeat within the batch
+        else:
+            entry = {"translated_text": None, "cached": False, "error": str(outcomes[text])}
+        seen.add(text)
+        results.append(entry)
+    return results
+
+
+@router.post("/translate-batch")
+async def translate_batch_endpoint(
+    segments: str = Form(...),
+    source_lang: str = Form("vi"),
+    target_lang: str = Form("en")
+):
+    """
+    Translate many text segments in one request.
+    segments is a JSON list of strings; results come back in the same order.
+    """
+    try:
+        try:
+            segments = json.loads(segments)
+        except json.JSONDecodeError as e:
+            return JSONResponse(status_code=400, content={"error": f"Invalid segments JSON: {e}"})
+        if not isinstance(segments, list) or not all(isinstance(s, str) for s in segments):
+            return JSONResponse(status_code=400, content={"error": "segments must be a JSON list of strings"})
+        if len(segments) > TRANSLATE_BATCH_MAX_SEGMENTS:
+            return JSONResponse(
+                status_code=400, content={"error": f"Too many segments (max {TRANSLATE_BATCH_MAX_SEGMENTS})"}
+            )
+
+        results = await translate_segments(segments, source_lang, target_lang)
+        return {
+            "segments": results,
+            "unique": len({s.strip() for s in segments if s.strip()}),
+            "cache_hits": sum(r["cached"] for r in results),
+            "failed": sum("error" in r for r in results),
+        }
+    except Exception as e:
+        return worker_error_response(e) or JSONResponse(status_code=500, content={"error": str(e)})
 
 
 @router.post("/tts")
 async def tts_endpoint(text: str = Form(...), lang: str = Form("vi")):
     """Convert text to speech."""
     try:
-        output_path = text_to_speech(text, lang)
-        final_name = os.path.basename(output_path)
-        shutil.move(output_path, os.path.join(TEMP_DIR, final_name))
-        return {"audio_url": f"/files/{final_name}"}
+        return await cached_speech("gtts", text, lang=lang)
     except Exception as e:
-        return JSONResponse(status_code=500, content={"error": str(e)})
+        return worker_error_response(e) or JSONResponse(status_code=500, content={"error": str(e)})
 
 
 @router.post("/stt")
-async def stt_endpoint(file: UploadFile = File(...), language: str = Form("vi-VN")):
-    """Convert speech to text."""
+async def stt_endpoint(
+    file: UploadFile = File(...),
+    language: str = Form("vi-VN"),
+    long_form: str = Form("auto"),
+    stream: str = Form("false")
+):
+    """
+    Convert speech to text. Recordings longer than STT_LONG_FORM_SECONDS (or
+    long_form=true) are split at pauses and recognized in parallel; the result
+    then carries per-segment timestamps. stream=true sends each segment as
+    an NDJSON line as soon as it is recognized, then the full transcript.
+    """
+    scope = TempScope()
     try:
-        file_ext = file.filename.split(".")[-1] if "." in file.filename else "webm"
-        temp_input_path = os.path.join(TEMP_DIR, f"stt_input_{uuid.uuid4()}.{file_ext}")
-        with open(temp_input_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
+        temp_input_path, _ = await receive_upload(file, scope, "stt_input")
+        if long_form.lower() == "false":
+            text = await run_io(stt_task, temp_input_path, language)
+            scope.cleanup()
+            return {"text": text}
+
+        scope.track(f"{temp_input_path}.wav")  # stt_plan_task's output for non-native formats
+        plan = await run_cpu(stt_plan_task, temp_input_path)
+        if long_form.lower() != "true" and plan["duration"] <= STT_LONG_FORM_SECONDS:
+            text = await run_io(stt_task, plan["path"], language)
+            scope.cleanup()
+            return {"text": text}
+    except UploadTooLargeError as e:
+        scope.cleanup()
+        return JSONResponse(status_code=413, content={"error": str(e)})
+    except AudioConversionError as e:
+        scope.cleanup()
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except Exception as e:
+        scope.cleanup()
+        return worker_error_response(e) or JSONResponse(status_code=500, content={"error": str(e)})
+
+    if stream.lower() == "true":
+        return StreamingResponse(stream_transcript(plan, language, scope), media_type="application/x-ndjson")
+    try:
+        entries = [entry async for entry in transcribe_segments(plan, language)]
+        return stitch_transcript(entries, plan["duration"])
+    finally:
+        scope.cleanup()
+
+
+async def transcribe_segments(plan: dict, language: str):
+    """Recognize the plan's segments STT_CONCURRENCY at a time, yielding each entry as it finishes."""
+    slots = asyncio.Semaphore(STT_CONCURRENCY)
+    rate = plan["sample_rate"]
+
+    async def recognize(index, start, end):
+        entry = {"index": index, "start": round(start / rate, 3), "end": round(end / rate, 3)}
+        async with slots:
+            try:
+                entry["text"] = await run_io(stt_segment_task, plan["path"], start, end, language)
+            except Exception as e:
+                entry.update(text="", error=str(e) or type(e).__name__)
+        return entry
+
+    pending = [asyncio.ensure_future(recognize(i, start, end)) for i, (start, end) in enumerate(plan["segments"])]
+    try:
+        for next_done in asyncio.as_completed(pending):
+            yield await next_done
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def stitch_transcript(entries: list[dict], duration: float) -> dict:
+    """Full transcript from segment entries (in any order)."""
+    entries = sorted(entries, key=lambda e: e["index"])
+    return {
+        "text": " ".join(e["text"] for e in entries if e["text"]),
+        "duration": round(duration, 3),
+        "segments": entries,
+        "failed": sum("error" in e for e in entries),
+    }
+
+
+async def stream_transcript(plan: dict, language: str, scope: TempScope):
+    """NDJSON lines: {"partial": entry} per finished segment, then {"done": true, ...transcript}."""
+    try:
+        entries = []
+        async for entry in transcribe_segments(plan, language):
+            entries.append(entry)
+            yield json.dumps({"partial": entry}, ensure_ascii=False) + "\n"
+        yield json.dumps({"done": True, **stitch_transcript(entries, plan["duration"])}, ensure_ascii=False) + "\n"
+    finally:
+        scope.cleanup()
+
+
+# ============== BATCH ==============
+
+BATCH_MAX_BYTES = BATCH_MAX_MB * 1024 * 1024
+_batch_slots = (None, None)  # (event loop, semaphore shared by all batches)
+
+
+def batch_slots() -> asyncio.Semaphore:
+    """BATCH_CONCURRENCY slots shared by every batch on the running loop."""
+    global _batch_slots
+    loop = asyncio.get_running_loop()
+    if _batch_slots[0] is not loop:
+        _batch_slots = (loop, asyncio.Semaphore(BATCH_CONCURRENCY))
+    return _batch_slots[1]
+
+
+class _ZipSink:
+    """Write-only sink for zipfile; the response drains it after every member."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+async def run_batch_item(index: int, name: str, input_path: str, stages: list[dict], output_path: str,
+                         downmix: bool = False) -> dict:
+    """Process one batch file on the CPU pool (within the batch slots); returns its manifest entry."""
+    entry = {"index": index, "name": name}
+    queued = time.perf_counter()
+    async with batch_slots():
+        started = time.perf_counter()
         try:
-            wav_path = convert_to_wav(temp_input_path)
-        except:
-            wav_path = temp_input_path
-            
-        text = speech_to_text(wav_path, language)
-        return {"text": text}
+            result = await run_cpu(batch_item_task, input_path, stages, output_path, downmix)
+            decode = result.pop("decode")
+            record_decode(decode)
+            stem = os.path.splitext(name)[0] or "audio"
+            entry.update(
+                status="ok", output=f"{index:03d}_{stem}.wav", path=output_path,
+                format=decode["format"], decode_ms=round(1000 * decode["seconds"], 1), **result
+            )
+        except Exception as e:
+            entry.update(status="error", error=str(e) or type(e).__name__)
+    entry["queued_ms"] = round(1000 * (started - queued), 1)
+    entry["elapsed_ms"] = round(1000 * (time.perf_counter() - queued), 1)
+    return entry
+
+
+async def stream_batch(inputs: list[tuple[str, str]], stages: list[dict], scope: TempScope, downmix: bool = False):
+    """
+    Run every input through the chain and stream a zip of the results as they
+    finish, ending with manifest.json. Removes the batch's files when done.
+    """
+    start = time.perf_counter()
+    sink = _ZipSink()
+    pending = []
+    try:
+        # Stored, not deflated: WAV barely compresses and this keeps the stream fast
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as archive:
+            pending = [
+                asyncio.ensure_future(run_batch_item(i, name, path, stages, scope.path("batch_out", ".wav"), downmix))
+                for i, (name, path) in enumerate(inputs)
+            ]
+            entries = []
+            for next_done in asyncio.as_completed(pending):
+                entry = await next_done
+                entries.append(entry)
+                if entry["status"] == "ok":
+                    await run_io(archive.write, entry.pop("path"), entry["output"])
+                    yield sink.drain()
+
+            entries.sort(key=lambda e: e["index"])
+            manifest = {
+                "stages": [stage["type"] for stage in stages],
+                "files": entries,
+                "succeeded": sum(e["status"] == "ok" for e in entries),
+                "failed": sum(e["status"] != "ok" for e in entries),
+                "total_ms": round(1000 * (time.perf_counter() - start), 1),
+            }
+            archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+        yield sink.drain()
+    finally:
+        for task in pending:
+            task.cancel()
+        scope.cleanup()
+
+
+@router.post("/batch")
+async def batch_endpoint(
+    files: list[UploadFile] = File(...),
+    chain: str = Form(...),
+    downmix: str = Form("false")
+):
+    """
+    Apply one effect chain (same format as /process-chain) to many files, sent
+    as several `files` parts and/or zip archives. Streams back a zip of WAV
+    results plus manifest.json with per-file timings and errors.
+    """
+    try:
+        stages = validate_chain(json.loads(chain), MAX_CHAIN_STAGES)
+    except json.JSONDecodeError as e:
+        return JSONResponse(status_code=400, content={"error": f"Invalid chain JSON: {e}"})
+    except ChainError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    scope = TempScope()
+    try:
+        inputs = []
+        received = 0
+        for file in files:
+            path, _ = await receive_upload(file, scope, "batch_in", max_bytes=BATCH_MAX_BYTES - received)
+            received += os.path.getsize(path)
+            if sniff_format(path) == "zip":
+                members = await run_io(extract_zip_task, path, BATCH_MAX_FILES - len(inputs), BATCH_MAX_BYTES)
+                inputs.extend((name, scope.track(member)) for name, member in members)
+            else:
+                inputs.append((file.filename or f"file_{len(inputs)}", path))
+            if len(inputs) > BATCH_MAX_FILES:
+                raise UploadTooLargeError(f"Batch has more than {BATCH_MAX_FILES} files")
+        if not inputs:
+            scope.cleanup()
+            return JSONResponse(status_code=400, content={"error": "No audio files in batch"})
+    except UploadTooLargeError as e:
+        scope.cleanup()
+        return JSONResponse(status_code=413, content={"error": str(e)})
+    except AudioConversionError as e:
+        scope.cleanup()
+        return JSONResponse(status_code=400, content={"error": str(e)})
     except Exception as e:
-        return JSONResponse(status_code=500, content={"error": str(e)})
+        scope.cleanup()
+        print(f"Error receiving batch: {traceback.format_exc()}")
+        return worker_error_response(e) or JSONResponse(status_code=500, content={"error": str(e)})
+
+    return StreamingResponse(
+        stream_batch(inputs, stages, scope, downmix.lower() == "true"),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="batch_results.zip"'},
+    )
+
+
+# ============== REALTIME WEBSOCKET ==============
+
+PCM_FORMATS = {"f32": np.dtype("<f4"), "s16": np.dtype("<i2")}
+
+
+@router.websocket("/ws/process")
+async def ws_process_endpoint(websocket: WebSocket):
+    """
+    Realtime effect streaming.
+    1. Client sends a JSON config: {"effect", "sample_rate", "frame_size", "format": "f32"|"s16", "params"}
+    2. Server answers {"type": "ready", "algorithmic_latency_ms", ...}
+    3. Client sends binary PCM frames (mono); each is answered with a processed frame
+       of the same length and format.
+    4. Text {"type": "stats"} returns latency statistics; {"type": "stop"} returns them and closes.
+    """
+    await websocket.accept()
+    try:
+        config = json.loads(await websocket.receive_text())
+        if not isinstance(config, dict):
+            raise ValueError("config must be a JSON object")
+        fmt = config.get("format", "f32")
+        frame_size = int(config.get("frame_size", 1024))
+        if fmt not in PCM_FORMATS:
+            raise ValueError(f"format must be one of {list(PCM_FORMATS)}")
+        if not 0 < frame_size <= WS_MAX_FRAME_SAMPLES:
+            raise ValueError(f"frame_size must be between 1 and {WS_MAX_FRAME_SAMPLES}")
+        session = RealtimeSession(
+            config.get("effect", "robot"),
+            int(config.get("sample_rate", 48000)),
+            frame_size,
+            config.get("params") or {},
+        )
+    except (ValueError, TypeError, KeyError, OverflowError) as e:
+        await websocket.send_json({"type": "error", "error": str(e)})
+        await websocket.close(code=1003)
+        return
+
+    dtype = PCM_FORMATS[fmt]
+    scale = 32768.0 if fmt == "s16" else 1.0
+    await websocket.send_json({
+        "type": "ready",
+        "effect": session.effect,
+        "sample_rate": session.sr,
+        "frame_size": frame_size,
+        "algorithmic_latency_ms": round(session.algorithmic_latency_ms, 2),
+        "within_target": session.algorithmic_latency_ms <= TARGET_LATENCY_MS,
+    })
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                data = message["bytes"]
+                if len(data) % dtype.itemsize or len(data) // dtype.itemsize > WS_MAX_FRAME_SAMPLES:
+                    await websocket.send_json({"type": "error", "error": "Invalid frame size"})
+                    continue
+                frame = np.frombuffer(data, dtype=dtype) / scale
+                out = session.process(frame)
+                await websocket.send_bytes((out * (scale - 1 if fmt == "s16" else 1)).astype(dtype).tobytes())
+            elif message.get("text") is not None:
+                try:
+                    command = json.loads(message["text"])
+                except json.JSONDecodeError as e:
+                    await websocket.send_json({"type": "error", "error": f"Invalid JSON: {e}"})
+                    continue
+                command = command.get("type") if isinstance(command, dict) else None
+                if command in ("stats", "stop"):
+                    await websocket.send_json({"type": "stats", **session.stats()})
+                if command == "stop":
+                    await websocket.close()
+                    break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        print(f"WebSocket session ended: {session.stats()}")
 
 
 @router.get("/files/{filename}")
@@ -342,6 +780,80 @@ async def get_raw_file(filename: str):
     return JSONResponse(status_code=404, content={"error": "Raw file not found"})
 
 
+def find_audio_file(filename: str):
+    """Resolve a processed (TEMP_DIR) or raw audio file name to a path, None if missing."""
+    name = os.path.basename(filename)
+    for directory in (TEMP_DIR, RAW_AUDIO_DIR):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+@router.get("/peaks/{filename}")
+async def get_peaks(
+    filename: str,
+    pixels: int = 1000,
+    samples_per_pixel: int = None,
+    format: str = "json",
+    bits: int = 16
+):
+    """
+    Waveform summary (min/max/RMS per pixel) of a processed or raw file.
+    format=json (audiowaveform JSON + rms) or dat (audiowaveform binary).
+    """
+    file_path = find_audio_file(filename)
+    if file_path is None:
+        return JSONResponse(status_code=404, content={"error": "File not found"})
+    if format not in ("json", "dat") or bits not in (8, 16):
+        return JSONResponse(status_code=400, content={"error": "format must be json or dat, bits 8 or 16"})
+    if not 1 <= pixels <= WAVEFORM_MAX_PIXELS or (samples_per_pixel is not None and samples_per_pixel < 1):
+        return JSONResponse(status_code=400, content={"error": f"pixels must be 1-{WAVEFORM_MAX_PIXELS}"})
+
+    try:
+        result = await run_cpu(peaks_task, file_path, pixels, samples_per_pixel, format, bits)
+    except RuntimeError as e:
+        # libsndfile cannot decode the file
+        return worker_error_response(e) or JSONResponse(status_code=400, content={"error": f"Cannot read audio: {e}"})
+    except Exception as e:
+        print(f"Error computing peaks: {traceback.format_exc()}")
+        return worker_error_response(e) or JSONResponse(status_code=500, content={"error": str(e)})
+
+    if format == "dat":
+        return Response(content=result, media_type="application/octet-stream")
+    return result
+
+
+@router.get("/waveform/{filename}")
+async def get_waveform(
+    filename: str,
+    original: str = None,
+    width: int = WAVEFORM_WIDTH,
+    height: int = WAVEFORM_HEIGHT
+):
+    """
+    Waveform PNG of a processed file (overlaid on `original` if given).
+    Rendered in a worker on first fetch, then served from the disk cache.
+    """
+    file_path = find_audio_file(filename)
+    original_path = find_audio_file(original) if original else None
+    if file_path is None or (original and original_path is None):
+        return JSONResponse(status_code=404, content={"error": "File not found"})
+    if not (1 <= width <= WAVEFORM_MAX_IMAGE_SIZE and 1 <= height <= WAVEFORM_MAX_IMAGE_SIZE):
+        return JSONResponse(status_code=400, content={"error": f"width and height must be 1-{WAVEFORM_MAX_IMAGE_SIZE}"})
+
+    image_path = waveform_cache_path(file_path, original_path, width, height)
+    if not os.path.exists(image_path):
+        try:
+            image_path = await run_cpu(waveform_task, file_path, original_path, width, height)
+        except RuntimeError as e:
+            return worker_error_response(e) or JSONResponse(status_code=400, content={"error": f"Cannot read audio: {e}"})
+        except Exception as e:
+            print(f"Error rendering waveform: {traceback.format_exc()}")
+            return worker_error_response(e) or JSONResponse(status_code=500, content={"error": str(e)})
+    return FileResponse(image_path, media_type="image/png")
+
+
 # ============== ELEVENLABS TTS ==============
 
 @router.get("/voices")
@@ -349,26 +861,80 @@ async def list_voices_endpoint():
     """Get all available ElevenLabs voices."""
     try:
         from src.utils.elevenlabs import list_voices
-        voices = list_voices()
+        voices = await run_io(list_voices)
         return {"voices": voices}
     except Exception as e:
-        return JSONResponse(status_code=500, content={"error": str(e)})
+        return worker_error_response(e) or JSONResponse(status_code=500, content={"error": str(e)})
 
 
 @router.post("/tts-eleven")
-async def tts_eleven_endpoint(text: str = Form(...), voice_id: str = Form("21m00Tcm4TlvDq8ikWAM")):
-    """Convert text to speech using ElevenLabs."""
+async def tts_eleven_endpoint(
+    text: str = Form(...),
+    voice_id: str = Form("21m00Tcm4TlvDq8ikWAM"),
+    stream: str = Form("false")
+):
+    """
+    Convert text to speech using ElevenLabs.
+    stream=true returns the MP3 itself, forwarded chunk by chunk as ElevenLabs produces it.
+    """
     try:
-        from src.utils.elevenlabs import text_to_speech_eleven
-        output_path = text_to_speech_eleven(text, voice_id)
-        if output_path:
-            final_name = os.path.basename(output_path)
-            shutil.move(output_path, os.path.join(TEMP_DIR, final_name))
-            return {"audio_url": f"/files/{final_name}"}
-        else:
-            return JSONResponse(status_code=500, content={"error": "ElevenLabs TTS failed"})
+        from src.utils.elevenlabs import DEFAULT_MODEL_ID, DEFAULT_VOICE_SETTINGS
+        params = {"voice_id": voice_id, "model_id": DEFAULT_MODEL_ID, "voice_settings": DEFAULT_VOICE_SETTINGS}
+        if stream.lower() == "true":
+            return await stream_eleven_speech(text, params)
+        return await cached_speech("elevenlabs", text, **params)
+    except SynthesisError:
+        return JSONResponse(status_code=500, content={"error": "ElevenLabs TTS failed"})
     except Exception as e:
-        return JSONResponse(status_code=500, content={"error": str(e)})
+        return worker_error_response(e) or JSONResponse(status_code=500, content={"error": str(e)})
+
+
+def cache_tts_stream(key: str, part_path: str):
+    """Move a completely streamed prompt into TEMP_DIR and the synthesis cache (blocking)."""
+    final_name = f"tts_{key[:32]}.mp3"
+    final_path = archive_file(part_path, os.path.join(TEMP_DIR, final_name))
+    TTS_CACHE.put(key, {"audio_url": f"/files/{final_name}"}, [final_path])
+
+
+async def stream_eleven_speech(text: str, params: dict):
+    """
+    Serve a cached prompt from disk, else forward ElevenLabs' streaming response
+    while teeing it into a scratch file that enters the synthesis cache once complete.
+    """
+    from src.utils.elevenlabs import ElevenLabsError, open_tts_stream
+
+    key = synthesis_key("elevenlabs", text, **params)
+    stats = TTS_ENGINE_STATS.setdefault("elevenlabs", {"hits": 0, "misses": 0, "characters_saved": 0})
+    cached = await run_io(TTS_CACHE.get, key) if TTS_CACHE_ENABLED else None
+    if cached is not None:
+        TTS_CACHE.record(hit=True)
+        stats["hits"] += 1
+        stats["characters_saved"] += len(text)
+        path = os.path.join(TEMP_DIR, os.path.basename(cached["audio_url"]))
+        return FileResponse(path, media_type="audio/mpeg", headers={"X-Cache": "hit"})
+
+    try:
+        response, chunks = await run_io(open_tts_stream, normalize_text(text), **params)
+    except ElevenLabsError as e:
+        print(str(e))
+        raise SynthesisError(str(e))
+    TTS_CACHE.record(hit=False)
+    stats["misses"] += 1
+
+    async def body():
+        with TempScope() as scope:
+            part_path = scope.path("tts_stream", ".mp3")
+            try:
+                with open(part_path, "wb") as part:
+                    while (chunk := await run_io(next, chunks, None)) is not None:
+                        part.write(chunk)
+                        yield chunk
+            finally:
+                response.close()
+            if TTS_CACHE_ENABLED:
+                await run_io(cache_tts_stream, key, part_path)
+
+    return StreamingResponse(body(), media_type="audio/mpeg", headers={"X-Cache": "miss"})
 
 
 @router.post("/clone-voice")
@@ -381,22 +947,19 @@ async def clone_voice_endpoint(
     try:
         from src.utils.elevenlabs import clone_voice
         
-        # Save uploaded audio
-        file_ext = file.filename.split(".")[-1] if "." in file.filename else "mp3"
-        temp_path = os.path.join(TEMP_DIR, f"clone_{uuid.uuid4()}.{file_ext}")
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Clone voice
-        result = clone_voice(name, temp_path, description)
-        
-        # Cleanup
-        os.remove(temp_path)
+        with TempScope() as scope:
+            # Save uploaded audio
+            temp_path, _ = await receive_upload(file, scope, "clone", default_ext="mp3")
+
+            # Clone voice
+            result = await run_io(clone_voice, name, temp_path, description)
         
         if result.get("success"):
             return {"voice_id": result["voice_id"], "name": result["name"]}
         else:
             return JSONResponse(status_code=400, content={"error": result.get("error", "Clone failed")})
+    except UploadTooLargeError as e:
+        return JSONResponse(status_code=413, content={"error": str(e)})
     except Exception as e:
-        return JSONResponse(status_code=500, content={"error": str(e)})
+        return worker_error_response(e) or JSONResponse(status_code=500, content={"error": str(e)})
 
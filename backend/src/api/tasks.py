@@ -0,0 +1,389 @@
+# tasks.py - Blocking Request Work Executed on the Worker Pools
+# Every function here is synchronous and module-level so it can be pickled
+# into the process pool (see src/utils/workers.py). Routes only do I/O glue.
+import os
+import time
+import uuid
+import zipfile
+from datetime import datetime
+
+import soundfile as sf
+
+from config.settings import (
+    TEMP_DIR,
+    STREAMING_MIN_DURATION,
+    STREAM_BLOCK_SIZE,
+    MAX_UPLOAD_SECONDS,
+    SCRATCH_DIR,
+    STT_SEGMENT_MAX_SECONDS,
+    STT_MIN_SILENCE_SECONDS,
+)
+from src.utils.audio_io import (
+    AudioDecodeError,
+    convert_to_wav,
+    ensure_wav_format,
+    probe_audio,
+    sniff_format,
+)
+from src.utils.jobs import report_progress
+from src.utils.storage import register_artifact
+from src.utils.uploads import UploadTooLargeError, archive_file, check_file_duration
+from src.utils.visualization import render_waveform_png
+from src.utils.waveform import cached_file_peaks, peaks_cache_path, peaks_for_zoom
+from src.processing import (
+    speech_to_text,
+    load_buffer,
+    write_buffer,
+    run_effect,
+)
+from src.processing.filters import apply_noise_filter, apply_filter
+from src.processing.chain import run_chain
+from src.processing.speech import recognize_samples
+from src.processing.vad import file_speech_segments
+from src.processing.streaming import (
+    STREAMING_EFFECTS,
+    STREAMING_FILTERS,
+    effect_stages,
+    spectral_subtraction_stage,
+    stream_file,
+)
+
+# Paths
+RAW_AUDIO_DIR = os.path.join(os.path.dirname(TEMP_DIR), "raw")
+os.makedirs(RAW_AUDIO_DIR, exist_ok=True)
+PEAKS_DIR = os.path.join(TEMP_DIR, "peaks")
+WAVEFORM_DIR = os.path.join(TEMP_DIR, "waveforms")
+
+
+class AudioConversionError(ValueError):
+    """Raised when an upload cannot be decoded (reported to the client as 400)."""
+
+
+def _archive_upload(temp_input_path: str):
+    """
+    Archive an upload in data/raw; returns (path, filename, decode info).
+    Formats soundfile reads are renamed into place as uploaded (no decode or
+    copy); others are decoded through ffmpeg and written there once as WAV.
+    """
+    fmt = sniff_format(temp_input_path)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    raw_stem = f"raw_{timestamp}_{uuid.uuid4().hex[:8]}"
+
+    if probe_audio(temp_input_path, fmt):
+        check_file_duration(temp_input_path, MAX_UPLOAD_SECONDS)
+        raw_filename = f"{raw_stem}.{fmt}"
+        raw_audio_path = archive_file(temp_input_path, os.path.join(RAW_AUDIO_DIR, raw_filename))
+        info = None
+    else:
+        raw_filename = f"{raw_stem}.wav"
+        raw_audio_path = os.path.join(RAW_AUDIO_DIR, raw_filename)
+        try:
+            _, info = convert_to_wav(temp_input_path, raw_audio_path, MAX_UPLOAD_SECONDS)
+        except AudioDecodeError as conv_err:
+            print(f"Conversion error: {conv_err}")
+            remove_files(raw_audio_path)
+            raise AudioConversionError(
+                f"Cannot convert audio format: {str(conv_err)}. Try uploading WAV or MP3 file."
+            )
+        print(f"Decoded {fmt} with {info['backend']} in {info['seconds'] * 1000:.1f} ms")
+
+    register_artifact(raw_audio_path, "raw")
+    print(f"Saved raw audio: {raw_audio_path}")
+    return raw_audio_path, raw_filename, info
+
+
+def ingest_upload_task(temp_input_path: str):
+    """Archive a saved upload in data/raw; returns (raw path, raw filename, decode info or None)."""
+    try:
+        return _archive_upload(temp_input_path)
+    finally:
+        remove_files(temp_input_path)
+
+
+def convert_upload_task(temp_input_path: str):
+    """
+    Make a saved upload readable in-process (not archived): kept as-is when
+    soundfile reads it, else converted to a temporary WAV. Returns (path, decode info or None).
+    """
+    if probe_audio(temp_input_path):
+        try:
+            check_file_duration(temp_input_path, MAX_UPLOAD_SECONDS)
+        except Exception:
+            remove_files(temp_input_path)
+            raise
+        return temp_input_path, None
+    try:
+        return convert_to_wav(temp_input_path, f"{temp_input_path}.wav", MAX_UPLOAD_SECONDS)
+    except AudioDecodeError as e:
+        raise AudioConversionError(f"Cannot convert audio format: {str(e)}")
+    finally:
+        remove_files(temp_input_path)
+
+
+def _should_stream(wav_path: str) -> bool:
+    """Long recordings are processed block by block instead of fully in memory."""
+    try:
+        return sf.info(wav_path).duration >= STREAMING_MIN_DURATION
+    except RuntimeError:
+        return False
+
+
+def waveform_url(audio_name: str, original_name: str = None) -> str:
+    """Lazy waveform image URL for a file in TEMP_DIR (rendered on first fetch)."""
+    url = f"/waveform/{audio_name}"
+    return f"{url}?original={original_name}" if original_name else url
+
+
+def with_original(result: dict, raw_filename: str) -> dict:
+    """Point a (possibly cached) result at this request's archived upload."""
+    return {
+        **result,
+        "waveform_url": waveform_url(os.path.basename(result["audio_url"]), raw_filename),
+        "raw_audio_url": f"/raw/{raw_filename}"
+    }
+
+
+def result_files(result: dict) -> list[str]:
+    """Files owned by a task result (for the result cache)."""
+    return [os.path.join(TEMP_DIR, os.path.basename(result["audio_url"]))]
+
+
+def _publish(processed, name: str, raw_filename: str) -> dict:
+    """Encode the result once and build the response payload (the waveform is rendered on demand)."""
+    # Single encode, straight into TEMP_DIR
+    final_audio_name = f"{name}_{uuid.uuid4().hex}.wav"
+    register_artifact(write_buffer(processed, os.path.join(TEMP_DIR, final_audio_name)), "processed")
+
+    return {
+        "audio_url": f"/files/{final_audio_name}",
+        "waveform_url": waveform_url(final_audio_name, raw_filename),
+        "raw_audio_url": f"/raw/{raw_filename}",
+        "decode": processed.metadata.get("decode")
+    }
+
+
+def remove_files(*paths):
+    """Best-effort removal of temp files."""
+    for f in paths:
+        if f and os.path.exists(f):
+            try:
+                os.remove(f)
+            except OSError:
+                pass
+
+
+def process_audio_task(raw_audio_path: str, raw_filename: str, effect: str, delay: float, repeat: int, enable_filter: bool,
+                       params: dict = None, downmix: bool = False) -> dict:
+    """
+    Decode an archived upload once, run noise filter + effect in memory, encode once.
+    Returns the response payload with audio, waveform and raw audio URLs.
+    params: further effect parameters (feedback, mix, room). Channels are kept
+    unless downmix is set.
+    """
+    params = params or {}
+    if effect in STREAMING_EFFECTS and _should_stream(raw_audio_path):
+        return _stream_effect(raw_audio_path, raw_filename, effect, delay, repeat, enable_filter, params, downmix)
+
+    original = load_buffer(raw_audio_path, mono=downmix)
+    report_progress(0.2)
+
+    # Apply noise filter if enabled
+    buf = original
+    if enable_filter:
+        try:
+            buf = apply_noise_filter(original)
+            print("Noise filter applied")
+        except Exception as filter_err:
+            print(f"Filter error (continuing without filter): {filter_err}")
+        report_progress(0.4)
+
+    # Apply selected effect
+    processed = run_effect(buf, effect, delay=delay, repeat=repeat, **params)
+    report_progress(0.8)
+    return _publish(processed, effect, raw_filename)
+
+
+def _stream_effect(raw_audio_path: str, raw_filename: str, effect: str, delay: float, repeat: int, enable_filter: bool,
+                   params: dict, downmix: bool = False) -> dict:
+    """Block-streaming variant of process_audio_task."""
+    def build_stages(sr):
+        stages = [spectral_subtraction_stage(sr, 0.5)] if enable_filter else []
+        return stages + effect_stages(effect, sr, delay=delay, repeat=repeat, **params)
+
+    final_audio_name = f"{effect}_{uuid.uuid4().hex}.wav"
+    output_path = os.path.join(TEMP_DIR, final_audio_name)
+    stats = stream_file(raw_audio_path, output_path, build_stages, STREAM_BLOCK_SIZE, progress=report_progress,
+                        mono=downmix)
+    register_artifact(output_path, "processed")
+    print(f"Streamed {effect}: {stats}")
+    return {
+        "audio_url": f"/files/{final_audio_name}",
+        "waveform_url": waveform_url(final_audio_name, raw_filename),
+        "raw_audio_url": f"/raw/{raw_filename}",
+        "streamed": True
+    }
+
+
+def process_chain_task(raw_audio_path: str, raw_filename: str, stages: list[dict], downmix: bool = False) -> dict:
+    """Run a validated effect chain over one decoded buffer (see src/processing/chain.py)."""
+    processed = run_chain(load_buffer(raw_audio_path, mono=downmix), stages)
+    result = _publish(processed, "chain", raw_filename)
+    result["stages"] = processed.metadata.get("stages", [])
+    return result
+
+
+def filter_audio_task(wav_path: str, filter_type: str, intensity: float, downmix: bool = False) -> dict:
+    """Apply one /filter-audio filter type to a converted upload (see convert_upload_task)."""
+    final_name = f"filtered_{uuid.uuid4()}.wav"
+    output_path = os.path.join(TEMP_DIR, final_name)
+
+    if filter_type in STREAMING_FILTERS and _should_stream(wav_path):
+        factory = STREAMING_FILTERS[filter_type]
+        stream_file(wav_path, output_path, lambda sr: factory(sr, intensity / 100.0), STREAM_BLOCK_SIZE,
+                    progress=report_progress, mono=downmix)
+        decode = None
+    else:
+        buf = load_buffer(wav_path, mono=downmix)
+        report_progress(0.2)
+        buf = apply_filter(buf, filter_type, intensity)
+        report_progress(0.8)
+        write_buffer(buf, output_path)
+        decode = buf.metadata.get("decode")
+    register_artifact(output_path, "processed")
+
+    return {"audio_url": f"/files/{final_name}", "waveform_url": waveform_url(final_name), "decode": decode}
+
+
+def stt_task(temp_input_path: str, language: str) -> str:
+    """Transcribe an upload (converted to WAV only if speech_recognition cannot read it)."""
+    check_file_duration(temp_input_path, MAX_UPLOAD_SECONDS)
+    try:
+        wav_path = ensure_wav_format(temp_input_path)
+    except AudioDecodeError:
+        wav_path = temp_input_path
+    try:
+        return speech_to_text(wav_path, language)
+    finally:
+        if wav_path != temp_input_path:
+            remove_files(wav_path)
+
+
+def stt_plan_task(temp_input_path: str) -> dict:
+    """
+    Plan a long-form transcription: a soundfile-readable path (the upload, or
+    f"{temp_input_path}.wav" when it had to be converted), the duration and the
+    speech segments found by the VAD as (start, end) sample offsets.
+    """
+    check_file_duration(temp_input_path, MAX_UPLOAD_SECONDS)
+    path = temp_input_path
+    if not probe_audio(temp_input_path):
+        try:
+            path = convert_to_wav(temp_input_path, f"{temp_input_path}.wav", MAX_UPLOAD_SECONDS)[0]
+        except AudioDecodeError as e:
+            raise AudioConversionError(f"Cannot convert audio format: {str(e)}")
+    segments, sample_rate = file_speech_segments(
+        path, min_silence=STT_MIN_SILENCE_SECONDS, max_seconds=STT_SEGMENT_MAX_SECONDS
+    )
+    return {"path": path, "sample_rate": sample_rate, "duration": sf.info(path).duration, "segments": segments}
+
+
+def stt_segment_task(path: str, start: int, end: int, language: str) -> str:
+    """Recognize samples [start, end) of a file (read by seeking, mixed to mono)."""
+    y, sample_rate = sf.read(path, start=start, stop=end, dtype="float32", always_2d=True)
+    return recognize_samples(y.mean(axis=1), sample_rate, language)
+
+
+def _file_peaks(audio_path: str):
+    """Cached base-level peaks of a stored file (the cache file is indexed for the janitor)."""
+    peaks = cached_file_peaks(audio_path, PEAKS_DIR)
+    register_artifact(peaks_cache_path(audio_path, PEAKS_DIR), "derived")
+    return peaks
+
+
+# ============== BATCH ==============
+
+def extract_zip_task(zip_path: str, max_files: int, max_bytes: int) -> list[tuple[str, str]]:
+    """
+    Extract the audio members of an uploaded zip into SCRATCH_DIR.
+    Returns [(member name, path)]; sizes are enforced on the bytes actually
+    inflated, not the sizes the archive claims.
+    """
+    try:
+        archive = zipfile.ZipFile(zip_path)
+    except zipfile.BadZipFile as e:
+        raise AudioConversionError(f"Invalid zip file: {e}")
+
+    members = []
+    total = 0
+    try:
+        with archive:
+            for info in archive.infolist():
+                name = os.path.basename(info.filename)
+                if info.is_dir() or not name or name.startswith(".") or info.filename.startswith("__MACOSX/"):
+                    continue
+                if len(members) >= max_files:
+                    raise UploadTooLargeError(f"Batch has more than {max_files} files")
+                path = os.path.join(SCRATCH_DIR, f"batch_{uuid.uuid4().hex}_{name}")
+                members.append((name, path))
+                with archive.open(info) as src, open(path, "wb") as out:
+                    for chunk in iter(lambda: src.read(1 << 20), b""):
+                        total += len(chunk)
+                        if total > max_bytes:
+                            raise UploadTooLargeError(f"Batch expands to more than {max_bytes // (1024 * 1024)} MB")
+                        out.write(chunk)
+    except zipfile.BadZipFile as e:
+        # Corrupt member data (e.g. a CRC mismatch) only shows up while inflating
+        remove_files(*[path for _, path in members])
+        raise AudioConversionError(f"Invalid zip file: {e}")
+    except BaseException:
+        # Rejected or interrupted: nothing extracted so far is handed to the caller
+        remove_files(*[path for _, path in members])
+        raise
+    return members
+
+
+def batch_item_task(input_path: str, stages: list[dict], output_path: str, downmix: bool = False) -> dict:
+    """Decode one batch file, run the chain over it and write the WAV result; returns its manifest fields."""
+    start = time.perf_counter()
+    buf = load_buffer(input_path, mono=downmix, max_seconds=MAX_UPLOAD_SECONDS)
+    processed = run_chain(buf, stages)
+    write_buffer(processed, output_path)
+    return {
+        "duration": round(processed.duration, 3),
+        "sample_rate": processed.sr,
+        "channels": processed.channels,
+        "decode": buf.metadata["decode"],
+        "process_ms": round(1000 * (time.perf_counter() - start), 1),
+    }
+
+
+def peaks_task(audio_path: str, pixels: int, samples_per_pixel: int, fmt: str, bits: int):
+    """Waveform summary of a stored file: .dat bytes or a JSON-able dict."""
+    peaks = peaks_for_zoom(_file_peaks(audio_path), pixels, samples_per_pixel)
+    return peaks.to_dat(bits) if fmt == "dat" else peaks.to_json(bits)
+
+
+def waveform_cache_path(audio_path: str, original_path: str, width: int, height: int) -> str:
+    """Cached image path, keyed by audio ID (plus the original's, for overlays) and size."""
+    key = os.path.splitext(os.path.basename(audio_path))[0]
+    if original_path:
+        key += "_vs_" + os.path.splitext(os.path.basename(original_path))[0]
+    return os.path.join(WAVEFORM_DIR, f"{key}_{width}x{height}.png")
+
+
+def waveform_task(audio_path: str, original_path: str, width: int, height: int) -> str:
+    """Render (once) the waveform image of audio_path, overlaid on original_path if given."""
+    output_path = waveform_cache_path(audio_path, original_path, width, height)
+    if not os.path.exists(output_path):
+        os.makedirs(WAVEFORM_DIR, exist_ok=True)
+        original = _file_peaks(original_path) if original_path else None
+        render_waveform_png(_file_peaks(audio_path), output_path, original, width, height)
+        register_artifact(output_path, "derived")
+    return output_path
+
+
+def move_to_temp_dir(output_path: str) -> str:
+    """Move a generated file into TEMP_DIR and return its /files URL."""
+    final_name = os.path.basename(output_path)
+    register_artifact(archive_file(output_path, os.path.join(TEMP_DIR, final_name)), "processed")
+    return f"/files/{final_name}"
@@ -10,9 +10,13 @@ from .effects import (
     reverse_effect,
     monster_effect,
     telephone_effect,
+    delay_effect,
+    reverb_effect,
 )
 from .filters import process_voice
-from .speech import text_to_speech, speech_to_text
+from .speech import text_to_speech, speech_to_text, normalize_text, synthesize, synthesis_key, SynthesisError
+from .buffer import AudioBuffer, load_buffer, write_buffer
+from .pipeline import EFFECTS, run_effect
 
 __all__ = [
     "chipmunk_effect",
@@ -25,7 +29,18 @@ __all__ = [
     "reverse_effect",
     "monster_effect",
     "telephone_effect",
+    "delay_effect",
+    "reverb_effect",
     "process_voice",
     "text_to_speech",
     "speech_to_text",
+    "normalize_text",
+    "synthesize",
+    "synthesis_key",
+    "SynthesisError",
+    "AudioBuffer",
+    "load_buffer",
+    "write_buffer",
+    "EFFECTS",
+    "run_effect",
 ]
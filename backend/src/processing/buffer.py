@@ -0,0 +1,70 @@
+# buffer.py - In-Memory Audio Buffer Passed Between Processing Stages
+from dataclasses import dataclass, field
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+from config.settings import SCRATCH_DIR
+from src.processing.resample import processing_rate, resample
+from src.utils.audio_io import decode_audio
+
+# Sample format of every processed WAV (in-memory and streamed)
+WAV_SUBTYPE = 'PCM_16'
+
+
+@dataclass
+class AudioBuffer:
+    """
+    Decoded audio: samples + sample rate + free-form metadata. Samples are
+    (samples,) for mono and (channels, samples) otherwise; processing runs
+    along the last axis.
+    """
+    samples: np.ndarray
+    sr: int
+    metadata: dict = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        """Length in seconds."""
+        return self.samples.shape[-1] / self.sr if self.sr else 0.0
+
+    @property
+    def channels(self) -> int:
+        """Number of channels."""
+        return 1 if self.samples.ndim == 1 else self.samples.shape[0]
+
+    def with_samples(self, samples: np.ndarray, stage: str = None) -> "AudioBuffer":
+        """Return a new buffer with the same rate/metadata and new samples, recording the stage name."""
+        metadata = dict(self.metadata)
+        if stage:
+            metadata["stages"] = metadata.get("stages", []) + [stage]
+        return AudioBuffer(samples, self.sr, metadata)
+
+
+def load_buffer(audio_path: str, sr: int = None, mono: bool = False, max_seconds: float = None) -> AudioBuffer:
+    """
+    Decode an audio file into an AudioBuffer (the single decode point of a
+    request), resampled to `sr` or else to the PROCESSING_RATE_MODE rate.
+    Multichannel files keep their channels unless mono is set (downmix).
+    metadata["decode"] records the container format, backend and decode time.
+    With max_seconds, longer audio raises UploadTooLargeError before it is decoded.
+    """
+    y, native_sr, info = decode_audio(audio_path, max_seconds=max_seconds)
+    y = y.mean(axis=1) if mono or y.shape[1] == 1 else np.ascontiguousarray(y.T)
+    target_sr = sr or processing_rate(native_sr)
+    metadata = {"source": audio_path, "native_sr": native_sr, "decode": info}
+    return AudioBuffer(resample(y, native_sr, target_sr), target_sr, metadata)
+
+
+def write_buffer(buf: AudioBuffer, output_path: str) -> str:
+    """Encode an AudioBuffer as WAV at output_path."""
+    sf.write(output_path, buf.samples.T, buf.sr, subtype=WAV_SUBTYPE)
+    return output_path
+
+
+def write_temp_wav(buf: AudioBuffer) -> str:
+    """Encode an AudioBuffer to a new temporary WAV file and return its path."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav', dir=SCRATCH_DIR) as temp_file:
+        sf.write(temp_file.name, buf.samples.T, buf.sr, subtype=WAV_SUBTYPE)
+        return temp_file.name
@@ -0,0 +1,202 @@
+# chain.py - Multi-Stage Effect Chains with Fused Sample-Wise Stages
+#
+# A chain is an ordered list of stage dicts, e.g.
+#   [{"type": "noise_filter"}, {"type": "telephone"}, {"type": "echo", "delay": 0.3}]
+# Chains are validated up front (validate_chain) and then run over a single
+# decoded AudioBuffer (run_chain). Adjacent sample-wise stages (gain, clip,
+# tanh distortion, normalize) are fused into one in-place pass over the samples.
+import numpy as np
+
+from src.processing.buffer import AudioBuffer
+from src.processing.effects import bandpass_filter
+from src.processing.filters import FILTER_TYPES, apply_filter, apply_noise_filter
+from src.processing.pipeline import run_effect
+from src.processing.reverb import available_rooms
+
+# Samples per chunk of the fused pass (fits comfortably in L2 cache as float32/64)
+FUSE_CHUNK = 1 << 16
+
+
+class ChainError(ValueError):
+    """Raised when a chain specification is invalid."""
+
+
+# Stage type -> {param: (type, default, min, max)}
+STAGE_PARAMS = {
+    # Effects from /process-audio
+    "chipmunk": {},
+    "robot": {},
+    "echo": {"delay": (float, 0.2, 0.01, 2.0)},
+    "electronic": {},
+    "stutter": {"repeat": (int, 3, 1, 10)},
+    "whisper": {},
+    "reverse": {},
+    "monster": {},
+    "process_voice": {"delay": (float, 0.2, 0.01, 2.0)},
+    "delay": {"delay": (float, 0.3, 0.01, 2.0), "feedback": (float, 0.5, 0.0, 0.95), "mix": (float, 0.5, 0.0, 1.0)},
+    "reverb": {"room": (str, "room", None, None), "mix": (float, 0.35, 0.0, 1.0)},
+    # Sample-wise effects (fusable)
+    "distortion": {"gain": (float, 6.0, 0.1, 100.0)},
+    "telephone": {},
+    # Filters
+    "noise_filter": {"noise_reduce": (float, 0.5, 0.0, 2.0)},
+    "filter": {"filter_type": (str, "noise", None, None), "intensity": (float, 50.0, 0.0, 100.0)},
+    # Sample-wise primitives (fusable)
+    "gain": {"gain_db": (float, 0.0, -60.0, 40.0)},
+    "clip": {"limit": (float, 1.0, 0.01, 1.0)},
+    "normalize": {"target_peak": (float, 0.95, 0.01, 1.0)},
+}
+
+
+def validate_chain(chain, max_stages: int = 16) -> list[dict]:
+    """
+    Check a chain spec and return it with types coerced and defaults filled in.
+    Raises ChainError describing the first invalid stage.
+    """
+    if not isinstance(chain, list) or not chain:
+        raise ChainError("Chain must be a non-empty list of stages")
+    if len(chain) > max_stages:
+        raise ChainError(f"Chain has {len(chain)} stages (max {max_stages})")
+
+    stages = []
+    for i, stage in enumerate(chain):
+        if not isinstance(stage, dict) or "type" not in stage:
+            raise ChainError(f"Stage {i}: must be an object with a 'type'")
+        stage_type = stage["type"]
+        if stage_type not in STAGE_PARAMS:
+            raise ChainError(f"Stage {i}: unknown type '{stage_type}'")
+
+        try:
+            params = validate_stage_params(stage_type, {k: v for k, v in stage.items() if k != "type"})
+        except ChainError as e:
+            raise ChainError(f"Stage {i} ({stage_type}): {e}")
+        stages.append({"type": stage_type, **params})
+    return stages
+
+
+def validate_params(schema: dict, params: dict) -> dict:
+    """
+    Coerce params against a {param: (type, default, min, max)} schema and fill
+    in defaults. Raises ChainError for unknown, mistyped or out-of-range
+    (including NaN/inf) parameters.
+    """
+    unknown = set(params) - set(schema)
+    if unknown:
+        raise ChainError(f"unknown parameters {sorted(unknown)}")
+
+    clean = {}
+    for name, (kind, default, low, high) in schema.items():
+        value = params.get(name, default)
+        try:
+            value = kind(value)
+        except (TypeError, ValueError, OverflowError):
+            raise ChainError(f"'{name}' must be {kind.__name__}")
+        if low is not None and not (low <= value <= high):
+            raise ChainError(f"'{name}' must be between {low} and {high}")
+        clean[name] = value
+    return clean
+
+
+def validate_stage_params(stage_type: str, params: dict) -> dict:
+    """validate_params with the STAGE_PARAMS schema of a stage type, plus its filter/room name checks."""
+    clean = validate_params(STAGE_PARAMS[stage_type], params)
+    if stage_type == "filter" and clean["filter_type"] not in FILTER_TYPES:
+        raise ChainError(f"filter_type must be one of {list(FILTER_TYPES)}")
+    if stage_type == "reverb" and clean["room"] not in available_rooms():
+        raise ChainError(f"room must be one of {available_rooms()}")
+    return clean
+
+
+# ============== STAGE EXPANSION ==============
+# Each stage expands into ops. An op is either ("block", fn) where fn maps
+# AudioBuffer -> AudioBuffer, or a sample-wise op:
+#   ("scale", k)  ("tanh", gain)  ("clip", limit)  ("normalize", target_peak)
+
+def _expand(stage: dict) -> list[tuple]:
+    """Expand a validated stage into ops."""
+    stage_type = stage["type"]
+    if stage_type == "gain":
+        return [("scale", 10 ** (stage["gain_db"] / 20))]
+    if stage_type == "clip":
+        return [("clip", stage["limit"])]
+    if stage_type == "normalize":
+        return [("normalize", stage["target_peak"])]
+    if stage_type == "distortion":
+        # Same as effects.apply_distortion: tanh(gain * y) then normalize
+        return [("tanh", stage["gain"]), ("normalize", 0.95)]
+    if stage_type == "telephone":
+        # Same as effects.apply_telephone: bandpass, tanh(2y) * 0.8, normalize
+        bandpass = lambda buf: buf.with_samples(bandpass_filter(buf.samples, buf.sr, 300, 3400), "bandpass")
+        return [("block", bandpass), ("tanh", 2.0), ("scale", 0.8), ("normalize", 0.95)]
+    if stage_type == "noise_filter":
+        return [("block", lambda buf: apply_noise_filter(buf, stage["noise_reduce"]))]
+    if stage_type == "filter":
+        return [("block", lambda buf: apply_filter(buf, stage["filter_type"], stage["intensity"]))]
+
+    params = {k: v for k, v in stage.items() if k != "type"}
+    return [("block", lambda buf: run_effect(buf, stage_type, **params))]
+
+
+def _fused_pass(y: np.ndarray, ops: list[tuple]) -> np.ndarray:
+    """
+    Apply a run of sample-wise ops in place, chunk by chunk, so the samples are
+    streamed through the cache once per normalize barrier instead of once per op.
+    """
+    # Split at normalize: ops before it run in one pass that also measures the
+    # peak; the normalize gain then becomes the first op of the following pass.
+    segments, current = [], []
+    for op in ops:
+        current.append(op)
+        if op[0] == "normalize":
+            segments.append(current)
+            current = []
+    if current:
+        segments.append(current)
+
+    pending_scale = 1.0
+    for segment in segments:
+        kernel = ([("scale", pending_scale)] if pending_scale != 1.0 else []) + segment
+        measure = kernel[-1][0] == "normalize"
+        if measure:
+            kernel = kernel[:-1]
+        peak = 0.0
+        for start in range(0, y.shape[-1], FUSE_CHUNK):
+            chunk = y[..., start:start + FUSE_CHUNK]
+            for kind, value in kernel:
+                if kind == "scale":
+                    np.multiply(chunk, value, out=chunk)
+                elif kind == "tanh":
+                    np.multiply(chunk, value, out=chunk)
+                    np.tanh(chunk, out=chunk)
+                elif kind == "clip":
+                    np.clip(chunk, -value, value, out=chunk)
+            if measure and chunk.size:
+                peak = max(peak, chunk.max(), -chunk.min())
+        pending_scale = (segment[-1][1] / peak) if measure and peak > 0 else 1.0
+
+    if pending_scale != 1.0:
+        np.multiply(y, pending_scale, out=y)
+    return y
+
+
+def run_chain(buf: AudioBuffer, stages: list[dict]) -> AudioBuffer:
+    """Run validated stages over one buffer, fusing adjacent sample-wise ops."""
+    ops = [op for stage in stages for op in _expand(stage)]
+
+    i = 0
+    while i < len(ops):
+        if ops[i][0] == "block":
+            buf = ops[i][1](buf)
+            i += 1
+            continue
+
+        j = i
+        while j < len(ops) and ops[j][0] != "block":
+            j += 1
+        # Work on a private float copy once per fused run (buf may be shared with the caller)
+        y = buf.samples.astype(np.result_type(buf.samples.dtype, np.float32), copy=True)
+        labels = "+".join(op[0] for op in ops[i:j])
+        buf = buf.with_samples(_fused_pass(y, ops[i:j]), f"fused:{labels}")
+        i = j
+    return buf
+
@@ -0,0 +1,165 @@
+# denoise.py - STFT Spectral Subtraction Shared by All Noise-Reduction Paths
+#
+# Frames are processed in batches (2-D arrays of frames x bins) with a
+# per-frequency noise profile tracked across frames, so memory is bounded by
+# the batch size and cost is O(n log frame). The same SpectralDenoiser object
+# serves whole-buffer processing (spectral_denoise) and block streaming.
+# Multichannel input (channels, samples) is denoised in the same batched calls
+# (arrays gain a leading channel axis), with a noise profile per channel.
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import rfft, irfft
+from scipy.ndimage import minimum_filter1d
+from scipy.signal import get_window, lfilter
+
+# Noise tracking modes
+TRACKING_MODES = ("minimum", "vad", "initial")
+
+
+class SpectralDenoiser:
+    """
+    Stateful STFT denoiser (sqrt-Hann, 50% overlap). Has the BlockStage
+    interface (process, latency, buffering) so it can run in the streaming engine.
+
+    tracking:
+      "minimum" - minimum statistics: noise = bias * min of smoothed power over the last window_seconds
+      "vad"     - energy VAD: noise profile updated from frames close to the current noise floor
+      "initial" - noise profile from the first 0.1 s (assumed to be silence)
+    strength is the over-subtraction factor; floor is the minimum gain per bin.
+    """
+
+    def __init__(
+        self,
+        sr: int,
+        strength: float = 1.0,
+        tracking: str = "minimum",
+        n_fft: int = None,
+        floor: float = 0.05,
+        window_seconds: float = 1.5,
+        batch_frames: int = 256,
+    ):
+        if tracking not in TRACKING_MODES:
+            raise ValueError(f"tracking must be one of {TRACKING_MODES}")
+        self.sr = sr
+        self.strength = strength
+        self.tracking = tracking
+        self.floor = floor
+        self.batch_frames = batch_frames
+
+        # ~32 ms frames, power of two
+        self.n_fft = n_fft or 1 << int(np.ceil(np.log2(0.032 * sr)))
+        self.hop = self.n_fft // 2
+        self.latency = self.hop
+        self.buffering = self.n_fft
+        self.window = np.sqrt(get_window("hann", self.n_fft)).astype(np.float32)
+
+        # Streaming state (shaped by the first block: mono or per channel)
+        self.pending = None
+        self.carry = None
+
+        # Noise tracking state
+        self.alpha = 0.6  # power smoothing per frame (heavier smoothing lets speech leak into the minimum)
+        self.smooth_zi = None
+        self.min_frames = max(int(window_seconds * sr / self.hop) | 1, 3)  # odd
+        self.min_history = None
+        self.bias = 1.5  # minimum statistics underestimates the mean noise power
+        self.noise = None
+        self.initial_frames = max(int(0.1 * sr / self.hop), 1)
+        self.vad_ratio = 3.0  # frames below vad_ratio x noise energy count as noise
+        self.vad_beta = 0.9
+
+    # ============== NOISE TRACKING ==============
+
+    # P is (..., frames, bins): frames run along axis -2
+
+    def _track_minimum(self, P: np.ndarray) -> np.ndarray:
+        if self.smooth_zi is None:
+            self.smooth_zi = self.alpha * P[..., :1, :]
+        S, self.smooth_zi = lfilter([1 - self.alpha], [1, -self.alpha], P, axis=-2, zi=self.smooth_zi)
+
+        history = self.min_history if self.min_history is not None else S[..., :0, :]
+        ext = np.concatenate([history, S], axis=-2)
+        # Causal window: frames t - (D - 1) .. t
+        M = minimum_filter1d(ext, size=self.min_frames, axis=-2, origin=(self.min_frames - 1) // 2, mode='nearest')
+        self.min_history = ext[..., -(self.min_frames - 1):, :]
+        return self.bias * M[..., history.shape[-2]:, :]
+
+    def _track_initial(self, P: np.ndarray) -> np.ndarray:
+        if self.noise is None:
+            self.noise = P[..., :self.initial_frames, :].mean(axis=-2)
+        return np.broadcast_to(self.noise[..., None, :], P.shape)
+
+    def _track_vad(self, P: np.ndarray) -> np.ndarray:
+        if self.noise is None:
+            self.noise = P[..., :self.initial_frames, :].mean(axis=-2)
+        # One decision per frame for all channels (linked), so the channels stay in step
+        energy = P.mean(axis=-1).reshape(-1, P.shape[-2]).mean(axis=0)
+        is_noise = energy < self.vad_ratio * self.noise.mean()
+        if not is_noise.any():
+            return np.broadcast_to(self.noise[..., None, :], P.shape)
+
+        # Recursive average over noise frames only, then hold it through speech frames
+        b = self.vad_beta
+        updated, _ = lfilter([1 - b], [1, -b], P[..., is_noise, :], axis=-2, zi=b * self.noise[..., None, :])
+        last = np.maximum.accumulate(np.where(is_noise, np.arange(len(is_noise)), -1))
+        rank = np.cumsum(is_noise) - 1
+        N = np.where((last >= 0)[:, None], updated[..., rank[np.maximum(last, 0)], :], self.noise[..., None, :])
+        self.noise = updated[..., -1, :]
+        return N
+
+    # ============== PROCESSING ==============
+
+    def _denoise_frames(self, frames: np.ndarray) -> np.ndarray:
+        X = rfft(frames, axis=-1)
+        P = X.real ** 2 + X.imag ** 2
+        if self.tracking == "minimum":
+            N = self._track_minimum(P)
+        elif self.tracking == "vad":
+            N = self._track_vad(P)
+        else:
+            N = self._track_initial(P)
+        gain = np.maximum(1 - self.strength * np.sqrt(N / np.maximum(P, 1e-12)), self.floor)
+        return irfft(X * gain, self.n_fft, axis=-1) * self.window
+
+    def _process_batch(self, block: np.ndarray, out: np.ndarray) -> int:
+        """Denoise the complete frames of pending + block into out; returns samples written."""
+        self.pending = np.concatenate([self.pending, block], axis=-1)
+        n_frames = (self.pending.shape[-1] - self.n_fft) // self.hop + 1
+        if n_frames <= 0:
+            return 0
+
+        windows = sliding_window_view(self.pending, self.n_fft, axis=-1)[..., ::self.hop, :][..., :n_frames, :]
+        out_frames = self._denoise_frames(np.multiply(windows, self.window, dtype=np.float32))
+
+        # Overlap-add: each output hop = 2nd half of previous frame + 1st half of this one
+        segments = out[..., :n_frames * self.hop].reshape(block.shape[:-1] + (n_frames, self.hop))
+        segments[:] = out_frames[..., :self.hop]
+        segments[..., 0, :] += self.carry
+        segments[..., 1:, :] += out_frames[..., :-1, self.hop:]
+        self.carry = out_frames[..., -1, self.hop:].astype(np.float64)
+        self.pending = self.pending[..., n_frames * self.hop:]
+        return n_frames * self.hop
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Consume a block of samples (along the last axis), return the denoised samples available so far."""
+        lead = block.shape[:-1]
+        if self.pending is None:
+            self.pending = np.zeros(lead + (self.hop,))
+            self.carry = np.zeros(lead + (self.hop,))
+        n_out = max((self.pending.shape[-1] + block.shape[-1] - self.n_fft) // self.hop + 1, 0) * self.hop
+        out = np.empty(lead + (n_out,))
+        # Feed batch_frames hops at a time so temporaries stay bounded
+        step = self.batch_frames * self.hop
+        written = 0
+        for start in range(0, block.shape[-1], step):
+            written += self._process_batch(block[..., start:start + step], out[..., written:])
+        return out[..., :written]
+
+
+def spectral_denoise(y: np.ndarray, sr: int, strength: float = 1.0, tracking: str = "minimum", **kwargs) -> np.ndarray:
+    """Denoise a whole signal; output is aligned with and as long as the input."""
+    denoiser = SpectralDenoiser(sr, strength, tracking, **kwargs)
+    y = np.asarray(y, dtype=np.float64)
+    flush = np.zeros(y.shape[:-1] + (denoiser.latency + denoiser.buffering,))
+    out = np.concatenate([denoiser.process(y), denoiser.process(flush)], axis=-1)
+    return out[..., denoiser.latency:denoiser.latency + y.shape[-1]]
@@ -0,0 +1,81 @@
+# dynamics.py - Envelope-Follower Noise Gate
+#
+# The gate opens when |x| exceeds the threshold, ramps up linearly over the
+# attack time *before* the first loud sample (look-ahead), stays open for the
+# hold time after the last loud sample and then ramps down over the release
+# time. The gain is computed in one vectorized O(n) pass from the distance to
+# the previous/next loud sample, so the same code serves whole buffers and
+# streamed blocks (which carry the last loud sample position across calls).
+# Multichannel gates are linked: one gain from the loudest channel is applied
+# to all channels, so the stereo image does not shift when the gate moves.
+import numpy as np
+
+# Default gate timing (ms)
+GATE_ATTACK_MS = 2.0
+GATE_HOLD_MS = 10.0
+GATE_RELEASE_MS = 40.0
+
+# Samples per chunk in noise_gate (keeps the temporaries in cache)
+GATE_CHUNK = 1 << 16
+
+
+def gate_gain(
+    y: np.ndarray,
+    threshold: float,
+    attack: int,
+    hold: int,
+    release: int,
+    last_open: float = -np.inf,
+    offset: int = 0,
+    valid: int = None,
+) -> tuple[np.ndarray, float]:
+    """
+    Gate gain (0..1) for y; attack/hold/release in samples.
+    last_open is the absolute index of the last loud sample before y (offset is
+    the absolute index of y[0]). Only y[:valid] is consumed - the rest is
+    look-ahead - so the returned last_open covers y[:valid]. Returns (gain, new last_open).
+    """
+    n = len(y)
+    idx = np.arange(offset, offset + n, dtype=np.float64)
+    loud = np.abs(y) > threshold
+
+    # Distance back to the most recent loud sample -> hold, then release ramp
+    prev = np.maximum.accumulate(np.where(loud, idx, last_open)) if n else idx
+    since = idx - prev - hold
+    gain = np.clip(1.0 - since / max(release, 1), 0.0, 1.0) if release else (since <= 0).astype(np.float64)
+
+    # Distance forward to the next loud sample -> attack ramp (look-ahead)
+    if attack and n:
+        following = np.minimum.accumulate(np.where(loud, idx, np.inf)[::-1])[::-1]
+        np.maximum(gain, np.clip(1.0 - (following - idx) / attack, 0.0, 1.0), out=gain)
+
+    consumed = np.flatnonzero(loud[:valid])
+    if len(consumed):
+        last_open = offset + float(consumed[-1])
+    return gain, last_open
+
+
+def detector(y: np.ndarray) -> np.ndarray:
+    """Per-sample level the gate reacts to: |y|, or the loudest channel of a (channels, samples) array."""
+    return np.abs(y) if y.ndim == 1 else np.abs(y).max(axis=0)
+
+
+def noise_gate(
+    y: np.ndarray,
+    sr: int,
+    threshold: float = 0.02,
+    attack_ms: float = GATE_ATTACK_MS,
+    hold_ms: float = GATE_HOLD_MS,
+    release_ms: float = GATE_RELEASE_MS,
+) -> np.ndarray:
+    """Silence audio below threshold with smooth attack/hold/release ramps (channels linked)."""
+    attack, hold, release = (int(ms * sr / 1000) for ms in (attack_ms, hold_ms, release_ms))
+    out = np.empty(y.shape, dtype=np.result_type(y.dtype, np.float32))
+    level = detector(y)
+    last_open = -np.inf
+    for start in range(0, len(level), GATE_CHUNK):
+        n = min(GATE_CHUNK, len(level) - start)
+        gain, last_open = gate_gain(level[start:start + n + attack], threshold, attack, hold, release,
+                                    last_open, start, valid=n)
+        np.multiply(y[..., start:start + n], gain[:n], out=out[..., start:start + n])
+    return out
@@ -0,0 +1,135 @@
+# filter_design.py - Shared Filter Designs and Fast Filtering
+#
+# IIR filters are designed as second-order sections (numerically stable at any
+# order, unlike (b, a) form) and cached per (type, cutoff, rate, order) -
+# callers must not modify the returned arrays.
+# Linear-phase FIR band filters are applied with a real-FFT overlap-add
+# convolution padded to fast FFT lengths, which replaces the old full-length
+# complex FFT brick-wall filters (slow for prime lengths, O(n) memory in complex128).
+from functools import lru_cache
+
+import numpy as np
+from scipy.fft import next_fast_len, rfft, irfft
+from scipy.signal import butter, cheby1, cheby2, firwin, iirnotch, kaiserord, sosfilt, sosfiltfilt, tf2sos
+
+# Blocks per batched rfft call in fft_filter (bounds temporary memory)
+FFT_BATCH_BLOCKS = 32
+
+
+# ============== IIR (SECOND-ORDER SECTIONS) ==============
+
+# Cutoffs at or above this fraction of Nyquist are treated as "no upper limit"
+NYQUIST_MARGIN = 0.95
+
+
+@lru_cache(maxsize=256)
+def _design_sos(kind: str, btype: str, cutoff: tuple, sr: int, order: int, rp: float, rs: float) -> np.ndarray:
+    nyq = 0.5 * sr
+    # Adapt to low sample rates: a band reaching Nyquist is a highpass, a lowpass above it is a no-op
+    if btype == 'band' and cutoff[1] >= NYQUIST_MARGIN * nyq:
+        btype, cutoff = 'high', cutoff[:1]
+    if btype == 'low' and cutoff[0] >= NYQUIST_MARGIN * nyq:
+        return np.array([[1.0, 0.0, 0.0, 1.0, 0.0, 0.0]])
+    wn = [min(c / nyq, 0.999) for c in cutoff]
+    wn = wn[0] if len(wn) == 1 else wn
+    if kind == "butter":
+        sos = butter(order, wn, btype=btype, output='sos')
+    elif kind == "cheby1":
+        sos = cheby1(order, rp, wn, btype=btype, output='sos')
+    elif kind == "cheby2":
+        sos = cheby2(order, rs, wn, btype=btype, output='sos')
+    else:
+        raise ValueError(f"Unknown filter kind '{kind}'")
+    return sos
+
+
+def design_sos(btype: str, cutoff, sr: int, order: int = 5, kind: str = "butter", rp: float = 1.0, rs: float = 40.0) -> np.ndarray:
+    """
+    Design (and cache) an IIR filter as second-order sections.
+    btype: 'low', 'high', 'band' or 'bandstop'; cutoff in Hz (pair for band filters).
+    kind: 'butter', 'cheby1' (rp dB passband ripple) or 'cheby2' (rs dB stopband attenuation).
+    """
+    cutoff = tuple(float(c) for c in np.atleast_1d(cutoff))
+    return _design_sos(kind, btype, cutoff, int(sr), int(order), float(rp), float(rs))
+
+
+@lru_cache(maxsize=64)
+def notch_sos(freq: float, Q: float, sr: int) -> np.ndarray:
+    """Design (and cache) a notch filter as second-order sections."""
+    b, a = iirnotch(freq, Q, sr)
+    return tf2sos(b, a)
+
+
+def sos_filter(y: np.ndarray, sos: np.ndarray, zero_phase: bool = False) -> np.ndarray:
+    """Apply SOS filter; zero_phase runs it forward and backward (sosfiltfilt)."""
+    if zero_phase:
+        return sosfiltfilt(sos, y)
+    return sosfilt(sos, y)
+
+
+# ============== FIR (REAL-FFT OVERLAP-ADD) ==============
+
+@lru_cache(maxsize=64)
+def design_fir_band(sr: int, low: float, high: float, transition: float = 100.0, attenuation: float = 60.0) -> np.ndarray:
+    """
+    Linear-phase Kaiser FIR keeping low..high Hz (low <= 0 gives a lowpass,
+    high within one transition band of Nyquist a highpass). Odd length, so the
+    delay is (len - 1) / 2.
+    """
+    nyq = 0.5 * sr
+    numtaps, beta = kaiserord(attenuation, transition / nyq)
+    numtaps |= 1
+    if low <= 0:
+        taps = firwin(numtaps, high, window=('kaiser', beta), fs=sr)
+    elif high >= nyq - transition:
+        taps = firwin(numtaps, low, window=('kaiser', beta), pass_zero=False, fs=sr)
+    else:
+        taps = firwin(numtaps, [low, high], window=('kaiser', beta), pass_zero=False, fs=sr)
+    taps.setflags(write=False)
+    return taps
+
+
+def fft_convolve(y: np.ndarray, taps: np.ndarray, block_size: int = None) -> np.ndarray:
+    """
+    Full linear convolution of y with taps along the last axis (length
+    n + len(taps) - 1; y is (samples,) or (channels, samples)) by real-FFT
+    overlap-add. Blocks of all channels are transformed in batches, each FFT
+    padded to a fast length.
+    """
+    lead, n, n_taps = y.shape[:-1], y.shape[-1], len(taps)
+    tail = n_taps - 1
+    block_size = max(block_size or 4 * n_taps, tail, 4096)
+    nfft = next_fast_len(block_size + tail, real=True)
+    block_size = nfft - tail  # use the whole fast length
+    H = rfft(taps, nfft)
+
+    n_blocks = max(-(-n // block_size), 1)
+    out = np.zeros(lead + (n_blocks * block_size + tail,))
+    carry = np.zeros(lead + (tail,))
+    for start in range(0, n_blocks, FFT_BATCH_BLOCKS):
+        stop = min(start + FFT_BATCH_BLOCKS, n_blocks)
+        blocks = np.zeros(lead + ((stop - start) * block_size,))
+        chunk = y[..., start * block_size:stop * block_size]
+        blocks[..., :chunk.shape[-1]] = chunk
+        blocks = blocks.reshape(lead + (stop - start, block_size))
+        seg = irfft(rfft(blocks, nfft, axis=-1) * H, nfft, axis=-1)
+
+        # Overlap-add: each block's tail spills into the head of the next block
+        main = seg[..., :block_size]
+        main[..., 0, :tail] += carry
+        main[..., 1:, :tail] += seg[..., :-1, block_size:]
+        carry = seg[..., -1, block_size:].copy()
+        out[..., start * block_size:stop * block_size] = main.reshape(lead + (-1,))
+    out[..., n_blocks * block_size:] = carry
+    return out[..., :n + tail]
+
+
+def fft_filter(y: np.ndarray, taps: np.ndarray) -> np.ndarray:
+    """Apply a linear-phase FIR with its group delay removed (output aligned, same length)."""
+    delay = (len(taps) - 1) // 2
+    return fft_convolve(y, taps)[..., delay:delay + y.shape[-1]]
+
+
+def fir_bandpass(y: np.ndarray, sr: int, low: float, high: float) -> np.ndarray:
+    """Keep low..high Hz with a linear-phase FIR (replacement for the FFT brick-wall filters)."""
+    return fft_filter(y, design_fir_band(int(sr), float(low), float(high)))
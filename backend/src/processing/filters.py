@@ -1,77 +1,53 @@
 # filters.py - Audio Filters and Voice Processing - IMPROVED VERSION
-import librosa
 import numpy as np
-import soundfile as sf
-import tempfile
-import os
-from scipy.signal import butter, lfilter
-from scipy.ndimage import binary_dilation
 
-from src.utils.visualization import save_plot
+from src.processing.buffer import AudioBuffer, load_buffer, write_temp_wav
+from src.processing.denoise import spectral_denoise
+from src.processing.dynamics import noise_gate as gate
+from src.processing.filter_design import design_sos, notch_sos, sos_filter, fir_bandpass
+
+# Filter types accepted by /filter-audio
+FILTER_TYPES = ("noise", "echo", "music", "siren")
 
 
 # ============== FILTER FUNCTIONS ==============
 
-def butter_lowpass_filter(data: np.ndarray, cutoff: float, fs: int, order: int = 5) -> np.ndarray:
-    """Apply Butterworth lowpass filter."""
-    nyq = 0.5 * fs
-    normal_cutoff = cutoff / nyq
-    b, a = butter(order, normal_cutoff, btype='low', analog=False)
-    y = lfilter(b, a, data)
-    return y
+def butter_lowpass_filter(data: np.ndarray, cutoff: float, fs: int, order: int = 5, zero_phase: bool = False) -> np.ndarray:
+    """Apply Butterworth lowpass filter (second-order sections)."""
+    return sos_filter(data, design_sos('low', cutoff, fs, order), zero_phase)
 
 
-def butter_highpass_filter(data: np.ndarray, cutoff: float, fs: int, order: int = 5) -> np.ndarray:
+def butter_highpass_filter(data: np.ndarray, cutoff: float, fs: int, order: int = 5, zero_phase: bool = False) -> np.ndarray:
     """Apply Butterworth highpass filter - removes low frequency rumble."""
-    nyq = 0.5 * fs
-    normal_cutoff = cutoff / nyq
-    b, a = butter(order, normal_cutoff, btype='high', analog=False)
-    y = lfilter(b, a, data)
-    return y
+    return sos_filter(data, design_sos('high', cutoff, fs, order), zero_phase)
 
 
 def remove_non_voice_sounds(y: np.ndarray, sr: int, low: float = 300, high: float = 3400) -> np.ndarray:
-    """Remove frequencies outside human voice range (default 300-3400 Hz)."""
-    Y = np.fft.fft(y)
-    freqs = np.fft.fftfreq(len(Y), 1/sr)
-    Y[(np.abs(freqs) > high) | (np.abs(freqs) < low)] = 0
-    y_filtered = np.fft.ifft(Y).real
-    return y_filtered
+    """Remove frequencies outside human voice range (default 300-3400 Hz) - linear-phase FIR."""
+    return fir_bandpass(y, sr, low, high)
 
 
 def remove_echo(y: np.ndarray, sr: int, delay: float = 0.2, attenuation: float = 0.6) -> np.ndarray:
     """Remove echo from audio signal."""
     delay_samples = int(delay * sr)
     y_echo = np.zeros_like(y)
-    if delay_samples < len(y):
-        y_echo[delay_samples:] = y[:-delay_samples]
+    if 0 < delay_samples < y.shape[-1]:
+        y_echo[..., delay_samples:] = y[..., :-delay_samples]
     y_no_echo = y - attenuation * y_echo
     return y_no_echo
 
 
-def noise_gate(y: np.ndarray, threshold: float = 0.02) -> np.ndarray:
-    """Apply noise gate - silence audio below threshold."""
-    mask = np.abs(y) > threshold
-    # Smooth the mask to avoid clicks
-    mask = binary_dilation(mask, iterations=100)
-    return y * mask
+def noise_gate(y: np.ndarray, threshold: float = 0.02, sr: int = 22050) -> np.ndarray:
+    """Apply noise gate - silence audio below threshold (attack/hold/release ramps, see dynamics.py)."""
+    return gate(y, sr, threshold)
 
 
 def spectral_subtraction(y: np.ndarray, sr: int, noise_reduce: float = 0.5) -> np.ndarray:
-    """Simple spectral subtraction for noise reduction."""
-    noise_samples = int(0.1 * sr)
-    if len(y) > noise_samples:
-        noise_profile = np.abs(np.fft.fft(y[:noise_samples]))
-        noise_estimate = np.mean(noise_profile) * noise_reduce
-        
-        Y = np.fft.fft(y)
-        magnitude = np.abs(Y)
-        phase = np.angle(Y)
-        
-        magnitude = np.maximum(magnitude - noise_estimate, 0)
-        Y_clean = magnitude * np.exp(1j * phase)
-        return np.fft.ifft(Y_clean).real
-    return y
+    """
+    STFT spectral subtraction with a per-frequency, continuously tracked noise
+    profile (see denoise.py). noise_reduce 0.5 is plain subtraction, 1.0 doubles it.
+    """
+    return spectral_denoise(y, sr, strength=2 * noise_reduce)
 
 
 def normalize_audio(y: np.ndarray, target_peak: float = 0.95) -> np.ndarray:
@@ -84,7 +60,7 @@ def normalize_audio(y: np.ndarray, target_peak: float = 0.95) -> np.ndarray:
 
 # ============== VOICE PROCESSING PIPELINE ==============
 
-def process_voice(audio_path: str, cutoff: float = 3000, delay: float = 0.2, attenuation: float = 0.6) -> tuple[str, str]:
+def apply_process_voice(buf: AudioBuffer, cutoff: float = 3000, delay: float = 0.2, attenuation: float = 0.6) -> AudioBuffer:
     """
     Process voice - IMPROVED pipeline:
     1. Highpass 80Hz - remove rumble
@@ -94,29 +70,74 @@ def process_voice(audio_path: str, cutoff: float = 3000, delay: float = 0.2, att
     5. Noise gate
     6. Normalize
     """
-    y, sr = librosa.load(audio_path)
-    
+    y, sr = buf.samples, buf.sr
+
     # 1. Highpass 80Hz - remove rumble/hum
     y = butter_highpass_filter(y, 80, sr)
-    
+
     # 2. Lowpass filter
     y = butter_lowpass_filter(y, cutoff, sr)
-    
+
     # 3. Bandpass voice frequencies
     y = remove_non_voice_sounds(y, sr, low=300, high=3400)
-    
+
     # 4. Remove echo
     y = remove_echo(y, sr, delay, attenuation)
-    
+
     # 5. Noise gate
-    y = noise_gate(y, threshold=0.02)
-    
+    y = noise_gate(y, threshold=0.02, sr=sr)
+
     # 6. Normalize
-    y = normalize_audio(y)
+    return buf.with_samples(normalize_audio(y), "process_voice")
+
+
+def apply_noise_filter(buf: AudioBuffer, noise_reduce: float = 0.5) -> AudioBuffer:
+    """Noise filter used by /process-audio (enable_filter): spectral subtraction + normalize."""
+    y = spectral_subtraction(buf.samples, buf.sr, noise_reduce)
+    return buf.with_samples(normalize_audio(y), "noise_filter")
+
+
+def music_filter_sos(sr: int, intensity_factor: float) -> np.ndarray:
+    """Butterworth bandpass keeping voice frequencies; tighter with more intensity."""
+    low = 300
+    high = 3400 - (intensity_factor * 1000)
+    return design_sos('band', [low, high], sr, order=5)
+
+
+def siren_filter_sos(sr: int, intensity_factor: float) -> np.ndarray:
+    """Notch at 800Hz (sirens); higher intensity = narrower notch."""
+    notch_freq = 800
+    Q = 5 + (intensity_factor * 20)
+    return notch_sos(notch_freq, Q, sr)
+
+
+def apply_filter(buf: AudioBuffer, filter_type: str, intensity: float = 50) -> AudioBuffer:
+    """Apply one /filter-audio filter type; intensity is 0-100."""
+    y, sr = buf.samples, buf.sr
+
+    # Normalize intensity to 0-1
+    intensity_factor = intensity / 100.0
+
+    if filter_type == "noise":
+        # Spectral Subtraction - remove background noise
+        y = spectral_subtraction(y, sr, noise_reduce=intensity_factor)
+
+    elif filter_type == "echo":
+        # Remove echo using delay cancellation
+        attenuation = 0.3 + (intensity_factor * 0.4)  # 0.3-0.7
+        y = remove_echo(y, sr, delay=0.2, attenuation=attenuation)
+
+    elif filter_type == "music":
+        # Bandpass filter - keep only voice frequencies (300-3400Hz)
+        y = sos_filter(y, music_filter_sos(sr, intensity_factor))
+
+    elif filter_type == "siren":
+        # Notch filter - remove specific frequency (sirens ~800Hz)
+        y = sos_filter(y, siren_filter_sos(sr, intensity_factor))
+
+    return buf.with_samples(normalize_audio(y), f"filter:{filter_type}")
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-        sf.write(temp_file.name, y, sr)
-        processed_audio_path = temp_file.name
 
-    waveform_path = save_plot(y, sr, "Voice Processing", os.path.dirname(processed_audio_path))
-    return processed_audio_path, waveform_path
+def process_voice(audio_path: str, cutoff: float = 3000, delay: float = 0.2, attenuation: float = 0.6) -> str:
+    """Run the voice processing pipeline on a file; returns the processed audio path."""
+    return write_temp_wav(apply_process_voice(load_buffer(audio_path), cutoff, delay, attenuation))
@@ -0,0 +1,51 @@
+# pipeline.py - Effect Registry for In-Memory Processing
+from src.processing.buffer import AudioBuffer
+from src.processing.effects import (
+    apply_chipmunk,
+    apply_robot,
+    apply_echo,
+    apply_electronic,
+    apply_stutter,
+    apply_whisper,
+    apply_distortion,
+    apply_reverse,
+    apply_monster,
+    apply_telephone,
+    apply_delay,
+    apply_reverb,
+)
+from src.processing.filters import apply_process_voice
+
+# Effect name (as sent by the frontend) -> AudioBuffer function
+EFFECTS = {
+    "chipmunk": apply_chipmunk,
+    "robot": apply_robot,
+    "echo": apply_echo,
+    "electronic": apply_electronic,
+    "stutter": apply_stutter,
+    "whisper": apply_whisper,
+    "distortion": apply_distortion,
+    "reverse": apply_reverse,
+    "monster": apply_monster,
+    "telephone": apply_telephone,
+    "delay": apply_delay,
+    "reverb": apply_reverb,
+    "process_voice": apply_process_voice,
+}
+
+# Request parameters each effect accepts
+EFFECT_PARAMS = {
+    "echo": ("delay",),
+    "stutter": ("repeat",),
+    "distortion": ("gain",),
+    "delay": ("delay", "feedback", "mix"),
+    "reverb": ("room", "mix"),
+    "process_voice": ("delay",),
+}
+
+
+def run_effect(buf: AudioBuffer, effect: str, **params) -> AudioBuffer:
+    """Run a named effect, passing only the parameters it accepts."""
+    accepted = EFFECT_PARAMS.get(effect, ())
+    kwargs = {k: v for k, v in params.items() if k in accepted and v is not None}
+    return EFFECTS[effect](buf, **kwargs)
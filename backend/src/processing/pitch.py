@@ -0,0 +1,145 @@
+# pitch.py - Single-Pass Pitch/Time Engine
+#
+# Scaling pitch by p and tempo by r is one phase-vocoder time stretch (output
+# p/r times as long) followed by one resample from sr*p to sr, instead of
+# librosa's time_stretch + pitch_shift (itself another stretch + resample).
+# The STFT runs in float32/complex64 with windows cached per size, and the
+# quality tier trades frame size/overlap (and identity phase locking) for speed.
+# All channels of a (channels, samples) signal go through each step together.
+from fractions import Fraction
+from functools import lru_cache
+
+import numpy as np
+from scipy.fft import irfft, rfft
+
+from config.settings import PITCH_QUALITY
+from src.processing.resample import resample
+
+# Quality tier -> (FFT size, hop, identity phase locking, resample quality)
+PITCH_QUALITIES = {
+    "fast": (1024, 256, False, "fast"),
+    "balanced": (2048, 512, False, None),
+    "high": (2048, 256, True, "very_high"),
+}
+
+# Pitch ratios are rounded to a fraction with at most this denominator so the
+# resample stays a small rational ratio (error under 2 cents)
+MAX_RATIO_DENOMINATOR = 64
+
+
+def semitones(n: float) -> float:
+    """Frequency ratio of n semitones."""
+    return 2.0 ** (n / 12.0)
+
+
+@lru_cache(maxsize=8)
+def _window(n_fft: int) -> np.ndarray:
+    """Periodic Hann window (float32, read-only)."""
+    window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n_fft) / n_fft)).astype(np.float32)
+    window.setflags(write=False)
+    return window
+
+
+@lru_cache(maxsize=8)
+def _bin_advance(n_fft: int, hop: int) -> np.ndarray:
+    """Expected phase advance per hop of every FFT bin."""
+    advance = (2 * np.pi * hop * np.arange(n_fft // 2 + 1) / n_fft).astype(np.float32)
+    advance.setflags(write=False)
+    return advance
+
+
+def _fit(y: np.ndarray, length: int) -> np.ndarray:
+    """Trim or zero-pad the last axis to length."""
+    if y.shape[-1] >= length:
+        return y[..., :length]
+    return np.pad(y, [(0, 0)] * (y.ndim - 1) + [(0, length - y.shape[-1])])
+
+
+def stft(y: np.ndarray, n_fft: int, hop: int) -> np.ndarray:
+    """Centered STFT along the last axis as a (..., frames, bins) complex64 array."""
+    pad = n_fft // 2
+    mode = "reflect" if y.shape[-1] > pad else "constant"
+    y = np.pad(y.astype(np.float32, copy=False), [(0, 0)] * (y.ndim - 1) + [(pad, pad)], mode=mode)
+    frames = np.lib.stride_tricks.sliding_window_view(y, n_fft, axis=-1)[..., ::hop, :] * _window(n_fft)
+    return rfft(frames, axis=-1)
+
+
+def istft(S: np.ndarray, n_fft: int, hop: int, length: int) -> np.ndarray:
+    """Inverse of stft: windowed overlap-add (vectorized per hop offset), trimmed/padded to length."""
+    window = _window(n_fft)
+    frames = irfft(S, n=n_fft, axis=-1) * window
+    lead, n = frames.shape[:-2], frames.shape[-2]
+    out = np.zeros(lead + ((n + n_fft // hop - 1) * hop,), dtype=np.float32)
+    norm = np.zeros(out.shape[-1], dtype=np.float32)
+    for j in range(n_fft // hop):
+        part = slice(j * hop, (j + 1) * hop)
+        out[..., j * hop:(n + j) * hop] += frames[..., part].reshape(lead + (-1,))
+        norm[j * hop:(n + j) * hop] += np.tile(window[part] ** 2, n)
+    out /= np.maximum(norm, 1e-8)
+    return _fit(out[..., n_fft // 2:], length)
+
+
+def _lock_phases(mag: np.ndarray, phase: np.ndarray, analysis_phase: np.ndarray) -> np.ndarray:
+    """
+    Identity phase locking: every bin keeps its analysis phase offset from the
+    nearest spectral peak, which carries the vocoder phase.
+    """
+    bins = mag.shape[-1]
+    idx = np.arange(bins, dtype=np.int32)
+    peaks = np.zeros(mag.shape, dtype=bool)
+    peaks[..., 1:-1] = (mag[..., 1:-1] > mag[..., :-2]) & (mag[..., 1:-1] >= mag[..., 2:])
+    prev = np.maximum.accumulate(np.where(peaks, idx, -bins), axis=-1)
+    nxt = np.minimum.accumulate(np.where(peaks, idx, 2 * bins)[..., ::-1], axis=-1)[..., ::-1]
+    peak = np.where(nxt - idx < idx - prev, nxt, prev)
+    peak = np.where((peak < 0) | (peak >= bins), idx, peak)  # frames without peaks
+    return (np.take_along_axis(phase, peak, axis=-1)
+            + analysis_phase - np.take_along_axis(analysis_phase, peak, axis=-1))
+
+
+def phase_vocoder(D: np.ndarray, rate: float, n_fft: int, hop: int, phase_lock: bool = False) -> np.ndarray:
+    """Time-scale a (..., frames, bins) STFT by rate (>1 is faster); phases accumulated with one cumsum."""
+    steps = np.arange(0, D.shape[-2], rate)
+    D = np.pad(D, [(0, 0)] * (D.ndim - 2) + [(0, 2), (0, 0)])
+    left = steps.astype(int)
+    alpha = (steps - left).astype(np.float32)[:, None]
+    c0, c1 = D[..., left, :], D[..., left + 1, :]
+    phi0 = np.angle(c0)
+    mag = (1 - alpha) * np.abs(c0) + alpha * np.abs(c1)
+
+    advance = _bin_advance(n_fft, hop)
+    dphase = np.angle(c1) - phi0 - advance
+    dphase -= 2 * np.pi * np.round(dphase / (2 * np.pi))
+    dphase += advance
+    # Accumulate in float64 (long signals), wrap, then continue in float32
+    phase = np.empty(mag.shape)
+    phase[..., 0, :] = np.angle(D[..., 0, :])
+    np.cumsum(dphase[..., :-1, :], axis=-2, dtype=np.float64, out=phase[..., 1:, :])
+    phase[..., 1:, :] += phase[..., :1, :]
+    phase = np.mod(phase, 2 * np.pi).astype(np.float32)
+    if phase_lock:
+        phase = _lock_phases(mag, phase, phi0)
+    out = np.empty(mag.shape, dtype=np.complex64)
+    out.real = mag * np.cos(phase)
+    out.imag = mag * np.sin(phase)
+    return out
+
+
+def pitch_time(y: np.ndarray, sr: int, pitch_ratio: float = 1.0, tempo_ratio: float = 1.0,
+               quality: str = None) -> np.ndarray:
+    """
+    Scale pitch by pitch_ratio and tempo by tempo_ratio (output is
+    n / tempo_ratio samples, along the last axis) with one STFT pass and one resample.
+    """
+    n_fft, hop, phase_lock, resample_quality = PITCH_QUALITIES[quality or PITCH_QUALITY]
+    ratio = Fraction(pitch_ratio).limit_denominator(MAX_RATIO_DENOMINATOR)
+    n = y.shape[-1]
+    length = int(round(n / tempo_ratio))
+    stretch = float(ratio) / tempo_ratio  # vocoder output / input length
+
+    z = y.astype(np.float32, copy=False)
+    if n and abs(stretch - 1.0) > 1e-6:
+        S = phase_vocoder(stft(z, n_fft, hop), 1.0 / stretch, n_fft, hop, phase_lock)
+        z = istft(S, n_fft, hop, int(round(n * stretch)))
+    if ratio != 1:
+        z = resample(z, sr * ratio.numerator, sr * ratio.denominator, resample_quality)
+    return _fit(z, length)
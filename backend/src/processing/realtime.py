@@ -0,0 +1,173 @@
+# realtime.py - Low-Latency Frame-by-Frame Effects for WebSocket Streaming
+#
+# Each session owns a chain of stateful BlockStages (see streaming.py) built
+# for the client's sample rate. Only zero/low-latency stages are used here:
+# IIR filters instead of STFT stages, fixed output gain instead of
+# normalization (which needs the whole signal). Session parameters are
+# checked against REALTIME_PARAMS (chain.py's ranges) before any stage is
+# built, so no client value can size a delay line past those bounds.
+import time
+from collections import deque
+
+import numpy as np
+
+from config.settings import WS_MAX_SAMPLE_RATE, WS_MIN_SAMPLE_RATE
+from src.processing.chain import STAGE_PARAMS, validate_params
+from src.processing.filter_design import design_sos
+from src.processing.streaming import (
+    BlockStage,
+    FeedbackDelayStage,
+    GateStage,
+    PointwiseStage,
+    RingModStage,
+    SosStage,
+    TapDelayStage,
+)
+
+# Algorithmic latency budget per session (frame buffering + stage look-ahead)
+TARGET_LATENCY_MS = 50.0
+
+# Frames kept for the processing-time percentiles in stats()
+STATS_WINDOW = 1000
+
+
+def _iir(sr: int, cutoff, btype: str, order: int = 4) -> SosStage:
+    return SosStage(design_sos(btype, cutoff, sr, order))
+
+
+def _robot(sr):
+    # Ring modulation at 50Hz + clipping (the batch effect also pitch-shifts, which is not realtime)
+    return [RingModStage(50, sr), PointwiseStage(lambda y: np.clip(y, -0.5, 0.5) * 1.6)]
+
+
+def _distortion(sr, gain: float = 6.0):
+    return [PointwiseStage(lambda y: np.tanh(gain * y) * 0.95)]
+
+
+def _telephone(sr):
+    return [_iir(sr, [300, 3400], 'band'), PointwiseStage(lambda y: np.tanh(y * 2) * 0.8)]
+
+
+def _echo(sr, delay: float = 0.2):
+    delays = [int(d * sr) for d in (delay, delay * 2, delay * 3)]
+    return [TapDelayStage(delays, [0.5, 0.3, 0.1]), PointwiseStage(lambda y: y / 1.9)]
+
+
+def _delay(sr, delay: float = 0.3, feedback: float = 0.5, mix: float = 0.5):
+    peak = 1 - mix + mix / (1 - feedback)  # worst-case gain of the echo train
+    return [FeedbackDelayStage(int(delay * sr), feedback, mix), PointwiseStage(lambda y: y / peak)]
+
+
+def _noise_gate(sr, threshold: float = 0.02):
+    return [GateStage(sr, threshold=threshold)]
+
+
+def _process_voice(sr, delay: float = 0.2, cutoff: float = 3000, attenuation: float = 0.6, threshold: float = 0.02):
+    if cutoff >= sr / 2:
+        raise ValueError(f"'cutoff' must be below half the sample rate ({sr / 2:g} Hz)")
+    return [
+        _iir(sr, 80, 'high'),
+        _iir(sr, cutoff, 'low'),
+        _iir(sr, [300, 3400], 'band'),
+        TapDelayStage([int(delay * sr)], [-attenuation]),
+        GateStage(sr, threshold=threshold),
+    ]
+
+
+# Effect name -> factory(sr, **params) returning realtime stages
+REALTIME_EFFECTS = {
+    "robot": _robot,
+    "distortion": _distortion,
+    "telephone": _telephone,
+    "echo": _echo,
+    "delay": _delay,
+    "noise_gate": _noise_gate,
+    "process_voice": _process_voice,
+}
+
+# Effect name -> {param: (type, default, min, max)}, same ranges as chain stages
+REALTIME_PARAMS = {
+    "robot": {},
+    "distortion": STAGE_PARAMS["distortion"],
+    "telephone": {},
+    "echo": STAGE_PARAMS["echo"],
+    "delay": STAGE_PARAMS["delay"],
+    "noise_gate": {"threshold": (float, 0.02, 0.0, 1.0)},
+    "process_voice": {
+        **STAGE_PARAMS["process_voice"],
+        "cutoff": (float, 3000.0, 100.0, 20000.0),
+        "attenuation": (float, 0.6, 0.0, 1.0),
+        "threshold": (float, 0.02, 0.0, 1.0),
+    },
+}
+
+
+class RealtimeSession:
+    """
+    Per-connection effect state plus latency statistics. Raises ValueError
+    (ChainError for params) for an unknown effect, a sample rate outside
+    WS_MIN_SAMPLE_RATE..WS_MAX_SAMPLE_RATE or invalid params.
+    """
+
+    def __init__(self, effect: str, sample_rate: int, frame_size: int, params: dict = None):
+        if effect not in REALTIME_EFFECTS:
+            raise ValueError(f"Unknown realtime effect '{effect}'. Available: {sorted(REALTIME_EFFECTS)}")
+        if not WS_MIN_SAMPLE_RATE <= sample_rate <= WS_MAX_SAMPLE_RATE:
+            raise ValueError(f"sample_rate must be between {WS_MIN_SAMPLE_RATE} and {WS_MAX_SAMPLE_RATE}")
+        if not isinstance(params or {}, dict):
+            raise ValueError("params must be an object")
+        self.effect = effect
+        self.sr = sample_rate
+        self.frame_size = frame_size
+        self.params = validate_params(REALTIME_PARAMS[effect], params or {})
+        self.stages: list[BlockStage] = REALTIME_EFFECTS[effect](sample_rate, **self.params)
+        # Recent frame times for percentiles; running totals for the whole session
+        self.processing_ms = deque(maxlen=STATS_WINDOW)
+        self.frames = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.samples = 0
+        self.nonfinite = 0  # NaN/inf input samples replaced with silence
+
+    @property
+    def algorithmic_latency_ms(self) -> float:
+        """Frame buffering + stage look-ahead, in milliseconds."""
+        latency = self.frame_size + sum(stage.latency for stage in self.stages)
+        return 1000.0 * latency / self.sr
+
+    def process(self, frame: np.ndarray) -> np.ndarray:
+        """Process one frame (NaN/inf samples become silence); output has the same length as the input."""
+        start = time.perf_counter()
+        y = frame.astype(np.float64)
+        finite = np.isfinite(y)
+        if not finite.all():
+            # One NaN/inf would poison the filter and delay-line state for the rest of the session
+            self.nonfinite += int(y.size - np.count_nonzero(finite))
+            y[~finite] = 0.0
+        for stage in self.stages:
+            y = stage.process(y)
+        y = np.clip(y, -1.0, 1.0)
+        elapsed = 1000.0 * (time.perf_counter() - start)
+        self.processing_ms.append(elapsed)
+        self.frames += 1
+        self.total_ms += elapsed
+        self.max_ms = max(self.max_ms, elapsed)
+        self.samples += len(frame)
+        return y
+
+    def stats(self) -> dict:
+        """Latency statistics for this session (p95 over the last STATS_WINDOW frames)."""
+        recent = np.array(self.processing_ms) if self.processing_ms else np.zeros(1)
+        audio_ms = 1000.0 * self.samples / self.sr
+        return {
+            "effect": self.effect,
+            "frames": self.frames,
+            "audio_ms": round(audio_ms, 1),
+            "algorithmic_latency_ms": round(self.algorithmic_latency_ms, 2),
+            "target_latency_ms": TARGET_LATENCY_MS,
+            "processing_ms_mean": round(self.total_ms / self.frames, 3) if self.frames else 0.0,
+            "processing_ms_p95": round(float(np.percentile(recent, 95)), 3),
+            "processing_ms_max": round(self.max_ms, 3),
+            "realtime_factor": round(self.total_ms / audio_ms, 4) if audio_ms else 0.0,
+            "nonfinite_samples": self.nonfinite,
+        }
@@ -0,0 +1,89 @@
+# resample.py - Sample-Rate Policy and Fast Resampling
+#
+# Uploads are processed at a rate chosen by PROCESSING_RATE_MODE (native,
+# fixed or capped). Resampling uses soxr when it is installed (it ships with
+# librosa) and otherwise a polyphase FIR (scipy resample_poly) whose Kaiser
+# filter is designed once per (rate pair, quality) and cached.
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+from scipy.signal import firwin, resample_poly
+
+from config.settings import PROCESSING_RATE_MODE, PROCESSING_SAMPLE_RATE, RESAMPLE_QUALITY
+
+try:
+    import soxr
+except ImportError:  # optional backend
+    soxr = None
+
+# Quality tier -> (soxr quality, polyphase half-length in zero crossings, Kaiser beta)
+RESAMPLE_QUALITIES = {
+    "fast": ("LQ", 8, 5.0),
+    "high": ("HQ", 16, 8.0),
+    "very_high": ("VHQ", 32, 10.0),
+}
+
+
+def processing_rate(native_sr: int, mode: str = None, rate: int = None) -> int:
+    """Rate to process an input at: native, fixed (always `rate`) or cap (at most `rate`)."""
+    mode = mode or PROCESSING_RATE_MODE
+    rate = rate or PROCESSING_SAMPLE_RATE
+    if mode == "fixed":
+        return rate
+    if mode == "cap":
+        return min(native_sr, rate)
+    return native_sr
+
+
+@lru_cache(maxsize=32)
+def _polyphase_filter(up: int, down: int, half_len: int, beta: float) -> np.ndarray:
+    max_rate = max(up, down)
+    taps = firwin(2 * half_len * max_rate + 1, 1.0 / max_rate, window=('kaiser', beta))  # resample_poly scales by up
+    taps.setflags(write=False)
+    return taps
+
+
+def resample(y: np.ndarray, sr_in: int, sr_out: int, quality: str = None) -> np.ndarray:
+    """
+    Resample a mono (samples,) or multichannel (channels, samples) signal from
+    sr_in to sr_out along the last axis (returned unchanged if the rates match).
+    """
+    if sr_in == sr_out:
+        return y
+    soxr_quality, half_len, beta = RESAMPLE_QUALITIES[quality or RESAMPLE_QUALITY]
+    if soxr is not None:
+        if y.ndim == 2:  # soxr takes (frames, channels)
+            return np.ascontiguousarray(soxr.resample(y.T, sr_in, sr_out, quality=soxr_quality).T)
+        return soxr.resample(y, sr_in, sr_out, quality=soxr_quality)
+    g = gcd(sr_in, sr_out)
+    up, down = sr_out // g, sr_in // g
+    taps = _polyphase_filter(up, down, half_len, beta)
+    return resample_poly(y, up, down, axis=-1, window=taps).astype(y.dtype, copy=False)
+
+
+class StreamResampler:
+    """
+    Block-wise resampling for the streaming engine (blocks shaped (samples,)
+    or (channels, samples)). Needs soxr; without it the stream stays at the
+    input rate (sr_out == sr_in).
+    """
+
+    def __init__(self, sr_in: int, sr_out: int, quality: str = None, channels: int = 1):
+        self.sr_in = sr_in
+        self.stream = None
+        if sr_in != sr_out and soxr is not None:
+            soxr_quality = RESAMPLE_QUALITIES[quality or RESAMPLE_QUALITY][0]
+            self.stream = soxr.ResampleStream(sr_in, sr_out, channels, dtype='float64', quality=soxr_quality)
+        self.sr_out = sr_out if self.stream is not None else sr_in
+
+    def output_length(self, input_length: int) -> int:
+        """Output samples corresponding to input_length input samples."""
+        return int(round(input_length * self.sr_out / self.sr_in))
+
+    def process(self, block: np.ndarray, last: bool = False) -> np.ndarray:
+        if self.stream is None:
+            return block
+        if block.ndim == 2:
+            return np.ascontiguousarray(self.stream.resample_chunk(np.ascontiguousarray(block.T), last=last).T)
+        return self.stream.resample_chunk(block, last=last)
@@ -0,0 +1,218 @@
+# reverb.py - Multi-Tap Delays, Feedback Delays and Convolution Reverb
+#
+# Multi-tap delays are a sparse FIR rendered in one pass over the input (one
+# output buffer, one slice-add per tap). Feedback delays are a recursive comb
+# filter run by scipy's lfilter over the delay's phases. Room reverb convolves
+# with an impulse response (synthesized per preset or loaded from
+# IMPULSE_RESPONSE_DIR) using uniformly partitioned overlap-save convolution:
+# the cost per sample grows with IR length / partition instead of IR length,
+# and the same convolver runs block by block in streaming mode. Reverb output
+# keeps the IR's decay after the input ends (see reverb_tail).
+import os
+from functools import lru_cache
+
+import numpy as np
+from scipy.fft import irfft, rfft
+from scipy.signal import lfilter
+
+from config.settings import IMPULSE_RESPONSE_DIR, REVERB_MAX_TAIL_SECONDS, REVERB_PARTITION_SIZE
+from src.processing.buffer import load_buffer
+from src.processing.filter_design import design_sos, sos_filter
+
+# Partitions per batched FFT call when convolving a whole signal (bounds temporary memory)
+CONVOLVE_BATCH_PARTITIONS = 4
+
+# Synthesized rooms: (RT60 seconds, pre-delay seconds, tail damping cutoff in Hz)
+ROOM_PRESETS = {
+    "room": (0.4, 0.005, 6000.0),
+    "hall": (1.8, 0.02, 4000.0),
+    "cathedral": (4.0, 0.04, 3000.0),
+}
+
+IR_EXTENSIONS = (".wav", ".flac", ".ogg", ".aiff", ".aif")
+
+
+# ============== DELAYS ==============
+
+def tap_delay(y: np.ndarray, delays: list[int], gains: list[float]) -> np.ndarray:
+    """Feed-forward multi-tap delay y[n] + sum(gain_k * y[n - d_k]) as a sparse FIR (same length)."""
+    out = np.array(y, dtype=np.result_type(y.dtype, np.float32))
+    n = y.shape[-1]
+    for d, g in zip(delays, gains):
+        if 0 < d < n:
+            out[..., d:] += g * y[..., :n - d]
+    return out
+
+
+def feedback_delay(y: np.ndarray, delay: int, feedback: float, mix: float = 0.5) -> np.ndarray:
+    """
+    Feedback delay (recursive comb): echoes every `delay` samples, each
+    `feedback` times the previous. wet[n] = y[n - d] + feedback * wet[n - d];
+    output is (1 - mix) * y + mix * wet, same length.
+    """
+    lead, n = y.shape[:-1], y.shape[-1]
+    if delay <= 0 or delay >= n:
+        return y * (1 - mix)
+    # The comb only couples samples d apart: run it down the columns of an (n / d, d) matrix
+    rows = -(-n // delay)
+    x = np.zeros(lead + (rows * delay,))
+    x[..., delay:n] = y[..., :n - delay]
+    wet = lfilter([1.0], [1.0, -feedback], x.reshape(lead + (rows, delay)), axis=-2)
+    return (1 - mix) * y + mix * wet.reshape(lead + (-1,))[..., :n]
+
+
+# ============== IMPULSE RESPONSES ==============
+
+def synthetic_ir(sr: int, rt60: float, pre_delay: float = 0.01, damping_hz: float = 5000.0, seed: int = 0) -> np.ndarray:
+    """
+    Room impulse response: sparse early reflections, then exponentially
+    decaying noise (-60 dB at rt60) that loses high frequencies over time.
+    Normalized to unit energy, so the wet signal is about as loud as the dry one.
+    """
+    rng = np.random.default_rng(seed)
+    start = int(pre_delay * sr)
+    n = start + max(int(rt60 * sr), 1)
+    t = np.arange(n - start) / sr
+    noise = rng.standard_normal(n - start)
+    dark = sos_filter(noise, design_sos('low', damping_hz, sr, 2))
+    fade = t / max(t[-1], 1e-9)
+    tail = ((1 - fade) * noise + fade * dark) * 10 ** (-3 * t / rt60)
+
+    # Early reflections: a few discrete taps over the first 80 ms
+    early = min(int(0.08 * sr), len(tail))
+    positions = rng.integers(0, early, 8) if early else np.zeros(0, dtype=int)
+    tail[positions] += rng.uniform(0.5, 1.5, len(positions)) * 10 ** (-3 * positions / sr / rt60) * 4
+
+    ir = np.zeros(n)
+    ir[start:] = tail
+    return ir / np.sqrt(np.sum(ir ** 2))
+
+
+def available_rooms() -> list[str]:
+    """Room names accepted by impulse_response: presets plus IR files in IMPULSE_RESPONSE_DIR."""
+    files = []
+    if os.path.isdir(IMPULSE_RESPONSE_DIR):
+        files = [os.path.splitext(f)[0] for f in os.listdir(IMPULSE_RESPONSE_DIR)
+                 if f.lower().endswith(IR_EXTENSIONS)]
+    return list(ROOM_PRESETS) + sorted(set(files) - set(ROOM_PRESETS))
+
+
+def _ir_file(room: str):
+    for ext in IR_EXTENSIONS:
+        path = os.path.join(IMPULSE_RESPONSE_DIR, room + ext)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+@lru_cache(maxsize=16)
+def _load_ir(path: str, mtime: float, sr: int) -> np.ndarray:
+    ir = np.asarray(load_buffer(path, sr=sr, mono=True).samples, dtype=np.float64)
+    energy = np.sqrt(np.sum(ir ** 2))
+    return ir / energy if energy > 0 else ir
+
+
+@lru_cache(maxsize=16)
+def _preset_ir(room: str, sr: int) -> np.ndarray:
+    return synthetic_ir(sr, *ROOM_PRESETS[room])
+
+
+def impulse_response(room: str, sr: int) -> np.ndarray:
+    """
+    Impulse response for a room name at rate sr (cached; do not modify).
+    Presets are synthesized; other names load IMPULSE_RESPONSE_DIR/<room>.wav
+    (or .flac, ...), mixed to mono and resampled. Raises ValueError if unknown.
+    """
+    if room in ROOM_PRESETS:
+        ir = _preset_ir(room, int(sr))
+    else:
+        path = _ir_file(room) if os.path.basename(room) == room else None
+        if path is None:
+            raise ValueError(f"Unknown room '{room}'. Available: {available_rooms()}")
+        ir = _load_ir(path, os.path.getmtime(path), int(sr))
+    ir.setflags(write=False)
+    return ir
+
+
+def reverb_ir(room: str, sr: int, mix: float) -> np.ndarray:
+    """Impulse response with the dry signal folded in: (1 - mix) * delta + mix * ir."""
+    ir = mix * impulse_response(room, sr)
+    ir[0] += 1 - mix
+    return ir
+
+
+def reverb_tail(ir_length: int, sr: int) -> int:
+    """Samples of ring-out kept after the input: the IR length - 1, at most REVERB_MAX_TAIL_SECONDS."""
+    return max(min(ir_length - 1, int(REVERB_MAX_TAIL_SECONDS * sr)), 0)
+
+
+# ============== PARTITIONED CONVOLUTION ==============
+
+class PartitionedConvolver:
+    """
+    Uniformly partitioned overlap-save convolution with a fixed impulse
+    response. The IR is split into partitions of `partition` samples whose
+    spectra are precomputed; each input partition is transformed once and kept
+    in a frequency-domain delay line, so an output partition costs one FFT pair
+    plus one multiply-accumulate per IR partition. process() accepts any block
+    length (samples, or (channels, samples) with one delay line per channel)
+    and returns output for the whole partitions received so far (input
+    sample i always maps to output sample i).
+    """
+
+    def __init__(self, ir: np.ndarray, partition: int = None):
+        self.size = partition or REVERB_PARTITION_SIZE
+        B = self.size
+        parts = max(-(-len(ir) // B), 1)
+        padded = np.zeros(parts * B)
+        padded[:len(ir)] = ir
+        self.H = rfft(padded.reshape(parts, B), 2 * B, axis=1)
+        self.history = None  # spectra of the last parts - 1 inputs, per channel (set by the first block)
+        self.previous = None
+        self.pending = None
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        B = self.size
+        lead = block.shape[:-1]
+        if self.pending is None:
+            self.history = np.zeros(lead + (len(self.H) - 1, B + 1), dtype=complex)
+            self.previous = np.zeros(lead + (1, B))
+            self.pending = np.zeros(lead + (0,))
+        self.pending = np.concatenate([self.pending, block], axis=-1)
+        m = self.pending.shape[-1] // B
+        if m == 0:
+            return np.zeros(lead + (0,))
+        blocks = self.pending[..., :m * B].reshape(lead + (m, B))
+        self.pending = self.pending[..., m * B:]
+
+        # Overlap-save frames [previous partition, current partition], all transformed in one call
+        frames = np.concatenate([np.concatenate([self.previous, blocks[..., :-1, :]], axis=-2), blocks], axis=-1)
+        self.previous = blocks[..., -1:, :].copy()
+        X = np.concatenate([self.history, rfft(frames, axis=-1)], axis=-2)
+
+        lag = len(self.H) - 1
+        Y = X[..., lag:, :] * self.H[0]
+        for p in range(1, len(self.H)):
+            Y += X[..., lag - p:lag - p + m, :] * self.H[p]
+        self.history = X[..., m:, :]
+        return irfft(Y, 2 * B, axis=-1)[..., B:].reshape(lead + (-1,))
+
+
+def partitioned_convolve(y: np.ndarray, ir: np.ndarray, partition: int = None, tail: int = 0) -> np.ndarray:
+    """Convolve y with ir, keeping the first len(y) + tail output samples (partitioned overlap-save)."""
+    conv = PartitionedConvolver(ir, partition)
+    lead, n = y.shape[:-1], y.shape[-1]
+    step = conv.size * CONVOLVE_BATCH_PARTITIONS
+    out = [conv.process(y[..., i:i + step]) for i in range(0, n, step)]
+    produced = sum(o.shape[-1] for o in out)
+    # Feed silence to ring out the tail and flush the partial last partition
+    while produced < n + tail:
+        out.append(conv.process(np.zeros(lead + (step,))))
+        produced += out[-1].shape[-1]
+    return np.concatenate(out, axis=-1)[..., :n + tail]
+
+
+def reverb(y: np.ndarray, sr: int, room: str = "room", mix: float = 0.35) -> np.ndarray:
+    """Room reverb: y convolved with the room's IR, mixed with the dry signal, plus reverb_tail samples."""
+    ir = reverb_ir(room, sr, mix)
+    return partitioned_convolve(y, ir, tail=reverb_tail(len(ir), sr))
@@ -1,24 +1,133 @@
 # speech.py - Text-to-Speech and Speech-to-Text
+import re
 import tempfile
+import unicodedata
+
+import numpy as np
+import soundfile as sf
 import speech_recognition as sr
 from gtts import gTTS
 
+from config.settings import SCRATCH_DIR, TTS_SYNTHESIZER, STT_RECOGNIZER
+from src.utils.cache import cache_key
+
+
+class SynthesisError(RuntimeError):
+    """Raised when a synthesizer produces no audio."""
+
+
+# Local stand-in synthesizer output
+LOCAL_TTS_RATE = 16000
+LOCAL_TTS_CHAR_SECONDS = 0.06
+
 
 def text_to_speech(text: str, lang: str = 'vi') -> str:
     """Convert text to speech using Google TTS."""
     tts = gTTS(text=text, lang=lang)
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3', dir=SCRATCH_DIR) as temp_file:
         tts.save(temp_file.name)
         return temp_file.name
 
 
+def local_text_to_speech(text: str, **params) -> str:
+    """
+    Offline stand-in synthesizer: one short tone per character (pitch from the
+    character, silence for spaces). Deterministic, no network; params ignored.
+    """
+    n = int(LOCAL_TTS_CHAR_SECONDS * LOCAL_TTS_RATE)
+    t = np.arange(n) / LOCAL_TTS_RATE
+    envelope = np.hanning(n)
+    tones = [
+        np.zeros(n) if ch.isspace() else 0.3 * envelope * np.sin(2 * np.pi * (200 + 7 * (ord(ch) % 100)) * t)
+        for ch in text
+    ]
+    y = np.concatenate(tones) if tones else np.zeros(n)
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav', dir=SCRATCH_DIR) as temp_file:
+        sf.write(temp_file.name, y.astype(np.float32), LOCAL_TTS_RATE, subtype="PCM_16")
+        return temp_file.name
+
+
+def _elevenlabs(text: str, **params) -> str:
+    from src.utils.elevenlabs import text_to_speech_eleven
+    return text_to_speech_eleven(text, **params)
+
+
+# Synthesizers by engine: func(text, **params) -> path of a new audio file in
+# SCRATCH_DIR (None on failure). Params are part of the synthesis cache key.
+SYNTHESIZERS = {
+    "gtts": text_to_speech,
+    "elevenlabs": _elevenlabs,
+    "local": local_text_to_speech,
+}
+
+
+def register_synthesizer(engine: str, func):
+    """Add or replace the synthesizer used for engine."""
+    SYNTHESIZERS[engine] = func
+
+
+def normalize_text(text: str) -> str:
+    """Canonical prompt text: NFC, whitespace runs collapsed, trimmed."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def synthesis_key(engine: str, text: str, **params) -> str:
+    """Synthesis cache key: effective engine, normalized text and all params."""
+    return cache_key("tts", TTS_SYNTHESIZER or engine, normalize_text(text), params)
+
+
+def synthesize(engine: str, text: str, **params) -> str:
+    """Synthesize normalized text with engine (or the TTS_SYNTHESIZER override)."""
+    engine = TTS_SYNTHESIZER or engine
+    output_path = SYNTHESIZERS[engine](normalize_text(text), **params)
+    if not output_path:
+        raise SynthesisError(f"{engine} synthesis failed")
+    return output_path
+
+
+# ============== SPEECH-TO-TEXT ==============
+
+def google_recognize(audio: sr.AudioData, language: str) -> str:
+    """Recognize with Google Speech Recognition."""
+    return sr.Recognizer().recognize_google(audio, language=language)
+
+
+def local_recognize(audio: sr.AudioData, language: str) -> str:
+    """Offline stand-in recognizer: describes the audio instead of transcribing it."""
+    seconds = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+    return f"[speech {seconds:.2f}s]"
+
+
+# Recognizers by name: func(sr.AudioData, language) -> text. They raise
+# sr.UnknownValueError when nothing was recognized and sr.RequestError when
+# the service fails.
+RECOGNIZERS = {
+    "google": google_recognize,
+    "local": local_recognize,
+}
+
+
+def register_recognizer(name: str, func):
+    """Add or replace a recognizer (select it with STT_RECOGNIZER)."""
+    RECOGNIZERS[name] = func
+
+
+def recognize_samples(samples: np.ndarray, sample_rate: int, language: str) -> str:
+    """Recognize mono float samples with the STT_RECOGNIZER backend ("" if nothing was recognized)."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    try:
+        return RECOGNIZERS[STT_RECOGNIZER](sr.AudioData(pcm, sample_rate, 2), language)
+    except sr.UnknownValueError:
+        return ""
+
+
 def speech_to_text(audio_path: str, language: str = "vi-VN") -> str:
-    """Convert speech to text using Google Speech Recognition."""
+    """Convert speech to text in one request (see recognize_samples for long recordings)."""
     r = sr.Recognizer()
     try:
         with sr.AudioFile(audio_path) as source:
             audio = r.record(source)
-        text = r.recognize_google(audio, language=language)
+        text = RECOGNIZERS[STT_RECOGNIZER](audio, language)
         return text
     except sr.UnknownValueError:
         return "Không thể nhận diện giọng nói."
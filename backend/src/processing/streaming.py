@@ -0,0 +1,421 @@
+# streaming.py - Block-Based Streaming Engine for Long Recordings
+#
+# Reads the input in fixed-size blocks (soundfile.blocks), runs each block
+# through a list of stateful stages and writes the output incrementally, so
+# memory stays constant regardless of file length. Every stage carries its own
+# state across blocks (sosfilt zi, FIR/delay-line history, overlap-add buffers) and
+# reports its algorithmic latency, which the engine compensates for.
+# Blocks are (samples,) for mono or (channels, samples); stages work along the
+# last axis and size their state from the first block they see.
+import os
+import tempfile
+
+import numpy as np
+import soundfile as sf
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import sosfilt, get_window
+
+from config.settings import SCRATCH_DIR
+from src.processing.buffer import WAV_SUBTYPE
+from src.processing.denoise import SpectralDenoiser
+from src.processing.dynamics import GATE_ATTACK_MS, GATE_HOLD_MS, GATE_RELEASE_MS, detector, gate_gain
+from src.processing.filter_design import design_sos, design_fir_band, fft_convolve
+from src.processing.resample import StreamResampler, processing_rate
+from src.processing.reverb import PartitionedConvolver, reverb_ir, reverb_tail
+from src.processing.filters import music_filter_sos, siren_filter_sos
+
+
+# ============== STAGES ==============
+
+class BlockStage:
+    """
+    Base class: process(block) -> block, with `latency` samples of delay.
+    `buffering` is how many extra samples the stage may hold back before emitting;
+    `tail` is how many samples it adds after the end of the input (e.g. reverb decay).
+    """
+    latency = 0
+    buffering = 0
+    tail = 0
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+
+class PointwiseStage(BlockStage):
+    """Memoryless sample-wise function (tanh, gain, ...)."""
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def process(self, block):
+        return self.fn(block)
+
+
+def _history(block: np.ndarray, length: int) -> np.ndarray:
+    """Zeroed per-channel history of `length` samples for blocks shaped like block."""
+    return np.zeros(block.shape[:-1] + (length,))
+
+
+class SosStage(BlockStage):
+    """IIR filter in second-order sections; carries sosfilt's zi between blocks."""
+
+    def __init__(self, sos: np.ndarray):
+        self.sos = sos
+        self.zi = None
+
+    def process(self, block):
+        if self.zi is None:
+            self.zi = np.zeros((len(self.sos),) + block.shape[:-1] + (2,))
+        y, self.zi = sosfilt(self.sos, block, zi=self.zi)
+        return y
+
+
+class FirStage(BlockStage):
+    """
+    Linear-phase FIR via FFT convolution; keeps the last len(taps) - 1 input
+    samples as history. Latency is the group delay, (len(taps) - 1) / 2.
+    """
+
+    def __init__(self, taps: np.ndarray):
+        self.taps = taps
+        self.history = None
+        self.latency = (len(taps) - 1) // 2
+
+    def process(self, block):
+        h = len(self.taps) - 1
+        if self.history is None:
+            self.history = _history(block, h)
+        ext = np.concatenate([self.history, block], axis=-1)
+        y = fft_convolve(ext, self.taps)[..., h:h + block.shape[-1]]
+        self.history = ext[..., ext.shape[-1] - h:]
+        return y
+
+
+class TapDelayStage(BlockStage):
+    """Feed-forward multi-tap delay: y[n] = x[n] + sum(gain_k * x[n - d_k])."""
+
+    def __init__(self, delays: list[int], gains: list[float]):
+        self.taps = [(d, g) for d, g in zip(delays, gains) if d > 0]
+        self.history = None
+
+    def process(self, block):
+        if not self.taps:
+            return block
+        h = max(d for d, _ in self.taps)
+        if self.history is None:
+            self.history = _history(block, h)
+        ext = np.concatenate([self.history, block], axis=-1)
+        n = block.shape[-1]
+        out = block.copy()
+        for d, g in self.taps:
+            out += g * ext[..., h - d:h - d + n]
+        self.history = ext[..., ext.shape[-1] - h:]
+        return out
+
+
+class FeedbackDelayStage(BlockStage):
+    """
+    Feedback delay (reverb.feedback_delay) for streams: keeps the last `delay`
+    wet samples; each block is filled in slices of at most `delay` samples.
+    """
+
+    def __init__(self, delay: int, feedback: float, mix: float = 0.5):
+        self.delay = max(int(delay), 1)
+        self.feedback = feedback
+        self.mix = mix
+        self.x_history = None
+        self.wet_history = None
+
+    def process(self, block):
+        d = self.delay
+        if self.x_history is None:
+            self.x_history = _history(block, d)
+            self.wet_history = _history(block, d)
+        x = np.concatenate([self.x_history, block], axis=-1)
+        wet = np.concatenate([self.wet_history, np.zeros_like(block)], axis=-1)
+        n = x.shape[-1]
+        for start in range(d, n, d):
+            stop = min(start + d, n)
+            wet[..., start:stop] = x[..., start - d:stop - d] + self.feedback * wet[..., start - d:stop - d]
+        self.x_history = x[..., n - d:]
+        self.wet_history = wet[..., n - d:]
+        return (1 - self.mix) * block + self.mix * wet[..., d:]
+
+
+class ConvolutionStage(BlockStage):
+    """
+    Partitioned FFT convolution (reverb.PartitionedConvolver); holds back up to
+    one partition and rings out for `tail` samples after the input.
+    """
+
+    def __init__(self, ir: np.ndarray, partition: int = None, tail: int = 0):
+        self.convolver = PartitionedConvolver(ir, partition)
+        self.buffering = self.convolver.size
+        self.tail = tail
+
+    def process(self, block):
+        return self.convolver.process(block)
+
+
+class RingModStage(BlockStage):
+    """Ring modulation with a sine carrier; keeps the carrier phase between blocks."""
+
+    def __init__(self, freq: float, sr: int):
+        self.step = 2 * np.pi * freq / sr
+        self.phase = 0.0
+
+    def process(self, block):
+        n = block.shape[-1]
+        phases = self.phase + self.step * np.arange(n)
+        self.phase = (self.phase + self.step * n) % (2 * np.pi)
+        return block * np.sin(phases)
+
+
+class GateStage(BlockStage):
+    """
+    Noise gate (dynamics.noise_gate) for streams: carries the last loud sample
+    position across blocks. Latency is the attack time (gate look-ahead).
+    Channels are linked, as in noise_gate.
+    """
+
+    def __init__(self, sr: int, threshold: float = 0.02, attack_ms: float = GATE_ATTACK_MS,
+                 hold_ms: float = GATE_HOLD_MS, release_ms: float = GATE_RELEASE_MS):
+        self.threshold = threshold
+        self.attack = int(attack_ms * sr / 1000)
+        self.hold = int(hold_ms * sr / 1000)
+        self.release = int(release_ms * sr / 1000)
+        self.latency = self.attack
+        self.tail = None
+        self.pos = -self.attack  # absolute index of tail[0]
+        self.last_open = -np.inf
+
+    def process(self, block):
+        if self.tail is None:
+            self.tail = _history(block, self.attack)
+        n = block.shape[-1]
+        ext = np.concatenate([self.tail, block], axis=-1)
+        # ext[:n] has its full look-ahead inside ext; ext[n:] is re-read with the next block
+        gain, self.last_open = gate_gain(
+            detector(ext), self.threshold, self.attack, self.hold, self.release, self.last_open, self.pos, valid=n)
+        self.tail = ext[..., n:]
+        self.pos += n
+        return ext[..., :n] * gain[:n]
+
+
+class SpectralStage(BlockStage):
+    """
+    STFT overlap-add stage (sqrt-Hann, 50% overlap) applying fn(spec, freqs)
+    to a (frames, bins) rfft array per block. Latency is one hop.
+    """
+
+    def __init__(self, fn, sr: int, n_fft: int = 2048):
+        self.fn = fn
+        self.n_fft = n_fft
+        self.hop = n_fft // 2
+        self.latency = self.hop
+        self.buffering = n_fft
+        self.window = np.sqrt(get_window("hann", n_fft))
+        self.freqs = np.fft.rfftfreq(n_fft, 1 / sr)
+        self.pending = None
+        self.carry = None
+
+    def process(self, block):
+        lead = block.shape[:-1]
+        if self.pending is None:
+            self.pending = _history(block, self.hop)
+            self.carry = _history(block, self.hop)
+        self.pending = np.concatenate([self.pending, block], axis=-1)
+        n_frames = (self.pending.shape[-1] - self.n_fft) // self.hop + 1
+        if n_frames <= 0:
+            return np.zeros(lead + (0,))
+
+        frames = sliding_window_view(self.pending, self.n_fft, axis=-1)[..., ::self.hop, :][..., :n_frames, :] * self.window
+        spec = self.fn(np.fft.rfft(frames, axis=-1), self.freqs)
+        out_frames = np.fft.irfft(spec, self.n_fft, axis=-1) * self.window
+
+        # Overlap-add: each output hop = 2nd half of previous frame + 1st half of this one
+        segments = out_frames[..., :self.hop].copy()
+        segments[..., 0, :] += self.carry
+        segments[..., 1:, :] += out_frames[..., :-1, self.hop:]
+        self.carry = out_frames[..., -1, self.hop:].copy()
+        self.pending = self.pending[..., n_frames * self.hop:]
+        return segments.reshape(lead + (-1,))
+
+
+def bandpass_stage(sr: int, low: float = 300, high: float = 3400) -> FirStage:
+    """Linear-phase FIR bandpass (streaming counterpart of bandpass_filter)."""
+    return FirStage(design_fir_band(int(sr), float(low), float(high)))
+
+
+def spectral_subtraction_stage(sr: int, noise_reduce: float = 0.5) -> SpectralDenoiser:
+    """Streaming counterpart of filters.spectral_subtraction (same denoiser, same output)."""
+    return SpectralDenoiser(sr, strength=2 * noise_reduce)
+
+
+# ============== STREAMABLE EFFECTS / FILTERS ==============
+
+def _butter_stage(sr: int, cutoff: float, btype: str, order: int = 5) -> SosStage:
+    return SosStage(design_sos(btype, cutoff, sr, order))
+
+
+def _echo_stages(sr: int, delay: float = 0.2) -> list[BlockStage]:
+    delays = [int(d * sr) for d in (delay, delay * 2, delay * 3)]
+    return [TapDelayStage(delays, [0.5, 0.3, 0.1])]
+
+
+def _process_voice_stages(sr: int, delay: float = 0.2, cutoff: float = 3000, attenuation: float = 0.6) -> list[BlockStage]:
+    return [
+        _butter_stage(sr, 80, 'high'),
+        _butter_stage(sr, cutoff, 'low'),
+        bandpass_stage(sr, 300, 3400),
+        TapDelayStage([int(delay * sr)], [-attenuation]),
+        GateStage(sr, threshold=0.02),
+    ]
+
+
+def _delay_stages(sr: int, delay: float = 0.3, feedback: float = 0.5, mix: float = 0.5) -> list[BlockStage]:
+    return [FeedbackDelayStage(int(delay * sr), feedback, mix)]
+
+
+def _reverb_stages(sr: int, room: str = "room", mix: float = 0.35) -> list[BlockStage]:
+    ir = reverb_ir(room, sr, mix)
+    return [ConvolutionStage(ir, tail=reverb_tail(len(ir), sr))]
+
+
+# Effect name -> factory(sr, **params) returning stages; output is normalized afterwards
+STREAMING_EFFECTS = {
+    "echo": _echo_stages,
+    "delay": _delay_stages,
+    "reverb": _reverb_stages,
+    "distortion": lambda sr, gain=6.0: [PointwiseStage(lambda y: np.tanh(gain * y))],
+    "telephone": lambda sr: [bandpass_stage(sr, 300, 3400), PointwiseStage(lambda y: np.tanh(y * 2) * 0.8)],
+    "whisper": lambda sr: [PointwiseStage(lambda y: np.random.normal(0, 0.02, y.shape) * np.sign(y))],
+    "process_voice": _process_voice_stages,
+}
+
+# /filter-audio filter type -> factory(sr, intensity_factor)
+STREAMING_FILTERS = {
+    "noise": lambda sr, k: [spectral_subtraction_stage(sr, noise_reduce=k)],
+    "echo": lambda sr, k: [TapDelayStage([int(0.2 * sr)], [-(0.3 + k * 0.4)])],
+    "music": lambda sr, k: [SosStage(music_filter_sos(sr, k))],
+    "siren": lambda sr, k: [SosStage(siren_filter_sos(sr, k))],
+}
+
+
+def effect_stages(effect: str, sr: int, **params) -> list[BlockStage]:
+    """Build the streaming stages for an effect, passing only the params it accepts."""
+    from src.processing.pipeline import EFFECT_PARAMS
+    accepted = EFFECT_PARAMS.get(effect, ())
+    return STREAMING_EFFECTS[effect](sr, **{k: v for k, v in params.items() if k in accepted and v is not None})
+
+
+# ============== ENGINE ==============
+
+def _run(stages: list[BlockStage], block: np.ndarray) -> np.ndarray:
+    for stage in stages:
+        block = stage.process(block)
+    return block
+
+
+def _discard(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def stream_file(
+    input_path: str,
+    output_path: str,
+    build_stages,
+    blocksize: int = 65536,
+    normalize: bool = True,
+    target_peak: float = 0.95,
+    sample_rate: int = None,
+    progress=None,
+    mono: bool = False,
+) -> dict:
+    """
+    Process input_path block by block into output_path (WAV_SUBTYPE WAV, like
+    write_buffer, at sample_rate, default: the PROCESSING_RATE_MODE rate for the
+    input; blocks are resampled on the fly). Channels are kept unless mono is set
+    (downmix). build_stages(sr) returns the stage list. When normalize is set,
+    the first pass writes a float scratch file (peaks above full scale survive)
+    and a second block pass rescales it into output_path.
+    progress(fraction), if given, is called after every block.
+    """
+    info = sf.info(input_path)
+    native_sr = info.samplerate
+    channels = 1 if mono else info.channels
+    lead = () if channels == 1 else (channels,)
+    resampler = StreamResampler(native_sr, sample_rate or processing_rate(native_sr), channels=channels)
+    sr = resampler.sr_out
+    stages = build_stages(sr)
+    latency = sum(stage.latency for stage in stages)
+    tail = sum(stage.tail for stage in stages)
+    flush = latency + tail + sum(stage.buffering for stage in stages)
+
+    state = {"skip": latency, "written": 0, "peak": 0.0}
+    total_in = 0
+    n_blocks = 0
+
+    if normalize:
+        fd, first_pass = tempfile.mkstemp(suffix='.wav', dir=SCRATCH_DIR)
+        os.close(fd)
+    else:
+        first_pass = output_path
+
+    try:
+        with sf.SoundFile(first_pass, 'w', samplerate=sr, channels=channels,
+                          subtype='FLOAT' if normalize else WAV_SUBTYPE) as out:
+            def emit(y, limit):
+                # Drop the leading latency, never write past the input length
+                drop = min(state["skip"], y.shape[-1])
+                y = y[..., drop:]
+                state["skip"] -= drop
+                y = y[..., :max(limit - state["written"], 0)]
+                if y.shape[-1]:
+                    out.write(y.T)
+                    state["written"] += y.shape[-1]
+                    state["peak"] = max(state["peak"], float(np.max(np.abs(y))))
+
+            for block in sf.blocks(input_path, blocksize=blocksize, dtype='float64', always_2d=True):
+                x = block.mean(axis=1) if channels == 1 else np.ascontiguousarray(block.T)
+                x = resampler.process(x)
+                total_in += len(block)
+                n_blocks += 1
+                emit(_run(stages, x), resampler.output_length(total_in))
+                if progress is not None:
+                    progress(0.9 * total_in / max(info.frames, 1))
+
+            # Drain the resampler, then flush latency, buffered samples and stage tails with silence
+            limit = resampler.output_length(total_in) + tail
+            rest = resampler.process(np.zeros(lead + (0,)), last=True)
+            if rest.shape[-1]:
+                emit(_run(stages, rest), limit)
+            if flush:
+                emit(_run(stages, np.zeros(lead + (flush,))), limit)
+
+        if normalize:
+            scale = target_peak / state["peak"] if state["peak"] > 0 else 1.0
+            with sf.SoundFile(output_path, 'w', samplerate=sr, channels=channels, subtype=WAV_SUBTYPE) as out:
+                for data in sf.blocks(first_pass, blocksize=blocksize, dtype='float32', always_2d=True):
+                    out.write(data * scale)
+    except BaseException:
+        # Decode/stage error or cancellation: leave no partial output behind
+        _discard(output_path)
+        raise
+    finally:
+        if first_pass != output_path:
+            _discard(first_pass)
+
+    return {
+        "sample_rate": sr,
+        "native_sample_rate": native_sr,
+        "channels": channels,
+        "frames": total_in,
+        "blocks": n_blocks,
+        "latency_samples": latency,
+        "tail_samples": tail,
+        "peak": state["peak"],
+    }
@@ -0,0 +1,97 @@
+# vad.py - Energy-Based Voice Activity Detection and Silence Splitting
+#
+# Frame energies are computed block by block straight from the file (constant
+# memory), then speech regions are found with vectorized run-length logic:
+# frames above an adaptive threshold are speech, short pauses are bridged,
+# short blips dropped, and regions longer than max_seconds are cut at their
+# quietest frame so every segment fits one recognizer request.
+import numpy as np
+import soundfile as sf
+
+# Frame length for energies, and the blocks (in frames) read from disk at a time
+FRAME_SECONDS = 0.03
+READ_FRAMES = 2048
+
+# Floor for silent frames (digital zero)
+SILENCE_DB = -100.0
+
+
+def frame_energy_db(y: np.ndarray, hop: int) -> np.ndarray:
+    """Mean-square energy in dB of consecutive hop-sample frames of mono y (tail dropped)."""
+    n = len(y) // hop
+    frames = y[:n * hop].reshape(n, hop)
+    power = np.einsum("ij,ij->i", frames, frames) / hop
+    return 10 * np.log10(np.maximum(power, 10 ** (SILENCE_DB / 10)))
+
+
+def file_frame_energy_db(path: str, frame_seconds: float = FRAME_SECONDS):
+    """Frame energies (dB) of a file read in blocks, mixed to mono. Returns (db, hop, sample rate, frames)."""
+    info = sf.info(path)
+    hop = max(1, int(round(frame_seconds * info.samplerate)))
+    energies = []
+    for block in sf.blocks(path, blocksize=hop * READ_FRAMES, dtype="float32", always_2d=True):
+        energies.append(frame_energy_db(block.mean(axis=1), hop))  # blocks are whole frames but the last
+    db = np.concatenate(energies) if energies else np.zeros(0)
+    return db, hop, info.samplerate, info.frames
+
+
+def _runs(mask: np.ndarray):
+    """(starts, ends) of the True runs of a boolean array (ends exclusive)."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def detect_speech(db: np.ndarray, min_silence: int, min_speech: int, margin_db: float = 12.0):
+    """
+    Speech regions as (starts, ends) frame indices. The threshold sits
+    margin_db above the noise floor (10th percentile), capped 20 dB below the
+    peak so recordings without pauses still register as speech.
+    """
+    if len(db) == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    threshold = max(min(np.percentile(db, 10) + margin_db, db.max() - 20.0), SILENCE_DB + 30.0)
+    starts, ends = _runs(db > threshold)
+    if len(starts) > 1:
+        # Bridge pauses shorter than min_silence
+        keep = starts[1:] - ends[:-1] >= min_silence
+        starts = starts[np.concatenate(([True], keep))]
+        ends = ends[np.concatenate((keep, [True]))]
+    long_enough = ends - starts >= min_speech
+    return starts[long_enough], ends[long_enough]
+
+
+def split_long(starts, ends, db: np.ndarray, max_len: int):
+    """Cut regions longer than max_len frames at the quietest frame of their second half-window."""
+    out = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        while end - start > max_len:
+            lo = start + max_len // 2
+            cut = lo + int(np.argmin(db[lo:start + max_len]))
+            out.append((start, cut))
+            start = cut
+        out.append((start, end))
+    return out
+
+
+def speech_segments(db: np.ndarray, hop: int, sample_rate: int, total_samples: int = None,
+                    min_silence: float = 0.3, min_speech: float = 0.2, max_seconds: float = 30.0,
+                    pad: float = 0.1) -> list[tuple[int, int]]:
+    """Speech segments as (start, end) sample offsets, padded and non-overlapping."""
+    frame = hop / sample_rate
+    starts, ends = detect_speech(db, max(1, int(min_silence / frame)), max(1, int(min_speech / frame)))
+    regions = split_long(starts, ends, db, max(2, int(max_seconds / frame)))
+    if not regions:
+        return []
+    bounds = np.array(regions, dtype=np.int64) * hop
+    pad_samples = int(pad * sample_rate)
+    total = total_samples if total_samples is not None else len(db) * hop
+    bounds[:, 0] = np.maximum(bounds[:, 0] - pad_samples, 0)
+    bounds[:, 1] = np.minimum(bounds[:, 1] + pad_samples, total)
+    bounds[1:, 0] = np.maximum(bounds[1:, 0], bounds[:-1, 1])  # padding never overlaps a neighbour
+    return [(int(s), int(e)) for s, e in bounds]
+
+
+def file_speech_segments(path: str, **kwargs) -> tuple[list[tuple[int, int]], int]:
+    """Speech segments (sample offsets) of an audio file, plus its sample rate."""
+    db, hop, sample_rate, total = file_frame_energy_db(path)
+    return speech_segments(db, hop, sample_rate, total, **kwargs), sample_rate
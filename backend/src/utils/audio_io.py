@@ -1,58 +1,215 @@
 # audio_io.py - Audio Input/Output Utilities
-import os
-import uuid
+#
+# Uploads are identified by their leading bytes, not their extension. Formats
+# libsndfile reads (WAV, FLAC, OGG, AIFF and, with libsndfile >= 1.1, MP3) are
+# decoded in-process straight to float32. Everything else (webm, m4a, ...) is
+# decoded by an ffmpeg subprocess whose output is read from a pipe, never via a
+# temp file. Each decode reports its format, backend and duration. A duration
+# limit is enforced before the samples are held in memory: from the header for
+# in-process formats, by capping ffmpeg's output (-t) for the rest.
+import struct
+import subprocess
 import tempfile
-from pydub import AudioSegment
+import time
 
+import numpy as np
+import soundfile as sf
 
-def convert_to_wav(input_path: str) -> str:
+from config.settings import FFMPEG_BINARY, SCRATCH_DIR
+from src.utils.uploads import UploadTooLargeError, check_duration
+
+# Containers decoded in-process by soundfile
+NATIVE_FORMATS = {"wav", "flac", "ogg", "aiff"} | ({"mp3"} if "MP3" in sf.available_formats() else set())
+
+# Formats speech_recognition's AudioFile accepts as-is
+STT_FORMATS = {"wav", "flac", "aiff"}
+
+# Bytes read when sniffing the container
+SNIFF_BYTES = 16
+
+# Seconds ffmpeg may decode past a duration limit, so audio that hits the cap is
+# known to be over the limit rather than exactly at it
+FFMPEG_LIMIT_MARGIN = 1.0
+
+
+class AudioDecodeError(ValueError):
+    """Raised when an audio file cannot be decoded by soundfile or ffmpeg."""
+
+
+def sniff_format(path: str) -> str:
+    """Container format from the file's magic bytes ("unknown" if not recognized)."""
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+
+    if head[:4] in (b"RIFF", b"RF64") and head[8:12] == b"WAVE":
+        return "wav"
+    if head[:4] == b"fLaC":
+        return "flac"
+    if head[:4] == b"OggS":
+        return "ogg"
+    if head[:4] == b"FORM" and head[8:12] in (b"AIFF", b"AIFC"):
+        return "aiff"
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"  # Matroska/WebM (EBML header)
+    if head[4:8] == b"ftyp":
+        return "m4a"  # MP4/M4A/3GP
+    if head[:4] == b"PK\x03\x04":
+        return "zip"  # not audio: a /batch archive
+    if head[:3] == b"ID3":
+        return "mp3"
+    if len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0:
+        # MPEG frame sync: layer bits 00 mean ADTS AAC, anything else MPEG audio
+        return "aac" if head[1] & 0x06 == 0 else "mp3"
+    return "unknown"
+
+
+def _parse_wav_stream(data: bytes):
+    """
+    Split ffmpeg's piped WAV output into (float32 frames x channels, sr).
+    Chunk sizes may be placeholders on a pipe, so the data chunk runs to EOF.
+    """
+    if data[:4] not in (b"RIFF", b"RF64") or data[8:12] != b"WAVE":
+        raise AudioDecodeError("ffmpeg did not produce WAV output")
+    pos, channels, sr = 12, None, None
+    while pos + 8 <= len(data):
+        chunk_id, size = data[pos:pos + 4], struct.unpack_from("<I", data, pos + 4)[0]
+        pos += 8
+        if chunk_id == b"fmt ":
+            channels, sr = struct.unpack_from("<HI", data, pos + 2)
+        elif chunk_id == b"data":
+            if channels is None:
+                break
+            body = data[pos:]
+            frames = len(body) // (4 * channels)
+            return np.frombuffer(body, dtype="<f4", count=frames * channels).reshape(-1, channels), sr
+        pos += size + (size & 1)
+    raise AudioDecodeError("ffmpeg output has no audio data")
+
+
+def _decode_ffmpeg(path: str, max_seconds: float = None):
+    """
+    Decode with an ffmpeg subprocess, reading float32 WAV from its stdout.
+    With max_seconds, ffmpeg stops just past the limit (bounding the memory
+    used) and longer audio raises UploadTooLargeError.
+    """
+    limit = [] if max_seconds is None else ["-t", f"{max_seconds + FFMPEG_LIMIT_MARGIN:g}"]
+    cmd = [
+        FFMPEG_BINARY, "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-i", path, "-vn", "-map_metadata", "-1", *limit, "-acodec", "pcm_f32le", "-f", "wav", "pipe:1",
+    ]
+    try:
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    except FileNotFoundError:
+        raise AudioDecodeError(f"ffmpeg not found ({FFMPEG_BINARY}); cannot decode this format")
+    if proc.returncode != 0:
+        raise AudioDecodeError(f"ffmpeg failed: {proc.stderr.decode(errors='replace').strip()[-300:]}")
+    y, sr = _parse_wav_stream(proc.stdout)
+    if max_seconds is not None:
+        check_duration(len(y) / sr, max_seconds)
+    return y, sr
+
+
+def decode_audio(path: str, fmt: str = None, max_seconds: float = None):
     """
-    Convert any audio file to WAV format for processing.
-    Supports: webm, mp3, ogg, m4a, flac, etc.
+    Decode an audio file to float32 samples shaped (frames, channels).
+    Returns (samples, sr, info) with info = {"format", "backend", "seconds"}.
+    With max_seconds, longer audio raises UploadTooLargeError before it is decoded.
+    """
+    fmt = fmt or sniff_format(path)
+    start = time.perf_counter()
+    y = None
+    if fmt in NATIVE_FORMATS:
+        try:
+            if max_seconds is not None:
+                check_duration(sf.info(path).duration, max_seconds)
+            y, sr = sf.read(path, dtype='float32', always_2d=True)
+            backend = "soundfile"
+        except RuntimeError as e:
+            print(f"soundfile could not decode {fmt} ({e}); trying ffmpeg")
+    if y is None:
+        y, sr = _decode_ffmpeg(path, max_seconds)
+        backend = "ffmpeg"
+    info = {"format": fmt, "backend": backend, "seconds": time.perf_counter() - start}
+    return y, sr, info
+
+
+def probe_audio(path: str, fmt: str = None) -> bool:
+    """True if soundfile can open the file in-process (no full decode)."""
+    if (fmt or sniff_format(path)) not in NATIVE_FORMATS:
+        return False
+    try:
+        sf.info(path)
+        return True
+    except RuntimeError:
+        return False
+
+
+def audio_duration(path: str) -> float:
+    """Duration in seconds from the file header (0.0 if soundfile cannot open it)."""
+    try:
+        return sf.info(path).duration
+    except RuntimeError:
+        return 0.0
+
+
+def convert_to_wav(input_path: str, output_path: str = None, max_seconds: float = None):
+    """
+    Decode any supported audio file and write it as 16-bit WAV, to output_path
+    or a new temp file. Returns (wav path, decode info). With max_seconds,
+    longer audio raises UploadTooLargeError before it is decoded.
     """
     try:
-        # Detect format from extension
-        ext = os.path.splitext(input_path)[1].lower().replace('.', '')
-        
-        # Handle webm specifically (browser recording format)
-        if ext == 'webm':
-            audio = AudioSegment.from_file(input_path, format='webm')
-        elif ext == 'mp3':
-            audio = AudioSegment.from_mp3(input_path)
-        elif ext == 'ogg':
-            audio = AudioSegment.from_ogg(input_path)
-        elif ext == 'm4a':
-            audio = AudioSegment.from_file(input_path, format='m4a')
-        elif ext == 'wav':
-            # Already WAV, but might need resampling
-            audio = AudioSegment.from_wav(input_path)
-        else:
-            # Try generic loading
-            audio = AudioSegment.from_file(input_path)
-        
-        # Export as WAV
-        output_path = tempfile.mktemp(suffix='.wav')
-        audio.export(output_path, format='wav')
-        
-        return output_path
+        y, sr, info = decode_audio(input_path, max_seconds=max_seconds)
+    except (AudioDecodeError, UploadTooLargeError):
+        raise
     except Exception as e:
-        raise ValueError(f"Cannot convert audio file: {str(e)}")
+        raise AudioDecodeError(f"Cannot decode audio file: {str(e)}")
+
+    if output_path is None:
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav', dir=SCRATCH_DIR) as temp_file:
+            output_path = temp_file.name
+    sf.write(output_path, y, sr, subtype='PCM_16')
+    return output_path, info
 
 
 def ensure_wav_format(input_path: str) -> str:
     """
-    Ensure input is in WAV format. Convert if necessary.
-    Returns path to WAV file.
+    Path of a file speech_recognition can read: input_path itself for
+    WAV/FLAC/AIFF, otherwise a converted temp WAV.
     """
-    ext = os.path.splitext(input_path)[1].lower()
-    
-    if ext == '.wav':
-        # Check if it's a valid WAV
-        try:
-            audio = AudioSegment.from_wav(input_path)
-            return input_path
-        except:
-            pass
-    
-    # Convert to WAV
-    return convert_to_wav(input_path)
+    fmt = sniff_format(input_path)
+    if fmt in STT_FORMATS and probe_audio(input_path, fmt):
+        return input_path
+    return convert_to_wav(input_path)[0]
+
+
+# ============== DECODE STATISTICS ==============
+
+_decode_stats = {}
+
+
+def record_decode(info: dict):
+    """Add one decode (an info dict from decode_audio) to the per-format totals."""
+    if not info:
+        return
+    entry = _decode_stats.setdefault(info["format"], {}).setdefault(
+        info["backend"], {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+    )
+    entry["count"] += 1
+    entry["total_seconds"] += info["seconds"]
+    entry["max_seconds"] = max(entry["max_seconds"], info["seconds"])
+
+
+def decode_stats() -> dict:
+    """Per-format, per-backend decode counts and timings in milliseconds."""
+    return {
+        fmt: {
+            backend: {
+                "count": e["count"],
+                "mean_ms": round(1000 * e["total_seconds"] / e["count"], 2),
+                "max_ms": round(1000 * e["max_seconds"], 2),
+            }
+            for backend, e in backends.items()
+        }
+        for fmt, backends in _decode_stats.items()
+    }
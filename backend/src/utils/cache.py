@@ -0,0 +1,201 @@
+# cache.py - Content-Addressed Disk Cache with Single-Flight Coalescing
+#
+# Each entry is a small JSON value (e.g. a response payload) plus the files it
+# owns, stored as <directory>/<key>.json. Entries are evicted least recently
+# used first once their files exceed max_bytes. Concurrent get_or_create calls
+# for the same key share one computation (lookup included). The cache lives in
+# the API process; workers only produce the files. get/put read and write files,
+# so get_or_create runs them on the I/O thread pool; bookkeeping is locked.
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from src.utils.workers import WorkerBusyError, run_io
+
+# Read size when hashing files
+HASH_CHUNK = 1 << 20
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(*parts) -> str:
+    """Stable key from JSON-serializable parts (dicts are key-sorted)."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class DiskCache:
+    """LRU-by-size cache of JSON values and the files they reference."""
+
+    def __init__(self, directory: str, max_bytes: int, name: str = "cache"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.name = name
+        self.entries = OrderedDict()  # key -> total size of owned files, least recent first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self._in_flight = {}
+        self._lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _load(self):
+        """Rebuild the LRU order from entry mtimes (survives restarts)."""
+        metas = []
+        for filename in os.listdir(self.directory):
+            if filename.endswith(".json"):
+                path = os.path.join(self.directory, filename)
+                try:
+                    with open(path) as f:
+                        size = json.load(f)["size"]
+                    metas.append((os.path.getmtime(path), filename[:-5], size))
+                except (OSError, ValueError, KeyError):
+                    continue
+        for _, key, size in sorted(metas):
+            self.entries[key] = size
+            self.total_bytes += size
+
+    def get(self, key: str):
+        """Cached value, or None if missing or any of its files is gone."""
+        with self._lock:
+            if key not in self.entries:
+                return None
+            try:
+                with open(self._meta_path(key)) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                self._drop(key)
+                return None
+            if not all(os.path.exists(p) for p in meta["files"]):
+                self._drop(key)
+                return None
+            self.entries.move_to_end(key)
+            os.utime(self._meta_path(key))
+            return meta["value"]
+
+    def put(self, key: str, value, files: list[str]):
+        """Store value and take ownership of files (deleted on eviction)."""
+        size = sum(os.path.getsize(p) for p in files if os.path.exists(p))
+        meta_path = self._meta_path(key)
+        tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"value": value, "files": files, "size": size}, f)
+        with self._lock:
+            os.replace(tmp_path, meta_path)
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)
+            self.entries[key] = size
+            self.total_bytes += size
+            self._evict()
+
+    def record(self, hit: bool):
+        """Count a lookup served outside get_or_create (e.g. a streamed response)."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _drop(self, key: str, delete_files: bool = True):
+        size = self.entries.pop(key, 0)
+        self.total_bytes -= size
+        meta_path = self._meta_path(key)
+        if delete_files:
+            try:
+                with open(meta_path) as f:
+                    files = json.load(f)["files"]
+            except (OSError, ValueError, KeyError):
+                files = []
+            for path in files:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        try:
+            os.remove(meta_path)
+        except OSError:
+            pass
+
+    def _evict(self):
+        # Keep at least the newest entry, even if it alone exceeds max_bytes
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            key = next(iter(self.entries))
+            self._drop(key)
+            self.evictions += 1
+
+    async def lookup(self, key: str):
+        """Cached value read on the I/O pool (a hit is counted), or None; never computes."""
+        if key not in self.entries:
+            return None
+        value = await run_io(self.get, key)
+        if value is not None:
+            self.record(hit=True)
+        return value
+
+    async def get_or_create(self, key: str, create):
+        """
+        Return (value, hit). On a miss, `await create()` must return (value, files).
+        Concurrent callers with the same key wait for the first one's result.
+        """
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await run_io(self.get, key) if key in self.entries else None
+            if value is not None:
+                self.record(hit=True)
+                future.set_result(value)
+                return value, True
+
+            self.record(hit=False)
+            value, files = await create()
+            try:
+                await run_io(self.put, key, value, files)
+            except WorkerBusyError as e:
+                print(f"{self.name}: result not cached: {e}")
+            future.set_result(value)
+            return value, False
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # waiters re-raise it; don't warn when there are none
+            raise
+        finally:
+            del self._in_flight[key]
+
+    def stats(self) -> dict:
+        """Counters for the health endpoint."""
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            entries = len(self.entries)
+        return {
+            "entries": entries,
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+        }
@@ -1,13 +1,105 @@
 # elevenlabs.py - ElevenLabs TTS Integration
+#
+# All calls share one keep-alive session per process (no TCP/TLS handshake per
+# request), with connect/read timeouts. Idempotent calls are retried on
+# connection errors, 429 and 5xx; billable POSTs (synthesis) only when the
+# request provably never ran: a failed connect or a 429 rejection. Synthesized audio is read in chunks, either
+# into a file or forwarded as it arrives (open_tts_stream). The voice list is
+# cached for ELEVENLABS_VOICES_TTL seconds.
 import os
 import tempfile
+import threading
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
 from dotenv import load_dotenv
 
+from config.settings import (
+    SCRATCH_DIR,
+    IO_THREADS,
+    ELEVENLABS_BASE_URL,
+    ELEVENLABS_CONNECT_TIMEOUT,
+    ELEVENLABS_READ_TIMEOUT,
+    ELEVENLABS_RETRIES,
+    ELEVENLABS_VOICES_TTL,
+    ELEVENLABS_STREAM_CHUNK,
+)
+
 load_dotenv()
 
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
-BASE_URL = "https://api.elevenlabs.io/v1"
+BASE_URL = ELEVENLABS_BASE_URL
+DEFAULT_MODEL_ID = "eleven_multilingual_v2"
+DEFAULT_VOICE_SETTINGS = {"stability": 0.5, "similarity_boost": 0.75}
+
+# Upstream statuses worth retrying, and the first backoff delay (doubled per attempt)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Methods safe to repeat; others are retried only when the server never processed them
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+UNPROCESSED_STATUSES = {429}
+RETRY_BACKOFF = 0.5
+MAX_RETRY_AFTER = 10.0  # seconds; longer Retry-After values are not waited for
+
+
+class ElevenLabsError(RuntimeError):
+    """Raised when ElevenLabs rejects or fails a request."""
+
+
+_session = (None, None)  # (pid, session)
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """This process's pooled keep-alive session (sized for the I/O thread pool)."""
+    global _session
+    with _session_lock:
+        if _session[0] != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=IO_THREADS)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = (os.getpid(), session)
+        return _session[1]
+
+
+def _never_sent(error: Exception) -> bool:
+    """True if a request failed while connecting, so the server cannot have received it."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def request(method: str, path: str, retry: bool = None, **kwargs) -> requests.Response:
+    """
+    Send a request to the ElevenLabs API on the pooled session. Failures are
+    retried ELEVENLABS_RETRIES times with exponential backoff; the last response
+    or error is returned/raised. retry=None (default): idempotent methods retry
+    connection errors, timeouts and RETRY_STATUSES, other methods only failed
+    connects and UNPROCESSED_STATUSES. retry=True always retries, retry=False never.
+    """
+    kwargs.setdefault("timeout", (ELEVENLABS_CONNECT_TIMEOUT, ELEVENLABS_READ_TIMEOUT))
+    safe = retry if retry is not None else method.upper() in IDEMPOTENT_METHODS
+    attempts = 1 + (ELEVENLABS_RETRIES if retry is not False else 0)
+    for attempt in range(attempts):
+        delay = RETRY_BACKOFF * 2 ** attempt
+        try:
+            response = get_session().request(method, f"{BASE_URL}{path}", **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == attempts - 1 or not (safe or _never_sent(e)):
+                raise
+        else:
+            statuses = RETRY_STATUSES if safe else UNPROCESSED_STATUSES
+            if response.status_code not in statuses or attempt == attempts - 1:
+                return response
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                delay = min(float(retry_after), MAX_RETRY_AFTER)
+            response.content  # drain the (small) error body so the connection is reused
+            response.close()
+        time.sleep(delay)
 
 
 def get_headers():
@@ -18,67 +110,101 @@ def get_headers():
     }
 
 
+def _tts_request(text: str, voice_id: str, model_id: str, voice_settings: dict, path_suffix: str = ""):
+    return request(
+        "POST",
+        f"/text-to-speech/{voice_id}{path_suffix}",
+        headers={
+            "Accept": "audio/mpeg",
+            "Content-Type": "application/json",
+            "xi-api-key": ELEVENLABS_API_KEY
+        },
+        json={
+            "text": text,
+            "model_id": model_id,
+            "voice_settings": voice_settings or DEFAULT_VOICE_SETTINGS
+        },
+        stream=True,
+    )
+
+
+# ============== VOICES ==============
+
+_voices = {"list": None, "expires": 0.0}
+_voices_lock = threading.Lock()
+
+
+def invalidate_voices():
+    """Forget the cached voice list (after a voice was added or deleted)."""
+    with _voices_lock:
+        _voices.update(list=None, expires=0.0)
+
+
 def list_voices() -> list:
-    """Get all available voices from ElevenLabs."""
-    try:
-        response = requests.get(
-            f"{BASE_URL}/voices",
-            headers=get_headers()
-        )
-        if response.status_code == 200:
-            data = response.json()
-            voices = []
-            for voice in data.get("voices", []):
-                voices.append({
-                    "voice_id": voice["voice_id"],
-                    "name": voice["name"],
-                    "category": voice.get("category", "unknown")
-                })
-            return voices
-        else:
+    """Get all available voices from ElevenLabs (cached for ELEVENLABS_VOICES_TTL seconds)."""
+    # The lock also makes concurrent callers share one refresh
+    with _voices_lock:
+        if _voices["list"] is not None and time.monotonic() < _voices["expires"]:
+            return list(_voices["list"])
+        try:
+            response = request("GET", "/voices", headers=get_headers())
+            if response.status_code == 200:
+                data = response.json()
+                voices = []
+                for voice in data.get("voices", []):
+                    voices.append({
+                        "voice_id": voice["voice_id"],
+                        "name": voice["name"],
+                        "category": voice.get("category", "unknown")
+                    })
+                _voices.update(list=voices, expires=time.monotonic() + ELEVENLABS_VOICES_TTL)
+                return list(voices)
+            else:
+                return []
+        except Exception as e:
+            print(f"Error listing voices: {e}")
             return []
-    except Exception as e:
-        print(f"Error listing voices: {e}")
-        return []
 
 
-def text_to_speech_eleven(text: str, voice_id: str = "21m00Tcm4TlvDq8ikWAM") -> str:
+# ============== SYNTHESIS ==============
+
+def text_to_speech_eleven(text: str, voice_id: str = "21m00Tcm4TlvDq8ikWAM",
+                          model_id: str = DEFAULT_MODEL_ID, voice_settings: dict = None) -> str:
     """
     Convert text to speech using ElevenLabs API.
     Default voice: Rachel (21m00Tcm4TlvDq8ikWAM)
     Returns path to audio file.
     """
     try:
-        response = requests.post(
-            f"{BASE_URL}/text-to-speech/{voice_id}",
-            headers={
-                "Accept": "audio/mpeg",
-                "Content-Type": "application/json",
-                "xi-api-key": ELEVENLABS_API_KEY
-            },
-            json={
-                "text": text,
-                "model_id": "eleven_multilingual_v2",
-                "voice_settings": {
-                    "stability": 0.5,
-                    "similarity_boost": 0.75
-                }
-            }
-        )
-        
-        if response.status_code == 200:
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
-                temp_file.write(response.content)
-                return temp_file.name
-        else:
-            print(f"ElevenLabs error: {response.status_code} - {response.text}")
-            return None
-            
+        with _tts_request(text, voice_id, model_id, voice_settings) as response:
+            if response.status_code == 200:
+                with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3', dir=SCRATCH_DIR) as temp_file:
+                    for chunk in response.iter_content(ELEVENLABS_STREAM_CHUNK):
+                        temp_file.write(chunk)
+                    return temp_file.name
+            else:
+                print(f"ElevenLabs error: {response.status_code} - {response.text}")
+                return None
+
     except Exception as e:
         print(f"Error in ElevenLabs TTS: {e}")
         return None
 
 
+def open_tts_stream(text: str, voice_id: str = "21m00Tcm4TlvDq8ikWAM",
+                    model_id: str = DEFAULT_MODEL_ID, voice_settings: dict = None):
+    """
+    Start a streaming synthesis. Returns (response, chunk iterator) once
+    ElevenLabs has answered 200; the caller must close the response.
+    """
+    response = _tts_request(text, voice_id, model_id, voice_settings, "/stream")
+    if response.status_code != 200:
+        message = f"ElevenLabs error: {response.status_code} - {response.text}"
+        response.close()
+        raise ElevenLabsError(message)
+    return response, response.iter_content(ELEVENLABS_STREAM_CHUNK)
+
+
 def clone_voice(name: str, audio_path: str, description: str = "") -> dict:
     """
     Clone a voice from an audio sample.
@@ -87,8 +213,11 @@ def clone_voice(name: str, audio_path: str, description: str = "") -> dict:
     """
     try:
         with open(audio_path, 'rb') as audio_file:
-            response = requests.post(
-                f"{BASE_URL}/voices/add",
+            # Not retried: a repeated upload could create the voice twice
+            response = request(
+                "POST",
+                "/voices/add",
+                retry=False,
                 headers={"xi-api-key": ELEVENLABS_API_KEY},
                 data={
                     "name": name,
@@ -98,8 +227,9 @@ def clone_voice(name: str, audio_path: str, description: str = "") -> dict:
                     "files": (os.path.basename(audio_path), audio_file, "audio/mpeg")
                 }
             )
-        
+
         if response.status_code == 200:
+            invalidate_voices()
             data = response.json()
             return {
                 "success": True,
@@ -111,7 +241,7 @@ def clone_voice(name: str, audio_path: str, description: str = "") -> dict:
                 "success": False,
                 "error": response.text
             }
-            
+
     except Exception as e:
         return {
             "success": False,
@@ -122,10 +252,10 @@ def clone_voice(name: str, audio_path: str, description: str = "") -> dict:
 def delete_voice(voice_id: str) -> bool:
     """Delete a cloned voice."""
     try:
-        response = requests.delete(
-            f"{BASE_URL}/voices/{voice_id}",
-            headers=get_headers()
-        )
-        return response.status_code == 200
+        response = request("DELETE", f"/voices/{voice_id}", headers=get_headers())
+        if response.status_code == 200:
+            invalidate_voices()
+            return True
+        return False
     except Exception:
         return False
@@ -0,0 +1,301 @@
+# jobs.py - Persistent Priority Job Queue for Long-Running Requests
+#
+# Requests submitted with async=true are stored as jobs in SQLite and answered
+# with a job ID right away. A dispatcher on the API event loop claims queued
+# jobs in (priority, submission) order and runs them through the normal worker
+# pools; bulk jobs never take the last JOB_WORKERS slot, so interactive jobs
+# always overtake them. Workers report progress straight into the database.
+# Jobs left "running" by a restart are queued again, as are jobs that found the
+# worker pools full. SQLite calls from the event loop go through the queue's own
+# database thread (JobQueue.call), which has no queue-depth limit, so a saturated
+# I/O pool can neither stop the dispatcher nor strand a job.
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from config.settings import (
+    JOB_DB_PATH,
+    JOB_WORKERS,
+    JOB_MAX_ATTEMPTS,
+    JOB_RETENTION_HOURS,
+)
+from src.utils.workers import WorkerBusyError
+
+# Priority classes, lowest value runs first
+PRIORITIES = {"interactive": 0, "bulk": 1}
+
+# Seconds between queue polls when idle (submissions wake the dispatcher immediately)
+POLL_INTERVAL = 1.0
+
+# Minimum seconds between progress writes from one worker
+PROGRESS_INTERVAL = 0.5
+
+# Seconds a job that found the worker pools full waits before it is queued again
+BUSY_RETRY_DELAY = 5.0
+
+
+class JobQueue:
+    """SQLite-backed queue of jobs: kind, JSON args, priority, state, progress, result."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self.wakeup = None  # asyncio.Event of the dispatcher's loop
+        self._loop = None
+        self._executor = None  # database thread for calls from the event loop
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per process (workers write progress through their own)
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, args TEXT NOT NULL, priority INTEGER NOT NULL, "
+                "state TEXT NOT NULL, progress REAL NOT NULL DEFAULT 0, result TEXT, error TEXT, "
+                "attempts INTEGER NOT NULL DEFAULT 0, created REAL NOT NULL, started REAL, finished REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (state, priority, created)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def _query(self, sql: str, params=()) -> list:
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    async def call(self, func, *args):
+        """Run a blocking queue method on the queue's database thread (never rejected as busy)."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-db")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(func, *args))
+
+    def submit(self, kind: str, args: dict, priority: str = "interactive") -> str:
+        """Queue a job and return its ID (blocking; use `await JOBS.call(JOBS.submit, ...)` on the loop)."""
+        job_id = uuid.uuid4().hex
+        self._query(
+            "INSERT INTO jobs (id, kind, args, priority, state, created) VALUES (?, ?, ?, ?, 'queued', ?)",
+            (job_id, kind, json.dumps(args), PRIORITIES[priority], time.time()),
+        )
+        self.notify()
+        return job_id
+
+    def notify(self):
+        """Wake the dispatcher (safe from any thread)."""
+        if self.wakeup is not None:
+            self._loop.call_soon_threadsafe(self.wakeup.set)
+
+    def claim(self, max_priority: int = None):
+        """Atomically mark the next queued job running and return its row (None if none)."""
+        rows = self._query(
+            "UPDATE jobs SET state = 'running', started = ?, attempts = attempts + 1 "
+            "WHERE id = (SELECT id FROM jobs WHERE state = 'queued' AND priority <= ? "
+            "ORDER BY priority, created LIMIT 1) RETURNING *",
+            (time.time(), max(PRIORITIES.values()) if max_priority is None else max_priority),
+        )
+        return rows[0] if rows else None
+
+    def finish(self, job_id: str, result: dict = None, error: str = None):
+        """Record a job's outcome (done with result, or failed with error)."""
+        self._query(
+            "UPDATE jobs SET state = ?, result = ?, error = ?, progress = ?, finished = ? WHERE id = ?",
+            ("failed" if error else "done", json.dumps(result) if result is not None else None, error,
+             0.0 if error else 1.0, time.time(), job_id),
+        )
+
+    def requeue(self, job_id: str, error: str) -> bool:
+        """Queue a running job again after a transient failure, or fail it once out of attempts."""
+        rows = self._query(
+            "UPDATE jobs SET state = 'queued', progress = 0, started = NULL "
+            "WHERE id = ? AND state = 'running' AND attempts < ? RETURNING id",
+            (job_id, JOB_MAX_ATTEMPTS),
+        )
+        if not rows:
+            self.finish(job_id, None, error)
+        return bool(rows)
+
+    def set_progress(self, job_id: str, fraction: float):
+        self._query(
+            "UPDATE jobs SET progress = ? WHERE id = ? AND state = 'running'",
+            (min(max(fraction, 0.0), 1.0), job_id),
+        )
+
+    def requeue_interrupted(self) -> int:
+        """After a restart: queue jobs that were running again (failing those out of attempts)."""
+        failed = self._query(
+            "UPDATE jobs SET state = 'failed', error = 'Interrupted too many times', finished = ? "
+            "WHERE state = 'running' AND attempts >= ? RETURNING id",
+            (time.time(), JOB_MAX_ATTEMPTS),
+        )
+        requeued = self._query(
+            "UPDATE jobs SET state = 'queued', progress = 0, started = NULL WHERE state = 'running' RETURNING id"
+        )
+        return len(requeued) + len(failed)
+
+    def purge(self, older_than_hours: float) -> int:
+        """Delete finished jobs older than the retention period."""
+        rows = self._query(
+            "DELETE FROM jobs WHERE state IN ('done', 'failed') AND finished < ? RETURNING id",
+            (time.time() - older_than_hours * 3600,),
+        )
+        return len(rows)
+
+    def get(self, job_id: str):
+        """Job status dict (None if unknown)."""
+        rows = self._query("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        if not rows:
+            return None
+        job = rows[0]
+        priority = {v: k for k, v in PRIORITIES.items()}[job["priority"]]
+        status = {
+            "job_id": job["id"],
+            "kind": job["kind"],
+            "state": job["state"],
+            "priority": priority,
+            "progress": round(job["progress"], 3),
+            "attempts": job["attempts"],
+            "created_at": job["created"],
+            "started_at": job["started"],
+            "finished_at": job["finished"],
+        }
+        if job["state"] == "queued":
+            status["position"] = self._query(
+                "SELECT COUNT(*) FROM jobs WHERE state = 'queued' AND (priority < ? OR (priority = ? AND created < ?))",
+                (job["priority"], job["priority"], job["created"]),
+            )[0][0]
+        if job["started"]:
+            status["queue_ms"] = round(1000 * (job["started"] - job["created"]), 1)
+            status["run_ms"] = round(1000 * ((job["finished"] or time.time()) - job["started"]), 1)
+        if job["result"]:
+            status["result"] = json.loads(job["result"])
+        if job["error"]:
+            status["error"] = job["error"]
+        return status
+
+    def counts(self) -> dict:
+        """Number of jobs per state (for the health endpoint)."""
+        return {state: n for state, n in self._query("SELECT state, COUNT(*) FROM jobs GROUP BY state")}
+
+
+JOBS = JobQueue(JOB_DB_PATH)
+
+
+# ============== PROGRESS (worker side) ==============
+
+_current = threading.local()
+
+
+def run_job_task(job_id: str, func, *args):
+    """Run func(*args) on a worker with report_progress bound to job_id."""
+    _current.job_id = job_id
+    _current.last = 0.0
+    try:
+        return func(*args)
+    finally:
+        _current.job_id = None
+
+
+def report_progress(fraction: float):
+    """Record progress of the job running on this worker (no-op outside a job; throttled)."""
+    job_id = getattr(_current, "job_id", None)
+    if job_id is None:
+        return
+    now = time.monotonic()
+    if now - _current.last < PROGRESS_INTERVAL:
+        return
+    _current.last = now
+    try:
+        JOBS.set_progress(job_id, fraction)
+    except sqlite3.Error as e:
+        print(f"Job progress error ({job_id}): {e}")
+
+
+# ============== DISPATCHER ==============
+
+async def _settle(queue: JobQueue, job, func, *args):
+    """Record a job's outcome; a database error is logged (the job is requeued on restart)."""
+    try:
+        await queue.call(func, job["id"], *args)
+    except sqlite3.Error as e:
+        print(f"Job {job['id']} ({job['kind']}): could not record outcome: {e}")
+
+
+async def _run_job(queue: JobQueue, job, handler):
+    try:
+        result = await handler(job["id"], json.loads(job["args"]))
+        await queue.call(queue.finish, job["id"], result)
+    except asyncio.CancelledError:
+        raise  # shutdown: the job stays "running" and is requeued on restart
+    except WorkerBusyError as e:
+        # Full pools are temporary: run the job again later (counts as an attempt)
+        print(f"Job {job['id']} ({job['kind']}) deferred: {e}")
+        await asyncio.sleep(BUSY_RETRY_DELAY)
+        await _settle(queue, job, queue.requeue, str(e))
+    except Exception as e:
+        print(f"Job {job['id']} ({job['kind']}) failed: {e}")
+        await _settle(queue, job, queue.finish, None, str(e) or type(e).__name__)
+
+
+async def dispatch_jobs(queue: JobQueue, handlers: dict, workers: int = None):
+    """
+    Claim and run queued jobs until cancelled, at most `workers` at a time.
+    handlers maps a job kind to `async handler(job_id, args) -> result dict`.
+    Database errors are logged and retried on the next poll.
+    """
+    workers = workers or JOB_WORKERS
+    queue.wakeup, queue._loop = asyncio.Event(), asyncio.get_running_loop()
+    try:
+        requeued = await queue.call(queue.requeue_interrupted)
+        if requeued:
+            print(f"Job queue: {requeued} interrupted jobs requeued or failed")
+    except sqlite3.Error as e:
+        print(f"Job queue: could not requeue interrupted jobs: {e}")
+
+    running = {}  # task -> priority
+    last_purge = 0.0
+    try:
+        while True:
+            while len(running) < workers:
+                # Bulk jobs never take the last free slot
+                bulk_busy = sum(1 for p in running.values() if p > 0)
+                max_priority = 0 if bulk_busy >= workers - 1 else None
+                try:
+                    job = await queue.call(queue.claim, max_priority)
+                except sqlite3.Error as e:
+                    print(f"Job queue claim error: {e}")
+                    break
+                if job is None:
+                    break
+                handler = handlers.get(job["kind"])
+                if handler is None:
+                    await _settle(queue, job, queue.finish, None, f"Unknown job kind: {job['kind']}")
+                    continue
+                task = asyncio.create_task(_run_job(queue, job, handler))
+                running[task] = job["priority"]
+                task.add_done_callback(lambda t: (running.pop(t, None), queue.wakeup.set()))
+
+            if time.time() - last_purge > 3600:
+                try:
+                    await queue.call(queue.purge, JOB_RETENTION_HOURS)
+                    last_purge = time.time()
+                except sqlite3.Error as e:
+                    print(f"Job queue purge error: {e}")
+
+            queue.wakeup.clear()
+            try:
+                await asyncio.wait_for(queue.wakeup.wait(), POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        for task in running:
+            task.cancel()
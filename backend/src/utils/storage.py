@@ -0,0 +1,255 @@
+# storage.py - Artifact Index, Storage Janitor and Request-Scoped Temp Files
+#
+# Every file a request leaves behind (results, archived uploads, peaks and
+# waveform images) is recorded in a small SQLite index with its category, size
+# and creation time. The janitor then expires and evicts by querying the index
+# instead of listing directories. Per-request intermediates live in SCRATCH_DIR
+# and are removed by TempScope when the request ends; the scratch directory is
+# swept by TTL for anything a crashed or timed-out worker left behind.
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from config.settings import (
+    SCRATCH_DIR,
+    STORAGE_INDEX_PATH,
+    STORAGE_JANITOR_INTERVAL,
+    STORAGE_TTL_HOURS,
+    STORAGE_QUOTA_MB,
+)
+from src.utils.workers import run_io
+
+# Rows deleted per query when enforcing a quota
+SWEEP_BATCH = 500
+
+
+def _remove(path: str) -> int:
+    """Delete a file, returning the bytes freed (0 if it was already gone)."""
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+        return size
+    except OSError:
+        return 0
+
+
+class ArtifactIndex:
+    """SQLite index of produced files: path, category, size and creation time."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per process (worker processes each open their own)
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS artifacts ("
+                "path TEXT PRIMARY KEY, category TEXT NOT NULL, size INTEGER NOT NULL, created REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS artifacts_by_age ON artifacts (category, created)")
+            conn.execute("CREATE TABLE IF NOT EXISTS adopted (directory TEXT PRIMARY KEY)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def _query(self, sql: str, params=()) -> list:
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    def add(self, path: str, category: str, created: float = None):
+        """Record (or refresh) a file; missing files are ignored."""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        self._query(
+            "INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?)",
+            (os.path.abspath(path), category, size, created or time.time()),
+        )
+
+    def discard(self, paths):
+        """Forget paths (the files themselves are not touched)."""
+        with self._lock:
+            self._connect().executemany(
+                "DELETE FROM artifacts WHERE path = ?", [(os.path.abspath(p),) for p in paths]
+            )
+
+    def usage(self) -> dict:
+        """{category: {"files", "bytes"}} of indexed artifacts."""
+        rows = self._query("SELECT category, COUNT(*), COALESCE(SUM(size), 0) FROM artifacts GROUP BY category")
+        return {category: {"files": n, "bytes": size} for category, n, size in rows}
+
+    def adopt(self, category: str, directory: str):
+        """
+        Index files already in directory (e.g. from before the index existed),
+        dated by mtime. Scans each directory only once, ever.
+        """
+        directory = os.path.abspath(directory)
+        if not os.path.isdir(directory) or self._query("SELECT 1 FROM adopted WHERE directory = ?", (directory,)):
+            return
+        rows = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    stat = entry.stat()
+                    rows.append((entry.path, category, stat.st_size, stat.st_mtime))
+        with self._lock:
+            conn = self._connect()
+            conn.executemany("INSERT OR IGNORE INTO artifacts VALUES (?, ?, ?, ?)", rows)
+            conn.execute("INSERT INTO adopted VALUES (?)", (directory,))
+        if rows:
+            print(f"Storage index adopted {len(rows)} files from {directory}")
+
+    def _delete(self, rows) -> int:
+        freed = sum(_remove(path) for path, _ in rows)
+        self.discard([path for path, _ in rows])
+        return freed
+
+    def sweep(self, ttl_hours: dict, quota_mb: dict, now: float = None) -> dict:
+        """
+        Delete artifacts older than their category's TTL, then the oldest ones
+        until each category fits its quota. Returns per-category counts.
+        """
+        now = now or time.time()
+        report = {}
+        for category, ttl in ttl_hours.items():
+            expired = self._query(
+                "SELECT path, size FROM artifacts WHERE category = ? AND created < ?",
+                (category, now - ttl * 3600),
+            )
+            freed = self._delete(expired)
+
+            evicted = 0
+            quota = quota_mb.get(category, 0) * 1024 * 1024
+            total = self._query("SELECT COALESCE(SUM(size), 0) FROM artifacts WHERE category = ?", (category,))[0][0]
+            while quota and total > quota:
+                batch = self._query(
+                    "SELECT path, size FROM artifacts WHERE category = ? ORDER BY created LIMIT ?",
+                    (category, SWEEP_BATCH),
+                )
+                if not batch:
+                    break
+                victims = []
+                for path, size in batch:
+                    if total <= quota:
+                        break
+                    victims.append((path, size))
+                    total -= size
+                freed += self._delete(victims)
+                evicted += len(victims)
+
+            if expired or evicted:
+                report[category] = {"expired": len(expired), "evicted": evicted, "bytes_freed": freed}
+        return report
+
+
+ARTIFACTS = ArtifactIndex(STORAGE_INDEX_PATH)
+
+
+def register_artifact(path: str, category: str):
+    """Index a produced file for the janitor (best effort: never fails the request)."""
+    try:
+        ARTIFACTS.add(path, category)
+    except sqlite3.Error as e:
+        print(f"Storage index error ({path}): {e}")
+
+
+def sweep_scratch(ttl_hours: float, directory: str = None, now: float = None) -> int:
+    """Remove scratch files older than ttl_hours (left behind by crashed/timed-out work)."""
+    directory = directory or SCRATCH_DIR
+    cutoff = (now or time.time()) - ttl_hours * 3600
+    removed = 0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                removed += _remove(entry.path) > 0
+    return removed
+
+
+class TempScope:
+    """
+    Intermediate files of one request, all removed when the scope exits
+    (normally, on error or on cancellation).
+    """
+
+    def __init__(self):
+        self.paths = []
+
+    def path(self, prefix: str = "tmp", suffix: str = "") -> str:
+        """A new unique path in SCRATCH_DIR owned by this scope."""
+        return self.track(os.path.join(SCRATCH_DIR, f"{prefix}_{uuid.uuid4().hex}{suffix}"))
+
+    def track(self, path: str) -> str:
+        """Take ownership of an existing or future file."""
+        if path and path not in self.paths:
+            self.paths.append(path)
+        return path
+
+    def cleanup(self):
+        for path in self.paths:
+            _remove(path)
+        self.paths.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cleanup()
+
+
+# ============== JANITOR ==============
+
+_last_sweep = {"time": None, "report": {}}
+
+
+def sweep_storage(directories: dict = None) -> dict:
+    """
+    One janitor pass: adopt unindexed directories (first run only), expire and
+    evict indexed artifacts, then sweep orphaned scratch files.
+    """
+    for category, paths in (directories or {}).items():
+        for directory in paths:
+            ARTIFACTS.adopt(category, directory)
+    report = ARTIFACTS.sweep(
+        {k: v for k, v in STORAGE_TTL_HOURS.items() if k != "scratch"}, STORAGE_QUOTA_MB
+    )
+    scratch = sweep_scratch(STORAGE_TTL_HOURS["scratch"])
+    if scratch:
+        report["scratch"] = {"expired": scratch, "evicted": 0}
+    _last_sweep.update(time=time.time(), report=report)
+    return report
+
+
+async def janitor_loop(directories: dict, interval: float = None):
+    """Run sweep_storage on the I/O pool every interval seconds until cancelled."""
+    interval = interval or STORAGE_JANITOR_INTERVAL
+    while True:
+        try:
+            report = await run_io(sweep_storage, directories)
+            if report:
+                print(f"Storage janitor: {report}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Storage janitor error: {e}")
+        await asyncio.sleep(interval)
+
+
+def storage_stats() -> dict:
+    """Indexed usage per category plus the last janitor pass (for the health endpoint)."""
+    return {
+        "usage": ARTIFACTS.usage(),
+        "ttl_hours": STORAGE_TTL_HOURS,
+        "quota_mb": STORAGE_QUOTA_MB,
+        "last_sweep": _last_sweep["time"],
+        "last_report": _last_sweep["report"],
+    }
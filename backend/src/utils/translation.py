@@ -1,37 +1,195 @@
 # translation.py - Text Translation Utilities
+#
+# Translations are cached by (source, target, text): an in-memory LRU in front
+# of a SQLite table that survives restarts. GoogleTranslator instances keep
+# per-call state, so each thread reuses its own instance per language pair.
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
 from deep_translator import GoogleTranslator
 
+from config.settings import (
+    TRANSLATION_CACHE_PATH,
+    TRANSLATION_CACHE_MEMORY_ENTRIES,
+    TRANSLATION_CACHE_MAX_ENTRIES,
+)
+
+# Special mapping for deep_translator library
+# Some language codes need to be converted to the format deep_translator expects
+LANG_CODE_MAP = {
+    'zh-CN': 'chinese (simplified)',
+    'zh-TW': 'chinese (traditional)',
+    'zh': 'chinese (simplified)',
+}
+
+# Texts per SQLite lookup (bound parameter limit)
+LOOKUP_BATCH = 500
+
+
+def lang_code(code: str) -> str:
+    """Map a language code to the form deep_translator expects."""
+    return LANG_CODE_MAP.get(code, code.split('-')[0] if '-' in code else code)
+
+
+class TranslationCache:
+    """In-memory LRU plus SQLite store of translations by (source, target, text)."""
+
+    def __init__(self, db_path: str, memory_entries: int, max_entries: int):
+        self.db_path = db_path
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.memory = OrderedDict()  # (source, target, text) -> translation, least recent first
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._rows = 0  # rows in the table, counted once per connection and kept up to date by put_many
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per process
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "source TEXT NOT NULL, target TEXT NOT NULL, text TEXT NOT NULL, translation TEXT NOT NULL, "
+                "last_used REAL NOT NULL, PRIMARY KEY (source, target, text))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS translations_by_use ON translations (last_used)")
+            self._rows = conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def _remember(self, key: tuple, translation: str):
+        self.memory[key] = translation
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get_many(self, source: str, target: str, texts: list[str]) -> dict:
+        """{text: translation} for the texts that are cached (memory first, then disk)."""
+        found = {}
+        with self._lock:
+            missing = []
+            for text in texts:
+                key = (source, target, text)
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[text] = self.memory[key]
+                else:
+                    missing.append(text)
+
+            conn = self._connect()
+            on_disk = {}
+            for i in range(0, len(missing), LOOKUP_BATCH):
+                batch = missing[i:i + LOOKUP_BATCH]
+                rows = conn.execute(
+                    "SELECT text, translation FROM translations WHERE source = ? AND target = ? "
+                    f"AND text IN ({', '.join('?' * len(batch))})",
+                    (source, target, *batch),
+                ).fetchall()
+                on_disk.update(rows)
+            if on_disk:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE translations SET last_used = ? WHERE source = ? AND target = ? AND text = ?",
+                    [(now, source, target, text) for text in on_disk],
+                )
+                for text, translation in on_disk.items():
+                    self._remember((source, target, text), translation)
+            found.update(on_disk)
+            self.hits += len(found)
+            self.misses += len(texts) - len(found)
+        return found
+
+    def put_many(self, source: str, target: str, translations: dict):
+        """Store {text: translation}, then drop the least recently used rows over max_entries."""
+        if not translations:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            rows = [(source, target, text, translation, now) for text, translation in translations.items()]
+            # New texts are inserted and counted; texts already stored are updated in place
+            added = conn.executemany("INSERT OR IGNORE INTO translations VALUES (?, ?, ?, ?, ?)", rows).rowcount
+            if added < len(rows):
+                conn.executemany(
+                    "UPDATE translations SET translation = ?, last_used = ? WHERE source = ? AND target = ? AND text = ?",
+                    [(translation, now, source, target, text) for text, translation in translations.items()],
+                )
+            self._rows += added
+            for text, translation in translations.items():
+                self._remember((source, target, text), translation)
+            excess = self._rows - self.max_entries
+            if excess > 0:
+                self._rows -= conn.execute(
+                    "DELETE FROM translations WHERE rowid IN "
+                    "(SELECT rowid FROM translations ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                ).rowcount
+
+    def stats(self) -> dict:
+        """Counters for the health endpoint."""
+        lookups = self.hits + self.misses
+        return {
+            "memory_entries": len(self.memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+TRANSLATIONS = TranslationCache(TRANSLATION_CACHE_PATH, TRANSLATION_CACHE_MEMORY_ENTRIES, TRANSLATION_CACHE_MAX_ENTRIES)
+
+_local = threading.local()
+
+
+def get_translator(source: str, target: str) -> GoogleTranslator:
+    """This thread's translator for a (mapped) language pair, created once."""
+    translators = getattr(_local, "translators", None)
+    if translators is None:
+        translators = _local.translators = {}
+    if (source, target) not in translators:
+        translators[(source, target)] = GoogleTranslator(source=source, target=target)
+    return translators[(source, target)]
+
+
+def translate_uncached(text: str, source: str, target: str) -> str:
+    """Translate one text with mapped language codes, bypassing the cache."""
+    try:
+        return get_translator(source, target).translate(text)
+    except Exception as e:
+        raise ValueError(f"Translation failed: {str(e)}")
+
 
 def translate_text(text: str, source_lang: str, target_lang: str) -> str:
     """
     Translate text using Google Translate (free, no API key required).
-    
+
     Args:
         text: Text to translate
         source_lang: Source language code (e.g., 'vi', 'en', 'ja')
         target_lang: Target language code
-    
+
     Returns:
         Translated text
     """
-    # Special mapping for deep_translator library
-    # Some language codes need to be converted to the format deep_translator expects
-    LANG_CODE_MAP = {
-        'zh-CN': 'chinese (simplified)',
-        'zh-TW': 'chinese (traditional)',
-        'zh': 'chinese (simplified)',
-    }
-    
-    try:
-        # Map language codes for deep_translator
-        source = LANG_CODE_MAP.get(source_lang, source_lang.split('-')[0] if '-' in source_lang else source_lang)
-        target = LANG_CODE_MAP.get(target_lang, target_lang.split('-')[0] if '-' in target_lang else target_lang)
-        
-        translator = GoogleTranslator(source=source, target=target)
-        translated = translator.translate(text)
-        return translated
-    except Exception as e:
-        raise ValueError(f"Translation failed: {str(e)}")
+    source, target = lang_code(source_lang), lang_code(target_lang)
+    text = text.strip()
+    if not text:
+        return text
+    cached = TRANSLATIONS.get_many(source, target, [text])
+    if text in cached:
+        return cached[text]
+    translated = translate_uncached(text, source, target)
+    TRANSLATIONS.put_many(source, target, {text: translated})
+    return translated
 
 
 # Supported language codes
@@ -0,0 +1,72 @@
+# uploads.py - Upload Ingestion: Chunked Copy, Hashing, Limits and Archiving
+#
+# save_upload runs on the I/O pool: it copies an upload body to disk chunk by
+# chunk while hashing it, and stops as soon as MAX_UPLOAD_MB is exceeded.
+# check_duration rejects overlong audio from its header, before any decode.
+# archive_file moves a file into the archive by rename, never by copy.
+import errno
+import hashlib
+import os
+import shutil
+
+import soundfile as sf
+
+from config.settings import MAX_UPLOAD_MB, MAX_UPLOAD_SECONDS, UPLOAD_CHUNK_BYTES
+
+MAX_UPLOAD_BYTES = MAX_UPLOAD_MB * 1024 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds MAX_UPLOAD_MB or MAX_UPLOAD_SECONDS (reported as 413)."""
+
+
+def save_upload(fileobj, dest_path: str, max_bytes: int = None):
+    """
+    Copy fileobj to dest_path in chunks, hashing as it goes.
+    Returns (size, sha256 hex digest); removes the partial file if max_bytes is exceeded.
+    """
+    max_bytes = MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(dest_path, "wb") as out:
+            for chunk in iter(lambda: fileobj.read(UPLOAD_CHUNK_BYTES), b""):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds {max_bytes // (1024 * 1024)} MB")
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        try:
+            os.remove(dest_path)
+        except OSError:
+            pass
+        raise
+    return size, digest.hexdigest()
+
+
+def check_duration(duration: float, max_seconds: float = None):
+    """Raise UploadTooLargeError if duration (seconds) is over the limit."""
+    max_seconds = MAX_UPLOAD_SECONDS if max_seconds is None else max_seconds
+    if duration > max_seconds:
+        raise UploadTooLargeError(f"Audio is {duration:.0f} s long (limit {max_seconds:.0f} s)")
+
+
+def check_file_duration(path: str, max_seconds: float = None):
+    """Header-only duration check for files soundfile can open (others are checked after decode)."""
+    try:
+        duration = sf.info(path).duration
+    except RuntimeError:
+        return
+    check_duration(duration, max_seconds)
+
+
+def archive_file(src: str, dst: str) -> str:
+    """Move src to dst by rename (no data copied); copies only across filesystems."""
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+    return dst
@@ -4,15 +4,28 @@ import numpy as np
 import os
 import uuid
 
+from src.utils.waveform import WaveformPeaks, compute_peaks, peaks_for_zoom
+
 # Configure matplotlib
 plt.rcParams['figure.figsize'] = [14, 7]
 plt.style.use('dark_background')
 
+# Min/max buckets drawn per waveform (about one per horizontal pixel at 14in x 150dpi)
+PLOT_BUCKETS = 2000
+
+
+def _envelope(y: np.ndarray, sr: int):
+    """Downsample to PLOT_BUCKETS min/max pairs; returns (bucket start sample, min, max)."""
+    spp = max(-(-len(y) // PLOT_BUCKETS), 1)
+    peaks = compute_peaks(y, sr, spp)
+    return np.arange(peaks.length) * spp, peaks.min, peaks.max
+
 
 def save_plot(y: np.ndarray, sr: int, title: str, output_dir: str = ".") -> str:
-    """Generate and save a waveform plot."""
+    """Generate and save a waveform plot (min/max envelope, not every sample)."""
     fig, ax = plt.subplots(figsize=(14, 5))
-    ax.plot(y, alpha=0.7, color='#00D4FF', linewidth=0.8)
+    x, lo, hi = _envelope(y, sr)
+    ax.fill_between(x, lo, hi, alpha=0.7, color='#00D4FF', linewidth=0.8)
     ax.set_xlabel("Samples")
     ax.set_ylabel("Amplitude")
     ax.grid(True, alpha=0.2)
@@ -36,18 +49,17 @@ def save_comparison_plot(
     """
     Generate and save an OVERLAY waveform plot (before/after on same chart).
     Colors: Purple (original) + Cyan (processed)
+    Each signal is drawn as a min/max envelope of PLOT_BUCKETS buckets.
     """
     fig, ax = plt.subplots(figsize=(14, 7))
     
-    # Calculate time arrays
-    time_original = np.arange(len(original_y)) / original_sr
-    time_processed = np.arange(len(processed_y)) / processed_sr
-    
     # Plot original audio (Purple/Magenta)
-    ax.plot(time_original, original_y, alpha=0.6, color='#E066FF', linewidth=0.8, label='Original')
+    x, lo, hi = _envelope(original_y, original_sr)
+    ax.fill_between(x / original_sr, lo, hi, alpha=0.6, color='#E066FF', linewidth=0.8, label='Original')
     
     # Plot processed audio (Cyan)
-    ax.plot(time_processed, processed_y, alpha=0.7, color='#00D4FF', linewidth=0.8, label='Processed')
+    x, lo, hi = _envelope(processed_y, processed_sr)
+    ax.fill_between(x / processed_sr, lo, hi, alpha=0.7, color='#00D4FF', linewidth=0.8, label='Processed')
     
     # Labels and styling - English, no title
     ax.set_xlabel("Time (s)", fontsize=11, color='white')
@@ -58,8 +70,8 @@ def save_comparison_plot(
     ax.legend(loc='upper right', fontsize=10, framealpha=0.8)
     
     # Set x-axis limit to max of both
-    max_time = max(time_original[-1] if len(time_original) > 0 else 1, 
-                   time_processed[-1] if len(time_processed) > 0 else 1)
+    max_time = max(len(original_y) / original_sr if len(original_y) > 0 else 1,
+                   len(processed_y) / processed_sr if len(processed_y) > 0 else 1)
     ax.set_xlim(0, max_time)
     
     plt.tight_layout()
@@ -69,3 +81,42 @@ def save_comparison_plot(
     plt.savefig(filepath, dpi=150, bbox_inches='tight', facecolor='#1a1a2e')
     plt.close()
     return filepath
+
+
+def render_waveform_png(
+    processed: WaveformPeaks,
+    output_path: str,
+    original: WaveformPeaks = None,
+    width: int = 1400,
+    height: int = 700
+) -> str:
+    """
+    Render a waveform image from peak summaries (see waveform.py) - overlay of
+    original and processed when original is given. width/height in pixels.
+    Written atomically, so concurrent renders of the same image are safe.
+    """
+    fig, ax = plt.subplots(figsize=(width / 100, height / 100))
+    layers = [(original, '#E066FF', 0.6, 'Original'), (processed, '#00D4FF', 0.7, 'Processed')]
+
+    max_time = 0.0
+    for peaks, color, alpha, label in layers:
+        if peaks is None or not peaks.length:
+            continue
+        level = peaks_for_zoom(peaks, pixels=width)
+        x = np.arange(level.length) * level.samples_per_pixel / level.sample_rate
+        ax.fill_between(x, level.min, level.max, alpha=alpha, color=color, linewidth=0.8, label=label)
+        max_time = max(max_time, peaks.length * peaks.samples_per_pixel / peaks.sample_rate)
+
+    ax.set_xlabel("Time (s)", fontsize=11, color='white')
+    ax.set_ylabel("Amplitude", fontsize=11, color='white')
+    ax.grid(True, alpha=0.2, linestyle='--')
+    if original is not None:
+        ax.legend(loc='upper right', fontsize=10, framealpha=0.8)
+    ax.set_xlim(0, max_time or 1)
+    plt.tight_layout()
+
+    tmp_path = f"{output_path}.{uuid.uuid4().hex}.tmp.png"
+    plt.savefig(tmp_path, dpi=100, facecolor='#1a1a2e')
+    plt.close(fig)
+    os.replace(tmp_path, output_path)
+    return output_path
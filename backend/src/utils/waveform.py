@@ -0,0 +1,159 @@
+# waveform.py - Waveform Peak Summaries (min/max/RMS per pixel bucket)
+#
+# A summary has one (min, max, rms) triple per bucket of samples_per_pixel
+# samples, like audiowaveform's .dat files, so the frontend can draw a
+# waveform at any zoom without downloading the audio. Files are summarized
+# block by block (constant memory); coarser zoom levels are derived from a
+# cached base level instead of re-reading the audio.
+import os
+import struct
+from dataclasses import dataclass
+
+import numpy as np
+import soundfile as sf
+
+# Default bucket size of the cached base level; coarser levels must be multiples of it
+BASE_SAMPLES_PER_PIXEL = 256
+
+# Buckets per block when summarizing a file
+PEAK_BLOCK_BUCKETS = 4096
+
+# audiowaveform .dat header: version, flags, sample rate, samples per pixel, length
+DAT_HEADER = struct.Struct("<iIiiI")
+DAT_VERSION = 1
+
+
+@dataclass
+class WaveformPeaks:
+    """Per-bucket min/max/RMS of a mono signal."""
+    sample_rate: int
+    samples_per_pixel: int
+    min: np.ndarray
+    max: np.ndarray
+    rms: np.ndarray
+
+    @property
+    def length(self) -> int:
+        return len(self.min)
+
+    def resample(self, samples_per_pixel: int) -> "WaveformPeaks":
+        """Merge buckets into a coarser level (samples_per_pixel must be a multiple of the current one)."""
+        factor = samples_per_pixel // self.samples_per_pixel
+        if factor <= 1:
+            return self
+        if samples_per_pixel % self.samples_per_pixel:
+            raise ValueError(f"samples_per_pixel must be a multiple of {self.samples_per_pixel}")
+        starts = np.arange(0, self.length, factor)
+        counts = np.diff(np.append(starts, self.length))
+        return WaveformPeaks(
+            self.sample_rate,
+            samples_per_pixel,
+            np.minimum.reduceat(self.min, starts),
+            np.maximum.reduceat(self.max, starts),
+            np.sqrt(np.add.reduceat(self.rms ** 2, starts) / counts).astype(np.float32),
+        )
+
+    def quantize(self, bits: int = 16) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """min/max/rms as integers in the signed range of `bits` (8 or 16)."""
+        scale = (1 << (bits - 1)) - 1
+        dtype = np.int8 if bits == 8 else np.int16
+        return tuple(np.clip(np.round(a * scale), -scale - 1, scale).astype(dtype) for a in (self.min, self.max, self.rms))
+
+    def to_json(self, bits: int = 16) -> dict:
+        """audiowaveform-style JSON (interleaved min/max in `data`) plus a parallel `rms` list."""
+        lo, hi, rms = self.quantize(bits)
+        return {
+            "version": 2,
+            "channels": 1,
+            "sample_rate": self.sample_rate,
+            "samples_per_pixel": self.samples_per_pixel,
+            "bits": bits,
+            "length": self.length,
+            "data": np.column_stack([lo, hi]).ravel().tolist(),
+            "rms": rms.tolist(),
+        }
+
+    def to_dat(self, bits: int = 16) -> bytes:
+        """audiowaveform binary .dat (version 1): header + interleaved min/max."""
+        lo, hi, _ = self.quantize(bits)
+        header = DAT_HEADER.pack(DAT_VERSION, 1 if bits == 8 else 0, self.sample_rate, self.samples_per_pixel, self.length)
+        return header + np.column_stack([lo, hi]).astype(lo.dtype.newbyteorder("<")).tobytes()
+
+    @classmethod
+    def from_dat(cls, data: bytes) -> "WaveformPeaks":
+        """Parse a .dat written by to_dat (RMS is not stored and comes back as zeros)."""
+        version, flags, sr, spp, length = DAT_HEADER.unpack_from(data)
+        bits = 8 if flags & 1 else 16
+        pairs = np.frombuffer(data, dtype="<i1" if bits == 8 else "<i2", offset=DAT_HEADER.size).reshape(-1, 2)
+        scale = (1 << (bits - 1)) - 1
+        return cls(sr, spp, pairs[:, 0] / scale, pairs[:, 1] / scale, np.zeros(length, dtype=np.float32))
+
+
+def compute_peaks(y: np.ndarray, sr: int, samples_per_pixel: int) -> WaveformPeaks:
+    """Summarize samples into buckets in one vectorized pass (last bucket may be partial)."""
+    y = np.asarray(y, dtype=np.float32)
+    if not len(y):
+        empty = np.zeros(0, dtype=np.float32)
+        return WaveformPeaks(sr, samples_per_pixel, empty, empty, empty)
+    starts = np.arange(0, len(y), samples_per_pixel)
+    counts = np.diff(np.append(starts, len(y)))
+    return WaveformPeaks(
+        sr,
+        samples_per_pixel,
+        np.minimum.reduceat(y, starts),
+        np.maximum.reduceat(y, starts),
+        np.sqrt(np.add.reduceat(y * y, starts) / counts).astype(np.float32),
+    )
+
+
+def file_peaks(path: str, samples_per_pixel: int = BASE_SAMPLES_PER_PIXEL) -> WaveformPeaks:
+    """Summarize an audio file block by block (downmixed to mono)."""
+    sr = sf.info(path).samplerate
+    parts = [
+        compute_peaks(block.mean(axis=1), sr, samples_per_pixel)
+        for block in sf.blocks(path, blocksize=samples_per_pixel * PEAK_BLOCK_BUCKETS, dtype='float32', always_2d=True)
+    ]
+    if not parts:
+        return compute_peaks(np.zeros(0), sr, samples_per_pixel)
+    return WaveformPeaks(
+        sr,
+        samples_per_pixel,
+        np.concatenate([p.min for p in parts]),
+        np.concatenate([p.max for p in parts]),
+        np.concatenate([p.rms for p in parts]),
+    )
+
+
+def peaks_cache_path(path: str, cache_dir: str) -> str:
+    """Where cached_file_peaks stores the base level of path."""
+    return os.path.join(cache_dir, f"{os.path.basename(path)}.{BASE_SAMPLES_PER_PIXEL}.npz")
+
+
+def cached_file_peaks(path: str, cache_dir: str) -> WaveformPeaks:
+    """
+    Base-level peaks for a file, cached as .npz in cache_dir (keyed by file
+    name, invalidated when the file is newer than the cache).
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_path = peaks_cache_path(path, cache_dir)
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+        with np.load(cache_path) as data:
+            return WaveformPeaks(int(data["sample_rate"]), BASE_SAMPLES_PER_PIXEL, data["min"], data["max"], data["rms"])
+
+    peaks = file_peaks(path, BASE_SAMPLES_PER_PIXEL)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, sample_rate=peaks.sample_rate, min=peaks.min, max=peaks.max, rms=peaks.rms)
+    os.replace(tmp_path, cache_path)
+    return peaks
+
+
+def peaks_for_zoom(base: WaveformPeaks, pixels: int = None, samples_per_pixel: int = None) -> WaveformPeaks:
+    """
+    Derive the level for a target width in pixels or an explicit samples_per_pixel,
+    rounded up to a multiple of the base level.
+    """
+    if samples_per_pixel is None:
+        total = base.length * base.samples_per_pixel
+        samples_per_pixel = -(-total // max(pixels or 1, 1))
+    factor = max(-(-samples_per_pixel // base.samples_per_pixel), 1)
+    return base.resample(factor * base.samples_per_pixel)
@@ -0,0 +1,116 @@
+# workers.py - Worker Pools for Blocking DSP and I/O Work
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from config.settings import (
+    WORKER_PROCESSES,
+    WORKER_START_METHOD,
+    IO_THREADS,
+    WORKER_QUEUE_DEPTH,
+    TASK_TIMEOUT,
+)
+
+
+class WorkerBusyError(RuntimeError):
+    """Raised when a pool already has WORKER_QUEUE_DEPTH tasks in flight."""
+
+
+class WorkerTimeoutError(TimeoutError):
+    """Raised when a task does not finish within TASK_TIMEOUT seconds."""
+
+
+_cpu_pool = None
+_io_pool = None
+_in_flight = {"cpu": 0, "io": 0}
+_finished = {"cpu": 0, "io": 0}
+_rejected = {"cpu": 0, "io": 0}
+_timed_out = {"cpu": 0, "io": 0}
+
+
+def get_io_pool() -> ThreadPoolExecutor:
+    """Thread pool for blocking network/disk calls."""
+    global _io_pool
+    if _io_pool is None:
+        _io_pool = ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix="io-worker")
+    return _io_pool
+
+
+def get_cpu_pool():
+    """
+    Process pool for CPU-bound DSP work.
+    Falls back to the I/O thread pool when WORKER_PROCESSES is 0.
+    """
+    global _cpu_pool
+    if WORKER_PROCESSES <= 0:
+        return get_io_pool()
+    if _cpu_pool is None:
+        _cpu_pool = ProcessPoolExecutor(
+            max_workers=WORKER_PROCESSES,
+            mp_context=multiprocessing.get_context(WORKER_START_METHOD),
+        )
+    return _cpu_pool
+
+
+async def _submit(kind: str, pool, func, *args, timeout: float = None, **kwargs):
+    """Run func on pool without blocking the loop, enforcing queue depth and timeout."""
+    global _cpu_pool
+    if _in_flight[kind] >= WORKER_QUEUE_DEPTH:
+        _rejected[kind] += 1
+        raise WorkerBusyError(f"Server busy: {_in_flight[kind]} {kind} tasks already queued")
+
+    loop = asyncio.get_running_loop()
+    _in_flight[kind] += 1
+    try:
+        future = loop.run_in_executor(pool, partial(func, *args, **kwargs))
+        return await asyncio.wait_for(future, timeout or TASK_TIMEOUT)
+    except asyncio.TimeoutError:
+        # A task already running in a worker process cannot be interrupted;
+        # the caller is released and the worker finishes in the background.
+        _timed_out[kind] += 1
+        raise WorkerTimeoutError(f"Task timed out after {timeout or TASK_TIMEOUT:.0f}s")
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM kill) - drop the pool so the next task gets a fresh one
+        if pool is _cpu_pool:
+            _cpu_pool = None
+        raise
+    finally:
+        _in_flight[kind] -= 1
+        _finished[kind] += 1
+
+
+async def run_cpu(func, *args, timeout: float = None, **kwargs):
+    """Run a CPU-bound function in the process pool. func and args must be picklable."""
+    return await _submit("cpu", get_cpu_pool(), func, *args, timeout=timeout, **kwargs)
+
+
+async def run_io(func, *args, timeout: float = None, **kwargs):
+    """Run a blocking I/O-bound function in the thread pool."""
+    return await _submit("io", get_io_pool(), func, *args, timeout=timeout, **kwargs)
+
+
+def pool_stats() -> dict:
+    """Current pool configuration and counters (for health checks)."""
+    return {
+        "processes": WORKER_PROCESSES,
+        "io_threads": IO_THREADS,
+        "queue_depth": WORKER_QUEUE_DEPTH,
+        "task_timeout": TASK_TIMEOUT,
+        "in_flight": dict(_in_flight),
+        "finished": dict(_finished),
+        "rejected": dict(_rejected),
+        "timed_out": dict(_timed_out),
+    }
+
+
+def shutdown_pools():
+    """Stop both pools (called on application shutdown)."""
+    global _cpu_pool, _io_pool
+    if _cpu_pool is not None:
+        _cpu_pool.shutdown(wait=False, cancel_futures=True)
+        _cpu_pool = None
+    if _io_pool is not None:
+        _io_pool.shutdown(wait=False, cancel_futures=True)
+        _io_pool = None
@@ -0,0 +1,115 @@
+# test_audio_io.py - Unit Tests for Container Sniffing and Decoding
+import io
+import os
+import struct
+import sys
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import audio_io
+from src.processing import load_buffer
+
+SR = 16000
+TONE = (0.4 * np.sin(2 * np.pi * 440 * np.arange(SR) / SR)).astype(np.float32)
+
+FORMATS = [("wav", "WAV", "PCM_16"), ("flac", "FLAC", "PCM_16"), ("ogg", "OGG", "VORBIS"), ("aiff", "AIFF", "PCM_16")]
+if "mp3" in audio_io.NATIVE_FORMATS:
+    FORMATS.append(("mp3", "MP3", "MPEG_LAYER_III"))
+
+
+@pytest.mark.parametrize("fmt,container,subtype", FORMATS)
+def test_native_formats_decode_in_process(tmp_path, monkeypatch, fmt, container, subtype):
+    path = str(tmp_path / "upload.bin")  # extension is ignored
+    sf.write(path, TONE, SR, format=container, subtype=subtype)
+    monkeypatch.setattr(audio_io, "FFMPEG_BINARY", str(tmp_path / "no-ffmpeg"))
+
+    assert audio_io.sniff_format(path) == fmt
+    y, sr, info = audio_io.decode_audio(path)
+    assert sr == SR and y.dtype == np.float32 and y.shape[1] == 1
+    assert info["format"] == fmt and info["backend"] == "soundfile"
+    if fmt in ("ogg", "mp3"):  # lossy, and MP3 adds encoder delay
+        assert abs(np.sqrt(np.mean(y ** 2)) - np.sqrt(np.mean(TONE ** 2))) < 0.05
+    else:
+        assert np.max(np.abs(y[:, 0] - TONE)) < 1e-3
+
+
+@pytest.mark.parametrize("head,fmt", [
+    (b"\x1a\x45\xdf\xa3\x9f\x42\x86\x81", "webm"),
+    (b"\x00\x00\x00\x20ftypM4A ", "m4a"),
+    (b"ID3\x04\x00\x00\x00\x00", "mp3"),
+    (b"\xff\xfb\x90\x64\x00\x00", "mp3"),
+    (b"\xff\xf1\x50\x80\x00\x1f", "aac"),
+    (b"hello world", "unknown"),
+])
+def test_sniff_magic_bytes(tmp_path, head, fmt):
+    path = tmp_path / "upload"
+    path.write_bytes(head + b"\x00" * 32)
+    assert audio_io.sniff_format(str(path)) == fmt
+
+
+def test_piped_wav_with_placeholder_sizes():
+    out = io.BytesIO()
+    stereo = np.stack([TONE, -TONE], axis=1)
+    sf.write(out, stereo, SR, format="WAV", subtype="FLOAT")
+    data = bytearray(out.getvalue())
+    data[4:8] = struct.pack("<I", 0xFFFFFFFF)  # ffmpeg cannot seek back on a pipe
+    pos = data.index(b"data") + 4
+    data[pos:pos + 4] = struct.pack("<I", 0xFFFFFFFF)
+
+    y, sr = audio_io._parse_wav_stream(bytes(data))
+    assert sr == SR
+    np.testing.assert_array_equal(y, stereo)
+
+
+def test_unsupported_format_without_ffmpeg(tmp_path, monkeypatch):
+    path = tmp_path / "upload.webm"
+    path.write_bytes(b"\x1a\x45\xdf\xa3" + b"\x00" * 64)
+    monkeypatch.setattr(audio_io, "FFMPEG_BINARY", str(tmp_path / "no-ffmpeg"))
+    with pytest.raises(audio_io.AudioDecodeError):
+        audio_io.decode_audio(str(path))
+
+
+# Stands in for ffmpeg: 10 s of mono float32 WAV at 8 kHz, cut short by -t
+FAKE_FFMPEG = """#!{python}
+import struct
+import sys
+args = sys.argv[1:]
+seconds = float(args[args.index("-t") + 1]) if "-t" in args else 10.0
+body = bytes(4 * int(min(seconds, 10.0) * 8000))
+fmt = struct.pack("<HHIIHH", 3, 1, 8000, 32000, 4, 32)
+sys.stdout.buffer.write(b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE" + b"fmt " + struct.pack("<I", 16) + fmt
+                        + b"data" + struct.pack("<I", 0xFFFFFFFF) + body)
+"""
+
+
+def test_ffmpeg_decode_capped_at_duration_limit(tmp_path, monkeypatch):
+    """A 10 s upload decoded by ffmpeg stops just past a 5 s limit and is rejected."""
+    from src.utils.uploads import UploadTooLargeError
+
+    ffmpeg = tmp_path / "ffmpeg"
+    ffmpeg.write_text(FAKE_FFMPEG.format(python=sys.executable))
+    ffmpeg.chmod(0o755)
+    monkeypatch.setattr(audio_io, "FFMPEG_BINARY", str(ffmpeg))
+    path = tmp_path / "upload.webm"
+    path.write_bytes(b"\x1a\x45\xdf\xa3" + b"\x00" * 64)
+
+    assert audio_io.decode_audio(str(path))[0].shape == (80000, 1)
+    assert audio_io.decode_audio(str(path), max_seconds=20)[0].shape == (80000, 1)
+    with pytest.raises(UploadTooLargeError):
+        audio_io.convert_to_wav(str(path), str(tmp_path / "out.wav"), max_seconds=5)
+    assert not os.path.exists(tmp_path / "out.wav")
+
+
+def test_load_buffer_records_decode_and_stats(tmp_path):
+    path = str(tmp_path / "in.flac")
+    sf.write(path, TONE, SR)
+    buf = load_buffer(path)
+    assert buf.metadata["decode"]["format"] == "flac"
+
+    audio_io.record_decode(buf.metadata["decode"])
+    assert audio_io.decode_stats()["flac"]["soundfile"]["count"] >= 1
@@ -0,0 +1,73 @@
+# test_batch.py - Unit Tests for Batch Processing
+import asyncio
+import io
+import json
+import os
+import sys
+import zipfile
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.api import routes, tasks
+from src.utils import storage, workers
+from src.utils.uploads import UploadTooLargeError
+
+SR = 8000
+
+
+def write_tone(path, freq=440):
+    sf.write(str(path), 0.3 * np.sin(2 * np.pi * freq * np.arange(SR) / SR), SR)
+    return str(path)
+
+
+@pytest.fixture
+def scratch(tmp_path, monkeypatch):
+    monkeypatch.setattr(workers, "WORKER_PROCESSES", 0)  # run the CPU tasks in threads
+    monkeypatch.setattr(storage, "SCRATCH_DIR", str(tmp_path / "scratch"))
+    monkeypatch.setattr(tasks, "SCRATCH_DIR", str(tmp_path / "scratch"))
+    os.makedirs(tmp_path / "scratch")
+    return tmp_path / "scratch"
+
+
+def test_batch_streams_results_and_manifest(scratch, monkeypatch):
+    monkeypatch.setattr(routes, "BATCH_CONCURRENCY", 2)
+    scope = storage.TempScope()
+    inputs = [(f"clip{i}.wav", scope.track(write_tone(scratch / f"in{i}.wav", 200 + 100 * i))) for i in range(3)]
+    bad = scratch / "bad.wav"
+    bad.write_bytes(b"not audio")
+    inputs.append(("bad.wav", scope.track(str(bad))))
+    stages = [{"type": "gain", "gain_db": -6.0}]
+
+    async def collect():
+        return b"".join([chunk async for chunk in routes.stream_batch(inputs, stages, scope)])
+
+    archive = zipfile.ZipFile(io.BytesIO(asyncio.run(collect())))
+    manifest = json.loads(archive.read("manifest.json"))
+    assert [f["status"] for f in manifest["files"]] == ["ok", "ok", "ok", "error"]
+    assert manifest["succeeded"] == 3 and manifest["failed"] == 1
+    assert sorted(archive.namelist()) == ["000_clip0.wav", "001_clip1.wav", "002_clip2.wav", "manifest.json"]
+
+    y, sr = sf.read(io.BytesIO(archive.read("001_clip1.wav")))
+    assert sr == SR and np.max(np.abs(y)) == pytest.approx(0.3 * 10 ** (-6 / 20), abs=2e-3)
+    assert os.listdir(scratch) == []  # inputs and outputs removed with the scope
+
+
+def test_zip_extraction_limits(scratch, tmp_path):
+    path = tmp_path / "batch.zip"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("a/one.wav", b"\0" * 1000)
+        archive.writestr("__MACOSX/a/._one.wav", b"x")
+        archive.writestr("two.wav", b"\0" * 100_000)  # deflates to almost nothing
+
+    members = tasks.extract_zip_task(str(path), 10, 1 << 20)
+    assert [name for name, _ in members] == ["one.wav", "two.wav"]
+    with pytest.raises(UploadTooLargeError):
+        tasks.extract_zip_task(str(path), 1, 1 << 20)
+    with pytest.raises(UploadTooLargeError):
+        tasks.extract_zip_task(str(path), 10, 50_000)
+    assert sorted(os.listdir(scratch)) == sorted(os.path.basename(p) for _, p in members)  # rejects leave nothing
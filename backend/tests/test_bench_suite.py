@@ -0,0 +1,49 @@
+# test_bench_suite.py - Unit Tests for the Benchmark Suite Helpers
+import os
+import sys
+
+import numpy as np
+import soundfile as sf
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_suite import build_cases, compare, measure, result_key, speech_like
+
+
+def test_speech_like_signal():
+    y = speech_like(2.0, 16000)
+    assert y.shape == (32000,) and y.dtype == np.float32
+    assert np.max(np.abs(y)) == np.float32(0.5)
+    spectrum = np.abs(np.fft.rfft(y))
+    freqs = np.fft.rfftfreq(len(y), 1 / 16000)
+    assert spectrum[(freqs > 300) & (freqs < 3000)].sum() > 5 * spectrum[freqs > 5000].sum()  # speech band
+    np.testing.assert_array_equal(y, speech_like(2.0, 16000))
+
+
+def test_compare_flags_regressions():
+    baseline = {
+        "effect/echo@5s/16000": {"seconds": 0.1, "peak_mb": 10.0},
+        "effect/robot@5s/16000": {"seconds": 0.1, "peak_mb": 10.0},
+        "effect/reverse@5s/16000": {"seconds": 0.0001, "peak_mb": 0.1},
+    }
+    results = {
+        "effect/echo@5s/16000": {"seconds": 0.12, "peak_mb": 10.5},  # within threshold
+        "effect/robot@5s/16000": {"seconds": 0.3, "peak_mb": 25.0},
+        "effect/reverse@5s/16000": {"seconds": 0.001, "peak_mb": 0.5},  # below the noise floors
+        "effect/new@5s/16000": {"seconds": 9.0, "peak_mb": 9.0},
+    }
+    regressions = compare(results, baseline, threshold=0.25)
+    assert list(regressions) == ["effect/robot@5s/16000"] and len(regressions["effect/robot@5s/16000"]) == 2
+    assert result_key("effect/echo", 5.0, 16000) == "effect/echo@5s/16000"
+
+
+def test_cases_run(tmp_path):
+    y = speech_like(0.5, 8000)
+    path = str(tmp_path / "in.wav")
+    sf.write(path, y, 8000)
+    cases = dict(build_cases(y, 8000, {"wav": path}, None, "echo", str(tmp_path)))
+    assert "effect/process_voice" in cases and "filter/siren" in cases and "decode/wav" in cases
+    for name in ("effect/echo", "decode/wav"):
+        r = measure(cases[name], repeat=1)
+        assert r["seconds"] >= 0 and r["peak_mb"] >= 0
@@ -0,0 +1,94 @@
+# test_cache.py - Unit Tests for the Content-Addressed Disk Cache
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.cache import DiskCache, cache_key
+
+
+def make_file(path, size):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    return str(path)
+
+
+def test_lru_eviction_by_size(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache"), max_bytes=250)
+    for name in ("a", "b", "c"):
+        cache.put(name, {"name": name}, [make_file(tmp_path / name, 100)])
+        if name == "b":
+            assert cache.get("a") == {"name": "a"}  # "a" becomes most recent
+
+    assert cache.get("b") is None and not os.path.exists(tmp_path / "b")
+    assert cache.get("a") == {"name": "a"} and cache.get("c") == {"name": "c"}
+    assert cache.stats()["evictions"] == 1
+
+    # Index survives a restart
+    assert DiskCache(str(tmp_path / "cache"), max_bytes=250).get("c") == {"name": "c"}
+
+
+def test_concurrent_requests_are_coalesced(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache"), max_bytes=1 << 20)
+    calls = []
+
+    async def create():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"n": len(calls)}, [make_file(tmp_path / "out", 10)]
+
+    async def scenario():
+        key = cache_key("effect", "digest", {"delay": 0.2})
+        return await asyncio.gather(*[cache.get_or_create(key, create) for _ in range(5)])
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert [value for value, _ in results] == [{"n": 1}] * 5
+    assert [hit for _, hit in results].count(False) == 1
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_failed_computation_is_not_cached(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache"), max_bytes=1 << 20)
+
+    async def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        asyncio.run(cache.get_or_create("k", fail))
+    assert cache.get("k") is None and not cache._in_flight
+
+
+def test_lookup_and_store_run_off_the_event_loop(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path / "cache"), max_bytes=1 << 20)
+    threads = []
+    for name in ("get", "put"):
+        method = getattr(cache, name)
+        monkeypatch.setattr(cache, name, lambda *args, method=method: (threads.append(threading.current_thread()),
+                                                                       method(*args))[1])
+
+    async def create():
+        return {"n": 1}, [make_file(tmp_path / "out", 10)]
+
+    async def main():
+        return [await cache.get_or_create("k", create) for _ in range(2)]
+
+    assert asyncio.run(main()) == [({"n": 1}, False), ({"n": 1}, True)]
+    assert len(threads) == 2 and threading.main_thread() not in threads
+
+
+def test_lookup_never_computes(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache"), max_bytes=1 << 20)
+
+    async def main():
+        missing = await cache.lookup("k")
+        cache.put("k", {"n": 1}, [make_file(tmp_path / "out", 10)])
+        return missing, await cache.lookup("k")
+
+    assert asyncio.run(main()) == (None, {"n": 1})
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 0  # the caller's computation counts the miss
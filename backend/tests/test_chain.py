@@ -0,0 +1,48 @@
+# test_chain.py - Unit Tests for Effect Chains
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.processing import AudioBuffer
+from src.processing.chain import ChainError, validate_chain, run_chain
+
+
+def make_buffer(sr: int = 8000) -> AudioBuffer:
+    t = np.arange(sr) / sr
+    return AudioBuffer(0.5 * np.sin(2 * np.pi * 440 * t), sr)
+
+
+def test_validate_chain_fills_defaults():
+    stages = validate_chain([{"type": "echo"}, {"type": "filter", "filter_type": "siren", "intensity": "30"}])
+    assert stages[0] == {"type": "echo", "delay": 0.2}
+    assert stages[1]["intensity"] == 30.0
+
+
+@pytest.mark.parametrize("chain", [
+    [],
+    [{"type": "nope"}],
+    [{"type": "echo", "delay": 10}],
+    [{"type": "echo", "speed": 1}],
+    [{"type": "filter", "filter_type": "wind"}],
+    [{"type": "gain"}] * 20,
+])
+def test_validate_chain_rejects(chain):
+    with pytest.raises(ChainError):
+        validate_chain(chain)
+
+
+def test_fused_stages_match_unfused():
+    """Fused sample-wise stages give the same result as the standalone effects."""
+    from src.processing import run_effect
+
+    buf = make_buffer()
+    fused = run_chain(buf, validate_chain([{"type": "telephone"}, {"type": "distortion"}, {"type": "gain", "gain_db": -6}]))
+    reference = run_effect(run_effect(buf, "telephone"), "distortion")
+
+    np.testing.assert_allclose(fused.samples, reference.samples * 10 ** (-6 / 20), atol=1e-6)
+    assert fused.metadata["stages"][-1] == "fused:tanh+scale+normalize+tanh+normalize+scale"
@@ -0,0 +1,35 @@
+# test_dynamics.py - Unit Tests for the Envelope-Follower Noise Gate
+import os
+import sys
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.processing.dynamics import noise_gate
+from src.processing.streaming import GateStage
+
+
+def test_gate_attack_hold_release():
+    sr = 10000  # 1 ms = 10 samples
+    y = np.full(sr, 0.001)
+    y[5000:5100] = 0.5
+    gain = noise_gate(y, sr, threshold=0.02, attack_ms=2, hold_ms=10, release_ms=40) / y
+
+    assert gain[4970] == 0 and gain[5000] == 1   # opens fully when the signal arrives
+    assert 0 < gain[4990] < 1                     # attack ramp (look-ahead)
+    assert np.all(gain[5100:5200] == 1)           # held for 10 ms after the last loud sample
+    assert 0 < gain[5300] < gain[5250] < 1        # release ramp
+    assert gain[5700] == 0
+
+
+def test_streamed_gate_matches_batch():
+    sr = 8000
+    rng = np.random.default_rng(3)
+    y = 0.015 * rng.standard_normal(sr * 3) * (1 + (np.arange(sr * 3) // 700) % 3)
+    stage = GateStage(sr, threshold=0.02)
+    parts = [stage.process(block) for block in np.array_split(y, 41)]
+    parts.append(stage.process(np.zeros(stage.latency)))
+    streamed = np.concatenate(parts)[stage.latency:stage.latency + len(y)]
+    np.testing.assert_array_equal(streamed, noise_gate(y, sr, threshold=0.02))
@@ -38,5 +38,22 @@ def test_api_imports():
     assert router is not None
 
 
+def test_buffer_effects_in_memory():
+    """In-memory effects take and return AudioBuffers without touching disk."""
+    import numpy as np
+    from src.processing import AudioBuffer, EFFECTS, run_effect
+
+    sr = 8000
+    t = np.arange(sr) / sr
+    buf = AudioBuffer(0.5 * np.sin(2 * np.pi * 440 * t), sr)
+
+    for name in ("echo", "telephone", "distortion", "reverse", "process_voice"):
+        out = run_effect(buf, name, delay=0.1, repeat=2)
+        assert out.sr == sr
+        assert out.metadata["stages"] == [name]
+        assert np.max(np.abs(out.samples)) <= 1.0
+    assert "chipmunk" in EFFECTS
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,170 @@
+# test_elevenlabs.py - Unit Tests for the ElevenLabs Client (against a local mock server)
+import asyncio
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.api import routes
+from src.utils import elevenlabs
+from src.utils.cache import DiskCache
+
+AUDIO = bytes(range(256)) * 200  # 51 KB of fake MP3
+
+
+class MockElevenLabs(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    server_state = None
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=b"", content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _record(self):
+        state = self.server_state
+        state["connections"].add(self.client_address)
+        state["requests"].append((self.command, self.path))
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def do_GET(self):
+        self._record()
+        voices = [{"voice_id": v, "name": v.title()} for v in self.server_state["voices"]]
+        self._reply(200, json.dumps({"voices": voices}).encode())
+
+    def do_DELETE(self):
+        self._record()
+        self.server_state["voices"].remove(self.path.rsplit("/", 1)[1])
+        self._reply(200, b"{}")
+
+    def do_POST(self):
+        self._record()
+        state = self.server_state
+        if state["fail_next"]:
+            state["fail_next"] -= 1
+            self._reply(state["fail_status"], b'{"detail": "busy"}', headers={"Retry-After": "0"})
+            return
+        if self.path.endswith("/stream"):
+            # Chunked transfer, one chunk at a time
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/mpeg")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(0, len(AUDIO), 10_000):
+                chunk = AUDIO[i:i + 10_000]
+                self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        self._reply(200, AUDIO, content_type="audio/mpeg")
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    state = {"connections": set(), "requests": [], "voices": ["rachel", "adam"], "fail_next": 0,
+             "fail_status": 429}
+    handler = type("Handler", (MockElevenLabs,), {"server_state": state})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(elevenlabs, "BASE_URL", f"http://127.0.0.1:{httpd.server_address[1]}/v1")
+    monkeypatch.setattr(elevenlabs, "SCRATCH_DIR", str(tmp_path))
+    monkeypatch.setattr(elevenlabs, "RETRY_BACKOFF", 0.01)
+    monkeypatch.setattr(elevenlabs, "_session", (None, None))
+    elevenlabs.invalidate_voices()
+    yield state
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_synthesis_reuses_connection_and_retries(server):
+    server["fail_next"] = 1
+    paths = [elevenlabs.text_to_speech_eleven("Hello", "rachel") for _ in range(3)]
+    for path in paths:
+        with open(path, "rb") as f:
+            assert f.read() == AUDIO
+    assert len(server["requests"]) == 4  # one 429 (rejected unprocessed) retried
+    assert len(server["connections"]) == 1  # keep-alive pool
+
+    server["fail_next"] = 10
+    assert elevenlabs.text_to_speech_eleven("Hello", "rachel") is None
+    assert server["fail_next"] == 10 - (1 + elevenlabs.ELEVENLABS_RETRIES)
+
+    # A 5xx may come after the audio was generated (and billed): POSTs are not repeated
+    server["fail_status"], server["fail_next"] = 503, 1
+    sent = len(server["requests"])
+    assert elevenlabs.text_to_speech_eleven("Hello", "rachel") is None
+    assert len(server["requests"]) == sent + 1
+
+
+def test_post_retried_only_when_never_sent(monkeypatch):
+    calls = []
+
+    class Session:
+        def request(self, method, url, **kwargs):
+            calls.append(method)
+            raise errors[len(calls) - 1]
+
+    monkeypatch.setattr(elevenlabs, "get_session", lambda: Session())
+    monkeypatch.setattr(elevenlabs, "RETRY_BACKOFF", 0)
+    errors = [elevenlabs.requests.ConnectTimeout(), elevenlabs.requests.ReadTimeout()]
+    with pytest.raises(elevenlabs.requests.ReadTimeout):
+        elevenlabs.request("POST", "/text-to-speech/x")
+    assert calls == ["POST", "POST"]  # the connect failure is retried, the read timeout is not
+
+    calls.clear()
+    errors = [elevenlabs.requests.ReadTimeout()] * 3
+    with pytest.raises(elevenlabs.requests.ReadTimeout):
+        elevenlabs.request("GET", "/voices")
+    assert len(calls) == 1 + elevenlabs.ELEVENLABS_RETRIES
+
+
+def test_voice_list_cached_until_changed(server):
+    assert [v["voice_id"] for v in elevenlabs.list_voices()] == ["rachel", "adam"]
+    elevenlabs.list_voices()
+    assert server["requests"].count(("GET", "/v1/voices")) == 1
+
+    assert elevenlabs.delete_voice("adam")
+    assert [v["voice_id"] for v in elevenlabs.list_voices()] == ["rachel"]
+    assert server["requests"].count(("GET", "/v1/voices")) == 2
+
+
+def test_streaming_endpoint_forwards_and_caches(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(routes, "TEMP_DIR", str(tmp_path))
+    monkeypatch.setattr(routes, "TTS_CACHE", DiskCache(str(tmp_path / "cache"), 1 << 20, "tts"))
+    monkeypatch.setattr(routes, "TTS_ENGINE_STATS", {})
+    from src.utils import storage
+    monkeypatch.setattr(storage, "SCRATCH_DIR", str(tmp_path))
+    params = {"voice_id": "rachel", "model_id": "m", "voice_settings": {}}
+
+    async def fetch():
+        response = await routes.stream_eleven_speech("Hello", params)
+        chunks = [chunk async for chunk in response.body_iterator]
+        return response.headers["X-Cache"], chunks
+
+    cache_status, chunks = asyncio.run(fetch())
+    assert cache_status == "miss" and b"".join(chunks) == AUDIO and len(chunks) > 1
+    assert server["requests"][-1] == ("POST", "/v1/text-to-speech/rachel/stream")
+
+    response = asyncio.run(routes.stream_eleven_speech(" Hello ", params))
+    assert response.headers["X-Cache"] == "hit"
+    with open(response.path, "rb") as f:
+        assert f.read() == AUDIO
+    assert len(server["requests"]) == 1
+    assert [f for f in os.listdir(tmp_path) if f.startswith("tts_stream")] == []
+    stats = routes.TTS_CACHE.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
@@ -0,0 +1,131 @@
+# test_jobs.py - Unit Tests for the Job Queue
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import jobs, workers
+from src.utils.workers import WorkerBusyError
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    queue = jobs.JobQueue(str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(jobs, "JOBS", queue)
+    return queue
+
+
+def test_interactive_jobs_claimed_first(queue):
+    bulk = [queue.submit("echo", {"n": i}, "bulk") for i in range(2)]
+    interactive = queue.submit("echo", {"n": 9}, "interactive")
+    assert queue.get(bulk[1])["position"] == 2
+
+    assert queue.claim()["id"] == interactive
+    assert queue.claim(max_priority=0) is None  # only bulk jobs left
+    assert queue.claim()["id"] == bulk[0]
+
+    queue.finish(bulk[0], result={"ok": True})
+    status = queue.get(bulk[0])
+    assert status["state"] == "done" and status["progress"] == 1.0 and status["result"] == {"ok": True}
+    assert queue.counts() == {"done": 1, "queued": 1, "running": 1}
+
+
+def test_interrupted_jobs_requeued_until_out_of_attempts(queue, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_MAX_ATTEMPTS", 2)
+    job_id = queue.submit("echo", {})
+    queue.claim()
+    assert queue.requeue_interrupted() == 1
+    assert queue.get(job_id)["state"] == "queued"
+
+    queue.claim()
+    queue.requeue_interrupted()
+    status = queue.get(job_id)
+    assert status["state"] == "failed" and status["attempts"] == 2
+
+
+def test_progress_reported_from_task(queue):
+    job_id = queue.submit("echo", {})
+    queue.claim()
+
+    def task(x):
+        jobs.report_progress(0.25)
+        jobs.report_progress(0.5)  # throttled
+        return x
+
+    assert jobs.run_job_task(job_id, task, 7) == 7
+    assert queue.get(job_id)["progress"] == 0.25
+    jobs.report_progress(0.9)  # outside a job: ignored
+    assert queue.get(job_id)["progress"] == 0.25
+
+
+def test_dispatcher_keeps_a_slot_for_interactive_jobs(queue):
+    order = []
+
+    async def handler(job_id, args):
+        order.append(args["name"])
+        await asyncio.sleep(0.05)
+        if args["name"] == "bad":
+            raise RuntimeError("boom")
+        return {"name": args["name"]}
+
+    async def main():
+        ids = [queue.submit("work", {"name": f"bulk{i}"}, "bulk") for i in range(3)]
+        ids.append(queue.submit("work", {"name": "bad"}, "bulk"))
+        dispatcher = asyncio.create_task(jobs.dispatch_jobs(queue, {"work": handler}, workers=2))
+        await asyncio.sleep(0.01)
+        ids.append(await queue.call(queue.submit, "work", {"name": "fast"}, "interactive"))  # wakes from a thread
+        while any(queue.get(i)["state"] in ("queued", "running") for i in ids):
+            await asyncio.sleep(0.01)
+        dispatcher.cancel()
+        return ids
+
+    ids = asyncio.run(main())
+    # One bulk job at a time with 2 workers; the interactive job starts straight away
+    assert order[:2] == ["bulk0", "fast"]
+    assert [queue.get(i)["state"] for i in ids] == ["done", "done", "done", "failed", "done"]
+    assert queue.get(ids[3])["error"] == "boom"
+
+
+def test_dispatcher_survives_a_saturated_io_pool(queue, monkeypatch):
+    monkeypatch.setitem(workers._in_flight, "io", workers.WORKER_QUEUE_DEPTH)  # run_io would reject
+
+    async def handler(job_id, args):
+        return {"ok": True}
+
+    async def main():
+        dispatcher = asyncio.create_task(jobs.dispatch_jobs(queue, {"work": handler}))
+        job_id = await queue.call(queue.submit, "work", {})
+        while queue.get(job_id)["state"] != "done":
+            assert not dispatcher.done()
+            await asyncio.sleep(0.01)
+        dispatcher.cancel()
+
+    asyncio.run(main())
+
+
+def test_busy_pool_requeues_until_out_of_attempts(queue, monkeypatch):
+    monkeypatch.setattr(jobs, "BUSY_RETRY_DELAY", 0)
+    monkeypatch.setattr(jobs, "JOB_MAX_ATTEMPTS", 3)
+    calls = []
+
+    async def handler(job_id, args):
+        calls.append(args["name"])
+        if args["name"] == "never" or calls.count(args["name"]) == 1:
+            raise WorkerBusyError("Server busy")
+        return {"ok": True}
+
+    async def main():
+        ids = [queue.submit("work", {"name": name}) for name in ("once", "never")]
+        dispatcher = asyncio.create_task(jobs.dispatch_jobs(queue, {"work": handler}))
+        while any(queue.get(i)["state"] in ("queued", "running") for i in ids):
+            await asyncio.sleep(0.01)
+        dispatcher.cancel()
+        return [queue.get(i) for i in ids]
+
+    once, never = asyncio.run(main())
+    assert once["state"] == "done" and once["attempts"] == 2
+    assert never["state"] == "failed" and never["attempts"] == 3 and never["error"] == "Server busy"
@@ -0,0 +1,59 @@
+# test_pitch.py - Unit Tests for the Single-Pass Pitch/Time Engine
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.processing import effects, pitch
+from src.processing.buffer import AudioBuffer
+
+SR = 22050
+
+
+def tone(freq, seconds=2.0):
+    t = np.arange(int(seconds * SR)) / SR
+    return (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def dominant_freq(y):
+    middle = y[len(y) // 4:3 * len(y) // 4]
+    spectrum = np.abs(np.fft.rfft(middle * np.hanning(len(middle))))
+    return np.argmax(spectrum) * SR / len(middle)
+
+
+def test_stft_round_trip():
+    y = np.random.default_rng(0).standard_normal(SR).astype(np.float32)
+    for n_fft, hop in [(1024, 512), (2048, 512), (2048, 256)]:
+        z = pitch.istft(pitch.stft(y, n_fft, hop), n_fft, hop, len(y))
+        assert z.dtype == np.float32
+        np.testing.assert_allclose(z, y, atol=1e-4)
+
+
+@pytest.mark.parametrize("quality", list(pitch.PITCH_QUALITIES))
+@pytest.mark.parametrize("steps, tempo", [(8, 1.5), (-10, 0.8), (-6, 1.0), (0, 1.25)])
+def test_pitch_and_length(quality, steps, tempo):
+    y = tone(440.0)
+    z = pitch.pitch_time(y, SR, pitch.semitones(steps), tempo, quality)
+    assert len(z) == round(len(y) / tempo) and z.dtype == np.float32
+    assert dominant_freq(z) == pytest.approx(440.0 * pitch.semitones(steps), rel=0.02)
+
+
+def test_identity_and_short_input():
+    y = tone(300.0, 0.5)
+    np.testing.assert_array_equal(pitch.pitch_time(y, SR), y)
+    assert len(pitch.pitch_time(y[:100], SR, 1.5, 2.0)) == 50
+    assert len(pitch.pitch_time(y[:0], SR, 1.5, 2.0)) == 0
+
+
+@pytest.mark.parametrize("apply", [effects.apply_chipmunk, effects.apply_robot,
+                                   effects.apply_electronic, effects.apply_monster])
+def test_effects_use_engine(apply):
+    y = tone(220.0)
+    out = apply(AudioBuffer(y, SR))
+    assert np.isfinite(out.samples).all() and np.max(np.abs(out.samples)) <= 1.0
+    expected = {"chipmunk": round(len(y) / 1.5), "monster": round(len(y) / 0.8)}
+    assert len(out.samples) == expected.get(out.metadata["stages"][-1], len(y))
@@ -0,0 +1,56 @@
+# test_resample.py - Unit Tests for the Processing-Rate Policy and Resampling
+import os
+import sys
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.processing import AudioBuffer, EFFECTS, load_buffer, run_effect
+from src.processing import resample as rs
+from src.processing.streaming import effect_stages, stream_file
+
+
+def test_processing_rate_policy():
+    assert rs.processing_rate(44100, "native", 22050) == 44100
+    assert rs.processing_rate(44100, "fixed", 22050) == 22050
+    assert rs.processing_rate(8000, "fixed", 22050) == 22050
+    assert rs.processing_rate(44100, "cap", 22050) == 22050
+    assert rs.processing_rate(8000, "cap", 22050) == 8000
+
+
+@pytest.mark.parametrize("quality", list(rs.RESAMPLE_QUALITIES))
+def test_polyphase_fallback_is_accurate(monkeypatch, quality):
+    monkeypatch.setattr(rs, "soxr", None)
+    x = np.sin(2 * np.pi * 1000 * np.arange(48000) / 48000)
+    y = rs.resample(x, 48000, 22050, quality)
+    reference = np.sin(2 * np.pi * 1000 * np.arange(len(y)) / 22050)
+    assert len(y) == 22050
+    assert np.max(np.abs(y - reference)[500:-500]) < 2e-3
+
+
+def test_single_decode_point_and_stream_use_same_rate(tmp_path):
+    sr = 48000
+    x = 0.3 * np.sin(2 * np.pi * 440 * np.arange(sr * 2) / sr)
+    sf.write(str(tmp_path / "in.wav"), x, sr, subtype='FLOAT')
+
+    buf = load_buffer(str(tmp_path / "in.wav"), sr=16000)
+    assert buf.sr == 16000 and len(buf.samples) == 32000 and buf.metadata["native_sr"] == sr
+
+    stats = stream_file(str(tmp_path / "in.wav"), str(tmp_path / "out.wav"),
+                        lambda sr: effect_stages("echo", sr), blocksize=5000, sample_rate=16000)
+    y, out_sr = sf.read(str(tmp_path / "out.wav"))
+    assert stats["sample_rate"] == out_sr == 16000
+    assert len(y) == 32000
+    np.testing.assert_allclose(y, run_effect(buf, "echo").samples, atol=1e-3)
+
+
+@pytest.mark.parametrize("sr", [8000, 48000])
+def test_effects_adapt_to_sample_rate(sr):
+    y = (0.5 * np.sin(2 * np.pi * 440 * np.arange(sr) / sr)).astype(np.float32)
+    for effect in EFFECTS:
+        out = run_effect(AudioBuffer(y, sr), effect).samples
+        assert np.all(np.isfinite(out)) and np.max(np.abs(out)) > 0, effect
@@ -0,0 +1,116 @@
+# test_reverb.py - Unit Tests for Delays and Convolution Reverb
+import os
+import sys
+
+import numpy as np
+import pytest
+import soundfile as sf
+from scipy.signal import fftconvolve, lfilter
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.processing import AudioBuffer, reverb, run_effect
+from src.processing.chain import ChainError, validate_chain
+from src.processing.streaming import effect_stages, stream_file
+
+
+def test_tap_delay_is_sparse_fir():
+    x = np.random.default_rng(0).standard_normal(5000)
+    taps = np.zeros(301)
+    taps[[0, 100, 200, 300]] = [1.0, 0.5, 0.3, 0.1]
+    np.testing.assert_allclose(reverb.tap_delay(x, [100, 200, 300], [0.5, 0.3, 0.1]),
+                               fftconvolve(x, taps)[:len(x)], atol=1e-9)
+
+
+def test_feedback_delay_is_recursive_comb():
+    x = np.random.default_rng(1).standard_normal(10000)
+    d, g = 441, 0.6
+    wet = lfilter(np.r_[np.zeros(d), 1.0], np.r_[1.0, np.zeros(d - 1), -g], x)
+    np.testing.assert_allclose(reverb.feedback_delay(x, d, g, mix=0.4), 0.6 * x + 0.4 * wet, atol=1e-9)
+
+
+@pytest.mark.parametrize("partition, block", [(256, 777), (1024, 100000), (4096, 1000)])
+def test_partitioned_convolution_matches_direct(partition, block):
+    rng = np.random.default_rng(2)
+    x, ir = rng.standard_normal(50000), rng.standard_normal(9000)
+    reference = fftconvolve(x, ir)[:len(x)]
+    np.testing.assert_allclose(reverb.partitioned_convolve(x, ir, partition), reference, atol=1e-8)
+
+    conv = reverb.PartitionedConvolver(ir, partition)
+    parts = [conv.process(x[i:i + block]) for i in range(0, len(x), block)]
+    streamed = np.concatenate(parts + [conv.process(np.zeros(partition))])[:len(x)]
+    np.testing.assert_allclose(streamed, reference, atol=1e-8)
+
+
+def test_rooms(tmp_path, monkeypatch):
+    hall = reverb.impulse_response("hall", 16000)
+    assert np.sum(hall ** 2) == pytest.approx(1.0) and not hall.flags.writeable
+    assert len(hall) == int((0.02 + 1.8) * 16000)
+    tail = np.abs(hall[-1600:]).max() / np.abs(hall).max()
+    assert tail < 10 ** (-40 / 20)  # decayed by the end of the RT60
+
+    monkeypatch.setattr(reverb, "IMPULSE_RESPONSE_DIR", str(tmp_path))
+    sf.write(tmp_path / "studio.wav", np.r_[1.0, np.zeros(99), 0.5], 8000)
+    assert reverb.available_rooms()[-1] == "studio"
+    ir = reverb.impulse_response("studio", 8000)
+    assert ir[100] / ir[0] == pytest.approx(0.5, rel=1e-3)  # 16-bit file
+    with pytest.raises(ValueError):
+        reverb.impulse_response("../studio", 8000)
+
+
+@pytest.mark.parametrize("effect, params", [("reverb", {"room": "room", "mix": 0.5}),
+                                            ("delay", {"delay": 0.1, "feedback": 0.7})])
+def test_streamed_matches_batch(tmp_path, effect, params):
+    sr = 8000
+    t = np.arange(3 * sr) / sr
+    x = 0.3 * np.sin(2 * np.pi * 300 * t) * (t < 1)
+    sf.write(tmp_path / "in.wav", x, sr, subtype="FLOAT")
+    stream_file(str(tmp_path / "in.wav"), str(tmp_path / "out.wav"),
+                lambda sr: effect_stages(effect, sr, **params), blocksize=1500)
+    y, _ = sf.read(str(tmp_path / "out.wav"))
+    reference = run_effect(AudioBuffer(x, sr), effect, **params).samples
+    assert len(y) == len(reference) == len(x) + (reverb_tail(effect, sr, params) if effect == "reverb" else 0)
+    np.testing.assert_allclose(y, reference, atol=2 ** -14)  # 16-bit output: rounding plus block error
+    assert np.abs(y[int(1.2 * sr):]).max() > 0.01  # tail rings past the dry signal
+
+
+def reverb_tail(effect, sr, params):
+    return reverb.reverb_tail(len(reverb.reverb_ir(params["room"], sr, params["mix"])), sr)
+
+
+def test_reverb_keeps_tail(monkeypatch):
+    sr = 8000
+    x = np.zeros(sr // 2)
+    x[:400] = np.sin(2 * np.pi * 300 * np.arange(400) / sr)
+    wet = reverb.reverb(x, sr, "hall", mix=1.0)
+    ir = reverb.impulse_response("hall", sr)
+    assert len(wet) == len(x) + len(ir) - 1  # a 1.8 s hall rings out past a 0.5 s clip
+    reference = fftconvolve(x, ir)
+    np.testing.assert_allclose(wet, reference, atol=1e-8)
+    assert np.sum(wet[len(x):] ** 2) > 0.01 * np.sum(wet ** 2)  # the decay that truncation used to drop
+
+    monkeypatch.setattr(reverb, "REVERB_MAX_TAIL_SECONDS", 0.25)
+    assert len(reverb.reverb(x, sr, "hall")) == len(x) + sr // 4
+    monkeypatch.setattr(reverb, "REVERB_MAX_TAIL_SECONDS", 0)
+    assert len(reverb.reverb(x, sr, "hall")) == len(x)
+
+
+def test_chain_validates_room():
+    assert validate_chain([{"type": "reverb", "room": "cathedral"}])[0]["mix"] == 0.35
+    with pytest.raises(ChainError):
+        validate_chain([{"type": "reverb", "room": "nowhere"}])
+    with pytest.raises(ChainError):
+        validate_chain([{"type": "delay", "feedback": 1.0}])
+
+
+def test_process_audio_params_bounded():
+    from src.api.routes import effect_params_error
+
+    assert effect_params_error("echo", {"delay": 0.5}) is None
+    assert effect_params_error("delay", {"delay": 0.3, "feedback": 0.5, "mix": 0.4}) is None
+    for effect, params in [("echo", {"delay": 1e9}), ("delay", {"delay": float("nan")}),
+                           ("stutter", {"repeat": 100000}), ("delay", {"feedback": 1.0}),
+                           ("reverb", {"room": "nowhere"}), ("filter", {"filter_type": "bogus"}),
+                           ("filter", {"filter_type": "siren", "intensity": 101.0})]:
+        assert effect_params_error(effect, params)
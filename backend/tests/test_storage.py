@@ -0,0 +1,70 @@
+# test_storage.py - Unit Tests for the Artifact Index, Janitor and Temp Scopes
+import os
+import sys
+import time
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import storage
+
+
+def make_file(path, size, age_hours=0.0):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    mtime = time.time() - age_hours * 3600
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_ttl_then_quota(tmp_path):
+    index = storage.ArtifactIndex(str(tmp_path / "storage.db"))
+    now = time.time()
+    old = make_file(tmp_path / "old.wav", 100)
+    index.add(old, "processed", created=now - 48 * 3600)
+    recent = []
+    for i in range(5):
+        recent.append(make_file(tmp_path / f"r{i}.wav", 400 * 1024))
+        index.add(recent[-1], "processed", created=now - 60 + i)
+    raw = make_file(tmp_path / "raw.wav", 100)
+    index.add(raw, "raw", created=now - 48 * 3600)
+
+    # 1 MB quota: the three oldest recent files must go as well
+    report = index.sweep({"processed": 24, "raw": 72}, {"processed": 1, "raw": 1}, now=now)
+    assert report == {"processed": {"expired": 1, "evicted": 3, "bytes_freed": 100 + 3 * 400 * 1024}}
+    assert [os.path.exists(p) for p in [old] + recent] == [False, False, False, False, True, True]
+    assert os.path.exists(raw)
+    assert index.usage()["processed"] == {"files": 2, "bytes": 2 * 400 * 1024}
+
+
+def test_adopt_indexes_existing_files_once(tmp_path):
+    index = storage.ArtifactIndex(str(tmp_path / "storage.db"))
+    directory = tmp_path / "processed"
+    (directory / "sub").mkdir(parents=True)
+    make_file(directory / "a.wav", 10, age_hours=30)
+    index.adopt("processed", str(directory))
+    make_file(directory / "b.wav", 10)
+    index.adopt("processed", str(directory))  # already adopted: no rescan
+    assert index.usage()["processed"]["files"] == 1
+
+    index.sweep({"processed": 24}, {})
+    assert not (directory / "a.wav").exists() and (directory / "b.wav").exists()
+
+
+def test_temp_scope_removes_files_on_error(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "SCRATCH_DIR", str(tmp_path))
+    with pytest.raises(RuntimeError):
+        with storage.TempScope() as scope:
+            upload = make_file(scope.path("input", ".webm"), 10)
+            converted = scope.track(make_file(tmp_path / "converted.wav", 10))
+            raise RuntimeError("worker failed")
+    assert not os.path.exists(upload) and not os.path.exists(converted)
+
+
+def test_sweep_scratch_removes_orphans(tmp_path):
+    make_file(tmp_path / "orphan", 10, age_hours=2)
+    make_file(tmp_path / "in_use", 10)
+    assert storage.sweep_scratch(1, str(tmp_path)) == 1
+    assert os.listdir(tmp_path) == ["in_use"]
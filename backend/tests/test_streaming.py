@@ -0,0 +1,140 @@
+# test_streaming.py - Unit Tests for the Block Streaming Engine
+import os
+import sys
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import SCRATCH_DIR
+from src.processing import AudioBuffer, run_effect, write_buffer
+from src.processing.streaming import BlockStage, SpectralStage, effect_stages, stream_file
+
+
+def write_input(path, sr=8000, seconds=3):
+    rng = np.random.default_rng(0)
+    t = np.arange(sr * seconds) / sr
+    x = 0.3 * np.sin(2 * np.pi * 300 * t) + 0.01 * rng.standard_normal(len(t))
+    sf.write(path, x, sr, subtype='FLOAT')
+    return x, sr
+
+
+# Streamed output is 16-bit PCM: one quantization step
+PCM16_STEP = 2 ** -15
+
+
+def test_overlap_add_is_transparent(tmp_path):
+    """An identity spectral stage reproduces the input exactly despite its latency."""
+    x, sr = write_input(str(tmp_path / "in.wav"))
+    stream_file(str(tmp_path / "in.wav"), str(tmp_path / "out.wav"),
+                lambda sr: [SpectralStage(lambda spec, freqs: spec, sr)], blocksize=1000, normalize=False)
+    y, _ = sf.read(str(tmp_path / "out.wav"))
+    assert len(y) == len(x)
+    np.testing.assert_allclose(y, x, atol=PCM16_STEP)
+
+
+def test_streamed_echo_matches_batch(tmp_path):
+    """Delay-line state carried across blocks gives the same result as the batch effect."""
+    x, sr = write_input(str(tmp_path / "in.wav"))
+    stream_file(str(tmp_path / "in.wav"), str(tmp_path / "out.wav"),
+                lambda sr: effect_stages("echo", sr, delay=0.15), blocksize=777)
+    y, _ = sf.read(str(tmp_path / "out.wav"))
+    reference = run_effect(AudioBuffer(x, sr), "echo", delay=0.15).samples
+    np.testing.assert_allclose(y, reference, atol=PCM16_STEP)
+
+
+@pytest.mark.parametrize("normalize", [True, False])
+def test_streamed_and_in_memory_write_same_format(tmp_path, normalize):
+    x, sr = write_input(str(tmp_path / "in.wav"))
+    scratch = set(os.listdir(SCRATCH_DIR))
+    stream_file(str(tmp_path / "in.wav"), str(tmp_path / "streamed.wav"),
+                lambda sr: effect_stages("echo", sr), normalize=normalize)
+    assert set(os.listdir(SCRATCH_DIR)) <= scratch  # the float first pass is removed
+    write_buffer(run_effect(AudioBuffer(x, sr), "echo"), str(tmp_path / "batch.wav"))
+    streamed, batch = sf.info(str(tmp_path / "streamed.wav")), sf.info(str(tmp_path / "batch.wav"))
+    assert streamed.subtype == batch.subtype == "PCM_16"
+
+
+@pytest.mark.parametrize("normalize", [True, False])
+def test_failed_stream_leaves_no_files(tmp_path, normalize):
+    class Failing(BlockStage):
+        def __init__(self):
+            self.blocks = 0
+
+        def process(self, block):
+            self.blocks += 1
+            if self.blocks == 3:
+                raise RuntimeError("stage failed")
+            return block
+
+    write_input(str(tmp_path / "in.wav"))
+    scratch = set(os.listdir(SCRATCH_DIR))
+    with pytest.raises(RuntimeError):
+        stream_file(str(tmp_path / "in.wav"), str(tmp_path / "out.wav"), lambda sr: [Failing()],
+                    blocksize=1000, normalize=normalize)
+    assert not os.path.exists(tmp_path / "out.wav")
+    assert set(os.listdir(SCRATCH_DIR)) <= scratch
+
+
+def test_realtime_session_keeps_state_between_frames():
+    """Frame-by-frame realtime processing equals processing the whole signal at once."""
+    from src.processing.realtime import RealtimeSession
+
+    sr = 16000
+    x = 0.3 * np.sin(2 * np.pi * 500 * np.arange(sr) / sr)
+    framed = RealtimeSession("telephone", sr, 320)
+    whole = RealtimeSession("telephone", sr, len(x))
+
+    y = np.concatenate([framed.process(frame) for frame in np.split(x, 50)])
+    np.testing.assert_allclose(y, whole.process(x), atol=1e-9)
+    assert framed.stats()["frames"] == 50
+    assert framed.algorithmic_latency_ms == 20.0
+
+
+@pytest.mark.parametrize("effect, sr, params", [
+    ("delay", 16000, {"feedback": 1.0}),
+    ("echo", 16000, {"delay": 20000}),
+    ("echo", 16000, {"delay": float("nan")}),
+    ("echo", 16000, {"depth": 0.5}),
+    ("process_voice", 8000, {"cutoff": 5000}),
+    ("robot", 0, {}),
+    ("robot", 10 ** 9, {}),
+])
+def test_realtime_session_rejects_bad_config(effect, sr, params):
+    from src.processing.realtime import RealtimeSession
+
+    with pytest.raises(ValueError):
+        RealtimeSession(effect, sr, 320, params)
+
+
+def test_realtime_stats_window_is_bounded(monkeypatch):
+    from src.processing import realtime
+
+    monkeypatch.setattr(realtime, "STATS_WINDOW", 10)
+    session = realtime.RealtimeSession("delay", 16000, 160, {"delay": 0.05, "feedback": 0.5})
+    for _ in range(25):
+        session.process(np.zeros(160))
+    stats = session.stats()
+    assert len(session.processing_ms) == 10 and stats["frames"] == 25
+    assert stats["processing_ms_max"] >= stats["processing_ms_p95"] >= 0
+
+
+def test_realtime_nonfinite_samples_do_not_poison_state():
+    from src.processing.realtime import RealtimeSession
+
+    x = 0.3 * np.sin(2 * np.pi * 500 * np.arange(1600) / 16000)
+    clean = RealtimeSession("telephone", 16000, 320)
+    dirty = RealtimeSession("telephone", 16000, 320)
+    frames = np.split(x, 5)
+    bad = frames[1].copy()
+    bad[[3, 7, 11]] = [np.nan, np.inf, -np.inf]
+    zeroed = np.where(np.isfinite(bad), bad, 0.0)
+
+    out = [dirty.process(f) for f in (frames[0], bad, *frames[2:])]
+    reference = [clean.process(f) for f in (frames[0], zeroed, *frames[2:])]
+    assert all(np.isfinite(o).all() for o in out)
+    np.testing.assert_allclose(np.concatenate(out), np.concatenate(reference))
+    assert dirty.stats()["nonfinite_samples"] == 3
@@ -0,0 +1,110 @@
+# test_stt.py - Unit Tests for the VAD and Long-Form Speech-to-Text
+import asyncio
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.api import routes, tasks
+from src.processing import speech, vad
+from src.utils import storage
+
+SR = 16000
+
+
+def speech_like(layout, seed=0):
+    """Concatenate ("speech"|"pause", seconds) parts: tone bursts over low noise."""
+    rng = np.random.default_rng(seed)
+    parts = []
+    for kind, seconds in layout:
+        n = int(seconds * SR)
+        noise = 0.001 * rng.standard_normal(n)
+        if kind == "speech":
+            t = np.arange(n) / SR
+            noise += 0.3 * np.sin(2 * np.pi * 220 * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t))
+        parts.append(noise)
+    return np.concatenate(parts).astype(np.float32)
+
+
+def test_segments_follow_pauses():
+    y = speech_like([("pause", 0.5), ("speech", 2.0), ("pause", 0.1), ("speech", 1.0),
+                     ("pause", 1.0), ("speech", 0.05), ("pause", 1.0), ("speech", 1.5), ("pause", 0.5)])
+    hop = int(vad.FRAME_SECONDS * SR)
+    segments = vad.speech_segments(vad.frame_energy_db(y, hop), hop, SR, len(y), pad=0.0)
+    # 0.1 s pause bridged, 50 ms blip dropped
+    assert len(segments) == 2
+    assert segments[0][0] / SR == pytest.approx(0.5, abs=0.05)
+    assert segments[0][1] / SR == pytest.approx(3.6, abs=0.05)
+    assert segments[1][0] / SR == pytest.approx(5.65, abs=0.05)
+
+
+def test_long_speech_split_at_quietest_point():
+    y = speech_like([("speech", 7.0), ("pause", 0.2), ("speech", 5.0)])  # pause under min_silence
+    hop = int(vad.FRAME_SECONDS * SR)
+    db = vad.frame_energy_db(y, hop)
+    segments = vad.speech_segments(db, hop, SR, len(y), min_silence=0.5, max_seconds=10.0, pad=0.1)
+    assert len(segments) == 2
+    assert 7.0 <= segments[0][1] / SR <= 7.3  # cut inside the short pause
+    assert all(e - s <= 10.2 * SR for s, e in segments)
+    assert segments[1][0] == segments[0][1]  # padding never overlaps
+
+
+def test_file_energies_match_in_memory(tmp_path):
+    y = speech_like([("speech", 1.0), ("pause", 1.0)])
+    sf.write(tmp_path / "a.flac", np.stack([y, y], axis=1), SR)
+    db, hop, rate, frames = vad.file_frame_energy_db(str(tmp_path / "a.flac"))
+    assert rate == SR and frames == len(y)
+    np.testing.assert_allclose(db, vad.frame_energy_db(y, hop), atol=0.05)
+
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch):
+    monkeypatch.setattr(speech, "STT_RECOGNIZER", "local")
+    monkeypatch.setattr(routes, "STT_CONCURRENCY", 2)
+    monkeypatch.setattr(storage, "SCRATCH_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_long_form_transcript_in_order(offline):
+    path = str(offline / "talk.wav")
+    sf.write(path, speech_like([("speech", 1.0), ("pause", 1.0), ("speech", 2.0), ("pause", 1.0), ("speech", 0.5)]), SR)
+    plan = tasks.stt_plan_task(path)
+    assert len(plan["segments"]) == 3 and plan["duration"] == pytest.approx(5.5)
+
+    async def run():
+        return [entry async for entry in routes.transcribe_segments(plan, "en-US")]
+
+    result = routes.stitch_transcript(asyncio.run(run()), plan["duration"])
+    assert [e["index"] for e in result["segments"]] == [0, 1, 2]
+    assert result["text"].startswith("[speech 1.") and result["failed"] == 0
+    assert result["segments"][1]["start"] == pytest.approx(1.9, abs=0.05)
+
+
+def test_streamed_partials_then_transcript(offline, monkeypatch):
+    def flaky(audio, language):
+        if len(audio.frame_data) > 3 * SR:  # the 2 s segment (16-bit)
+            raise speech.sr.RequestError("quota")
+        return "ok"
+
+    monkeypatch.setitem(speech.RECOGNIZERS, "local", flaky)
+    path = str(offline / "talk.wav")
+    sf.write(path, speech_like([("speech", 1.0), ("pause", 1.0), ("speech", 2.0), ("pause", 1.0), ("speech", 0.5)]), SR)
+    plan = tasks.stt_plan_task(path)
+    scope = storage.TempScope()
+    scope.track(path)
+
+    async def run():
+        return [line async for line in routes.stream_transcript(plan, "vi-VN", scope)]
+
+    lines = [json.loads(line) for line in asyncio.run(run())]
+    assert len(lines) == 4 and all("partial" in line for line in lines[:3])
+    final = lines[-1]
+    assert final["done"] and final["text"] == "ok ok" and final["failed"] == 1
+    assert final["segments"][1]["error"] == "quota"
+    assert not os.path.exists(path)  # scope cleaned up
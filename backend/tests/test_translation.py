@@ -0,0 +1,109 @@
+# test_translation.py - Unit Tests for the Translation Cache and Batch Translation
+import asyncio
+import os
+import sqlite3
+import sys
+import threading
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.api import routes
+from src.utils import translation
+from src.utils.translation import TranslationCache
+
+
+@pytest.fixture
+def fake_translator(tmp_path, monkeypatch):
+    """Upper-cases text (fails on "bad"); records calls and peak concurrency."""
+    cache = TranslationCache(str(tmp_path / "translations.db"), memory_entries=100, max_entries=1000)
+    monkeypatch.setattr(routes, "TRANSLATIONS", cache)
+    monkeypatch.setattr(routes, "TRANSLATION_CONCURRENCY", 2)
+    calls, active, lock = [], [0, 0], threading.Lock()
+
+    def translate(text, source, target):
+        with lock:
+            calls.append((text, source, target))
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+        try:
+            if text == "bad":
+                raise ValueError("Translation failed: boom")
+            threading.Event().wait(0.02)
+            return text.upper()
+        finally:
+            with lock:
+                active[0] -= 1
+
+    monkeypatch.setattr(routes, "translate_uncached", translate)
+    return calls, active
+
+
+def test_batch_dedups_and_keeps_order(fake_translator):
+    calls, active = fake_translator
+    segments = ["xin chào", "cảm ơn", " xin chào", "", "bad", "một", "hai", "cảm ơn"]
+    results = asyncio.run(routes.translate_segments(segments, "vi", "zh-CN"))
+
+    assert [r["translated_text"] for r in results] == [
+        "XIN CHÀO", "CẢM ƠN", "XIN CHÀO", "", None, "MỘT", "HAI", "CẢM ƠN"
+    ]
+    assert [r["cached"] for r in results] == [False, False, True, False, False, False, False, True]
+    assert "boom" in results[4]["error"]
+    assert sorted(c[0] for c in calls) == sorted(["xin chào", "cảm ơn", "bad", "một", "hai"])
+    assert calls[0][1:] == ("vi", "chinese (simplified)")
+    assert active[1] == 2  # bounded by TRANSLATION_CONCURRENCY
+
+    calls.clear()
+    again = asyncio.run(routes.translate_segments(["hai", "bad"], "vi", "zh"))
+    assert again[0] == {"translated_text": "HAI", "cached": True}
+    assert calls == [("bad", "vi", "chinese (simplified)")]  # failures are not cached
+
+
+def test_cache_persists_and_trims(tmp_path):
+    path = str(tmp_path / "translations.db")
+    cache = TranslationCache(path, memory_entries=2, max_entries=3)
+    for text in ["a", "b", "c"]:
+        cache.put_many("vi", "en", {text: text.upper()})
+    assert len(cache.memory) == 2
+    assert cache.get_many("vi", "en", ["a", "z"]) == {"a": "A"}  # from disk, now most recent
+    cache.put_many("vi", "en", {"d": "D"})  # over max_entries: "b" was used least recently
+
+    reopened = TranslationCache(path, memory_entries=2, max_entries=3)
+    assert reopened.get_many("vi", "en", ["a", "b", "c", "d"]) == {"a": "A", "c": "C", "d": "D"}
+    assert reopened.get_many("vi", "fr", ["a"]) == {}
+    assert reopened.stats()["hits"] == 3 and reopened.stats()["misses"] == 2
+
+
+def test_row_count_tracked_without_recounting(tmp_path):
+    path = str(tmp_path / "translations.db")
+    cache = TranslationCache(path, memory_entries=2, max_entries=4)
+    cache.put_many("vi", "en", {"a": "A", "b": "B"})
+    cache.put_many("vi", "en", {"a": "A2", "c": "C"})  # "a" is updated, not counted twice
+    assert cache._rows == 3
+    statements = []
+    cache._connect().set_trace_callback(statements.append)
+    cache.put_many("vi", "en", {"d": "D", "e": "E", "f": "F"})
+    assert not any("COUNT" in s for s in statements)
+    assert cache._rows == 4
+    rows = dict(sqlite3.connect(path).execute("SELECT text, translation FROM translations").fetchall())
+    assert len(rows) == 4 and rows.get("a") in (None, "A2")
+
+
+def test_translators_reused_per_thread(monkeypatch):
+    created = []
+
+    class FakeTranslator:
+        def __init__(self, source, target):
+            created.append((source, target))
+
+        def translate(self, text):
+            return text[::-1]
+
+    monkeypatch.setattr(translation, "GoogleTranslator", FakeTranslator)
+    monkeypatch.setattr(translation, "_local", threading.local())
+    assert translation.translate_uncached("abc", "vi", "en") == "cba"
+    translation.translate_uncached("def", "vi", "en")
+    translation.translate_uncached("def", "vi", "ja")
+    assert created == [("vi", "en"), ("vi", "ja")]
@@ -0,0 +1,75 @@
+# test_tts_cache.py - Unit Tests for the Speech Synthesis Cache
+import asyncio
+import os
+import sys
+
+import pytest
+import soundfile as sf
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.api import routes
+from src.processing import speech
+from src.utils.cache import DiskCache
+
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch):
+    """Local stand-in synthesizer, scratch and cache in tmp_path; counts synthesis calls."""
+    monkeypatch.setattr(speech, "SCRATCH_DIR", str(tmp_path))
+    monkeypatch.setattr(speech, "TTS_SYNTHESIZER", "local")
+    monkeypatch.setattr(routes, "TEMP_DIR", str(tmp_path))
+    monkeypatch.setattr(routes, "TTS_CACHE", DiskCache(str(tmp_path / "cache"), 1 << 20, "tts"))
+    monkeypatch.setattr(routes, "TTS_ENGINE_STATS", {})
+    calls = []
+
+    def counting(text, **params):
+        calls.append(text)
+        return speech.local_text_to_speech(text, **params)
+
+    monkeypatch.setitem(speech.SYNTHESIZERS, "local", counting)
+    return calls
+
+
+def test_repeated_prompts_served_from_cache(offline, tmp_path):
+    async def run():
+        first = await routes.cached_speech("gtts", "Xin  chào\n", lang="vi")
+        again = await routes.cached_speech("gtts", " Xin chào", lang="vi")
+        other = await routes.cached_speech("gtts", "Xin chào", lang="en")
+        return first, again, other
+
+    first, again, other = asyncio.run(run())
+    assert offline == ["Xin chào", "Xin chào"]  # normalized; "en" is a different prompt
+    assert first == {**again, "cached": False} and again["cached"]
+    assert other["audio_url"] != first["audio_url"]
+
+    y, sr = sf.read(tmp_path / os.path.basename(first["audio_url"]))
+    assert sr == speech.LOCAL_TTS_RATE and len(y) > 0
+    assert routes.tts_cache_stats()["engines"]["gtts"] == {"hits": 1, "misses": 2, "characters_saved": 9}
+
+
+def test_concurrent_prompts_synthesized_once(offline):
+    async def run():
+        return await asyncio.gather(*[routes.cached_speech("elevenlabs", "Hello", voice_id="v1") for _ in range(4)])
+
+    results = asyncio.run(run())
+    assert len(offline) == 1
+    assert len({r["audio_url"] for r in results}) == 1
+
+
+def test_key_covers_params_and_engine(monkeypatch):
+    monkeypatch.setattr(speech, "TTS_SYNTHESIZER", "")
+    key = speech.synthesis_key("elevenlabs", "Hi", voice_id="a", voice_settings={"stability": 0.5})
+    assert key == speech.synthesis_key("elevenlabs", "Hi ", voice_id="a", voice_settings={"stability": 0.5})
+    assert key != speech.synthesis_key("elevenlabs", "Hi", voice_id="a", voice_settings={"stability": 0.6})
+    assert key != speech.synthesis_key("gtts", "Hi", voice_id="a", voice_settings={"stability": 0.5})
+    monkeypatch.setattr(speech, "TTS_SYNTHESIZER", "local")
+    assert key != speech.synthesis_key("elevenlabs", "Hi", voice_id="a", voice_settings={"stability": 0.5})
+
+
+def test_failed_synthesis_not_cached(offline, monkeypatch):
+    monkeypatch.setitem(speech.SYNTHESIZERS, "local", lambda text, **params: None)
+    with pytest.raises(speech.SynthesisError):
+        asyncio.run(routes.cached_speech("elevenlabs", "Hello", voice_id="v1"))
+    assert routes.TTS_CACHE.stats()["entries"] == 0
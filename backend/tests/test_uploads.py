@@ -0,0 +1,54 @@
+# test_uploads.py - Unit Tests for Upload Ingestion
+import hashlib
+import io
+import os
+import sys
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import uploads
+
+
+def test_save_upload_hashes_while_copying(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_CHUNK_BYTES", 1000)
+    body = os.urandom(10_500)
+    size, digest = uploads.save_upload(io.BytesIO(body), str(tmp_path / "up"), max_bytes=20_000)
+    assert size == len(body) and digest == hashlib.sha256(body).hexdigest()
+    assert (tmp_path / "up").read_bytes() == body
+
+
+def test_save_upload_stops_at_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_CHUNK_BYTES", 1000)
+    reads = []
+
+    class Body(io.BytesIO):
+        def read(self, n=-1):
+            reads.append(n)
+            return super().read(n)
+
+    with pytest.raises(uploads.UploadTooLargeError):
+        uploads.save_upload(Body(b"x" * 100_000), str(tmp_path / "up"), max_bytes=5000)
+    assert len(reads) == 6  # stopped right after crossing the limit
+    assert not (tmp_path / "up").exists()
+
+
+def test_duration_checked_from_header(tmp_path):
+    path = str(tmp_path / "long.wav")
+    sf.write(path, np.zeros(8000 * 5, dtype=np.float32), 8000)
+    uploads.check_file_duration(path, max_seconds=10)
+    with pytest.raises(uploads.UploadTooLargeError):
+        uploads.check_file_duration(path, max_seconds=4)
+
+
+def test_archive_is_a_rename(tmp_path):
+    src, dst = tmp_path / "a", tmp_path / "raw" / "b"
+    dst.parent.mkdir()
+    src.write_bytes(b"audio")
+    inode = os.stat(src).st_ino
+    uploads.archive_file(str(src), str(dst))
+    assert not src.exists() and os.stat(dst).st_ino == inode
@@ -0,0 +1,60 @@
+# test_waveform.py - Unit Tests for Waveform Peak Summaries
+import os
+import sys
+
+import numpy as np
+import soundfile as sf
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.waveform import WaveformPeaks, compute_peaks, file_peaks, peaks_for_zoom
+
+
+def test_peaks_match_per_bucket_reference():
+    y = np.random.default_rng(0).uniform(-1, 1, 1000).astype(np.float32)
+    peaks = compute_peaks(y, 8000, 64)
+    assert peaks.length == 16  # last bucket is partial
+    for i in (0, 7, 15):
+        bucket = y[i * 64:(i + 1) * 64]
+        assert peaks.min[i] == bucket.min() and peaks.max[i] == bucket.max()
+        np.testing.assert_allclose(peaks.rms[i], np.sqrt(np.mean(bucket ** 2)), rtol=1e-5)
+
+
+def test_coarser_levels_and_file_summary_agree(tmp_path):
+    sr = 8000
+    y = np.random.default_rng(1).uniform(-0.9, 0.9, sr * 5).astype(np.float32)
+    sf.write(str(tmp_path / "a.wav"), y, sr, subtype='FLOAT')
+
+    base = file_peaks(str(tmp_path / "a.wav"), 256)
+    direct = compute_peaks(y, sr, 1024)
+    derived = peaks_for_zoom(base, samples_per_pixel=1000)  # rounded up to 4 x 256
+    assert derived.samples_per_pixel == 1024
+    np.testing.assert_array_equal(derived.min, direct.min)
+    np.testing.assert_array_equal(derived.max, direct.max)
+    np.testing.assert_allclose(derived.rms[:-1], direct.rms[:-1], rtol=1e-5)
+
+
+def test_dat_round_trip():
+    peaks = compute_peaks(np.sin(np.linspace(0, 20, 5000)), 22050, 256)
+    parsed = WaveformPeaks.from_dat(peaks.to_dat(bits=16))
+    assert (parsed.sample_rate, parsed.samples_per_pixel, parsed.length) == (22050, 256, peaks.length)
+    np.testing.assert_allclose(parsed.max, peaks.max, atol=1e-4)
+    assert len(peaks.to_json(bits=8)["data"]) == 2 * peaks.length
+
+
+def test_waveform_image_rendered_once(tmp_path, monkeypatch):
+    from src.api import tasks
+    from src.utils import storage
+
+    monkeypatch.setattr(tasks, "WAVEFORM_DIR", str(tmp_path / "waveforms"))
+    monkeypatch.setattr(tasks, "PEAKS_DIR", str(tmp_path / "peaks"))
+    monkeypatch.setattr(storage, "ARTIFACTS", storage.ArtifactIndex(str(tmp_path / "storage.db")))
+    sr = 8000
+    sf.write(str(tmp_path / "a.wav"), 0.5 * np.sin(np.arange(sr) / 10), sr)
+
+    path = tasks.waveform_task(str(tmp_path / "a.wav"), None, 400, 200)
+    assert path.endswith("a_400x200.png") and open(path, "rb").read(8) == b"\x89PNG\r\n\x1a\n"
+    mtime = os.path.getmtime(path)
+    assert tasks.waveform_task(str(tmp_path / "a.wav"), None, 400, 200) == path
+    assert os.path.getmtime(path) == mtime
@@ -0,0 +1,38 @@
+# test_workers.py - Unit Tests for Worker Pools
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_run_io_returns_result():
+    """Blocking functions run off the loop and return their value."""
+    from src.utils.workers import run_io
+
+    assert asyncio.run(run_io(sum, [1, 2, 3])) == 6
+
+
+def test_queue_depth_and_timeout(monkeypatch):
+    """Tasks beyond the queue depth are rejected; slow tasks time out."""
+    from src.utils import workers
+
+    monkeypatch.setattr(workers, "WORKER_QUEUE_DEPTH", 1)
+
+    async def scenario():
+        slow = asyncio.ensure_future(workers.run_io(time.sleep, 0.3, timeout=0.05))
+        await asyncio.sleep(0)
+        with pytest.raises(workers.WorkerBusyError):
+            await workers.run_io(time.sleep, 0)
+        with pytest.raises(workers.WorkerTimeoutError):
+            await slow
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])